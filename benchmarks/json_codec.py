@@ -0,0 +1,105 @@
+"""
+Benchmark of the JSON codecs on page sizes the client actually fetches.
+
+    python benchmarks/json_codec.py [--repeat N]
+
+Pages are synthetic but shaped like the real responses: citizensearch (1000
+rows), punits/searchproductionunits (6000 rows), vitas/searchvitas (1000 rows)
+and a /search batch (200 results). Codecs that are not installed are skipped.
+"""
+
+import argparse
+import gc
+import random
+import string
+import time
+
+from momentum_client.codec import get_codec
+
+CODECS = ("stdlib", "orjson", "msgspec")
+
+
+def _tekst(n: int) -> str:
+    return "".join(random.choices(string.ascii_letters + "æøåÆØÅ ", k=n))
+
+
+def _borger(i: int) -> dict:
+    return {
+        "id": f"{i:08d}-0000-0000-0000-000000000000",
+        "cpr": f"{random.randint(10**9, 10**10 - 1)}",
+        "name": _tekst(20),
+        "address": {"street": _tekst(18), "zipCode": "5000", "city": "Odense C"},
+        "isActive": True,
+        "caseworkers": [{"id": f"{j}", "name": _tekst(14), "role": "Primary"} for j in range(2)],
+        "targetGroup": {"code": "6.2", "title": _tekst(30)},
+        "lastContact": "2025-10-31T08:15:00Z",
+    }
+
+
+def _virksomhed(i: int) -> dict:
+    return {
+        "id": f"{i:08d}-1111-1111-1111-111111111111",
+        "cvr": f"{random.randint(10**7, 10**8 - 1)}",
+        "pNumber": f"{random.randint(10**9, 10**10 - 1)}",
+        "name": _tekst(25),
+        "industryCode": f"{random.randint(100000, 999999)}",
+        "employees": random.randint(0, 500),
+        "address": {"street": _tekst(18), "zipCode": "5000", "city": "Odense C"},
+    }
+
+
+def _vitas(i: int) -> dict:
+    return {"id": f"{i}", "type": "personalassistance", "title": _tekst(40), "amount": random.random() * 10000}
+
+
+SIDER = {
+    "citizensearch (1000)": lambda: {"data": [_borger(i) for i in range(1000)], "hasMore": True},
+    "searchproductionunits (6000)": lambda: {"data": [_virksomhed(i) for i in range(6000)], "hasMore": True},
+    "searchvitas (1000)": lambda: {"data": [_vitas(i) for i in range(1000)], "hasMore": False},
+    "search (200)": lambda: {"results": [_borger(i) for i in range(200)], "totalCount": 5000},
+}
+
+
+def _mål(funktion, repeat: int) -> float:
+    """Bedste tid i millisekunder over `repeat` kørsler, uden garbage collection undervejs."""
+    funktion()
+    gc.disable()
+    try:
+        bedste = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            funktion()
+            bedste = min(bedste, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return bedste * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    codecs = []
+    for navn in CODECS:
+        try:
+            codecs.append(get_codec(navn))
+        except ImportError:
+            print(f"{navn}: ikke installeret, springes over")
+
+    random.seed(0)
+    print(f"{'side':32} {'codec':8} {'kB':>7} {'decode ms':>10} {'encode ms':>10} {'decode x':>9}")
+    for navn, lav_side in SIDER.items():
+        side = lav_side()
+        data = get_codec("stdlib").dumps(side)
+        resultater = [
+            (codec.name, _mål(lambda: codec.loads(data), args.repeat), _mål(lambda: codec.dumps(side), args.repeat))
+            for codec in codecs
+        ]
+        basis = resultater[0][1]
+        for codec_navn, decode, encode in resultater:
+            print(f"{navn:32} {codec_navn:8} {len(data) / 1024:7.0f} {decode:10.2f} {encode:10.2f} {basis / decode:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
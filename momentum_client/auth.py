@@ -0,0 +1,188 @@
+"""
+OAuth2 token handling for the Momentum clients.
+
+The token is tracked by expiry and renewed ahead of time. Renewal is single-flight:
+when many threads or tasks need a new token at the same time, exactly one of them
+fetches it while the rest wait for the result. While the current token is still
+valid the renewal happens in the background of a single request, so requests
+already in flight - and requests started meanwhile - are not stalled.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import httpx
+
+from typing import Awaitable, Callable, Generator, AsyncGenerator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Tokens are renewed this many seconds before they expire
+DEFAULT_REFRESH_MARGIN = 300.0
+
+# Lifetime assumed for tokens that do not state when they expire
+DEFAULT_TOKEN_LIFETIME = 3600
+
+
+def _expires_at(token: dict) -> float:
+    """Return the absolute expiry time of a token as a unix timestamp."""
+    if token.get("expires_at"):
+        return float(token["expires_at"])
+    if token.get("expires_on"):
+        return float(token["expires_on"])
+    return time.time() + float(token.get("expires_in") or DEFAULT_TOKEN_LIFETIME)
+
+
+class _TokenState:
+    """Expiry bookkeeping shared by the sync and async token managers."""
+
+    def __init__(self, refresh_margin: float) -> None:
+        self._refresh_margin = refresh_margin
+        self._token: Optional[dict] = None
+        self._expires_at = 0.0
+
+    def _set(self, token: dict) -> None:
+        self._token = token
+        self._expires_at = _expires_at(token)
+
+    def _is_fresh(self) -> bool:
+        return self._token is not None and time.time() < self._expires_at - self._refresh_margin
+
+    def _is_valid(self) -> bool:
+        return self._token is not None and time.time() < self._expires_at
+
+    @property
+    def token(self) -> Optional[dict]:
+        """The current token, or None if no token has been fetched yet."""
+        return self._token
+
+    def invalidate(self, access_token: str) -> None:
+        """
+        Mark a token as expired, e.g. after the API rejected it with 401.
+
+        Only has effect if the token is still the current one, so a token that
+        has already been renewed by another thread is not thrown away.
+        """
+        if self._token is not None and self._token.get("access_token") == access_token:
+            self._expires_at = 0.0
+
+
+class TokenManager(_TokenState):
+    """
+    Thread-safe, single-flight holder of the OAuth2 token for MomentumClient.
+
+    Args:
+        fetch_token: Callable fetching a new token dict (with access_token and expiry)
+        refresh_margin: Seconds before expiry at which the token is renewed
+    """
+
+    def __init__(
+        self,
+        fetch_token: Callable[[], dict],
+        refresh_margin: float = DEFAULT_REFRESH_MARGIN,
+    ) -> None:
+        super().__init__(refresh_margin)
+        self._fetch_token = fetch_token
+        self._lock = threading.Lock()
+
+    def access_token(self) -> str:
+        """Return a valid access token, renewing it first if necessary."""
+        if self._is_fresh():
+            return self._token["access_token"]
+
+        if self._is_valid():
+            # Still valid: one thread renews, everybody else keeps using the current token
+            if self._lock.acquire(blocking=False):
+                try:
+                    if not self._is_fresh():
+                        self._refresh(still_valid=True)
+                finally:
+                    self._lock.release()
+            return self._token["access_token"]
+
+        # Expired: one thread renews, the rest wait for it
+        with self._lock:
+            if not self._is_valid():
+                self._refresh(still_valid=False)
+            return self._token["access_token"]
+
+    def _refresh(self, still_valid: bool) -> None:
+        try:
+            self._set(self._fetch_token())
+        except Exception:
+            if not still_valid:
+                raise
+            # The current token can be used a little longer; try again on the next request
+            logger.warning("Fornyelse af token fejlede - det nuværende token bruges indtil videre", exc_info=True)
+
+
+class AsyncTokenManager(_TokenState):
+    """
+    Single-flight holder of the OAuth2 token for AsyncMomentumClient.
+
+    Args:
+        fetch_token: Coroutine function fetching a new token dict
+        refresh_margin: Seconds before expiry at which the token is renewed
+    """
+
+    def __init__(
+        self,
+        fetch_token: Callable[[], Awaitable[dict]],
+        refresh_margin: float = DEFAULT_REFRESH_MARGIN,
+    ) -> None:
+        super().__init__(refresh_margin)
+        self._fetch_token = fetch_token
+        self._lock = asyncio.Lock()
+
+    async def access_token(self) -> str:
+        """Return a valid access token, renewing it first if necessary."""
+        if self._is_fresh():
+            return self._token["access_token"]
+
+        if self._is_valid() and self._lock.locked():
+            # Another task is already renewing a token that is still valid
+            return self._token["access_token"]
+
+        async with self._lock:
+            if not self._is_fresh():
+                still_valid = self._is_valid()
+                try:
+                    self._set(await self._fetch_token())
+                except Exception:
+                    if not still_valid:
+                        raise
+                    logger.warning("Fornyelse af token fejlede - det nuværende token bruges indtil videre", exc_info=True)
+            return self._token["access_token"]
+
+
+class BearerTokenAuth(httpx.Auth):
+    """
+    httpx authentication flow that adds the current bearer token to every request.
+
+    A request rejected with 401 has its token invalidated and is sent once more
+    with a freshly fetched token.
+    """
+
+    def __init__(self, tokens: Union[TokenManager, AsyncTokenManager]) -> None:
+        self._tokens = tokens
+
+    def sync_auth_flow(self, request: httpx.Request) -> Generator[httpx.Request, httpx.Response, None]:
+        access_token = self._tokens.access_token()
+        request.headers["Authorization"] = f"Bearer {access_token}"
+        response = yield request
+
+        if response.status_code == 401:
+            self._tokens.invalidate(access_token)
+            request.headers["Authorization"] = f"Bearer {self._tokens.access_token()}"
+            yield request
+
+    async def async_auth_flow(self, request: httpx.Request) -> AsyncGenerator[httpx.Request, httpx.Response]:
+        access_token = await self._tokens.access_token()
+        request.headers["Authorization"] = f"Bearer {access_token}"
+        response = yield request
+
+        if response.status_code == 401:
+            self._tokens.invalidate(access_token)
+            request.headers["Authorization"] = f"Bearer {await self._tokens.access_token()}"
+            yield request
@@ -0,0 +1,331 @@
+"""
+In-memory cache of GET responses for reference data.
+
+Lookups such as hent_markering download the whole /tags list to find one tag,
+and bulk jobs repeat them for every citizen. With a CacheConfig the client
+keeps successful GET responses of the configured endpoints for a while:
+
+- each endpoint pattern has its own TTL and a bounded number of entries,
+  evicting the least recently used,
+- a write (PUT, PATCH, DELETE or a POST that is not marked idempotent) to the
+  same resource, e.g. anything under /tags for the "tags" pattern, drops the
+  pattern's entries - the client calls invalidate_for for those,
+- hits, misses, evictions and invalidations are counted in CacheStats.
+
+Responses with an ETag or Last-Modified header are kept after their TTL, and
+the next GET is sent with If-None-Match / If-Modified-Since. When the server
+answers 304 Not Modified, the cached response is served again for another TTL
+and its size is counted in CacheStats.bytes_saved - large reference payloads
+such as /taxonomies are then only downloaded when they change.
+
+With stale_while_revalidate, a response that is at most that many seconds past
+its TTL is still served, while the client refreshes it in the background. With
+a SqliteCacheStore the responses also survive the process (see cache_store).
+
+A cached response is shared by all callers, including its decoded JSON, so
+the returned data must not be modified.
+"""
+
+import threading
+import time
+
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Mapping, Optional
+
+import httpx
+
+from .cache_store import SqliteCacheStore
+from .circuit import matches_endpoint
+from .codec import JsonCodec, use_codec
+
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """
+    How responses of one endpoint pattern are cached.
+
+    Args:
+        ttl: Seconds a response is served from the cache
+        max_entries: Responses kept for the pattern (e.g. one per actor id)
+        invalidated_by: Endpoint patterns whose writes drop the cached responses
+            (default: writes under the first path segment of the pattern)
+        stale_while_revalidate: Seconds after the TTL a response is still served
+            while it is refreshed in the background
+    """
+
+    ttl: float
+    max_entries: int = 256
+    invalidated_by: Optional[tuple[str, ...]] = None
+    stale_while_revalidate: float = 0.0
+
+
+DEFAULT_CACHE_POLICIES: Mapping[str, CachePolicy] = {
+    "tags": CachePolicy(ttl=300, max_entries=1),
+    "taxonomies": CachePolicy(ttl=3600, max_entries=1),
+    "taxonomies/{id}": CachePolicy(ttl=3600),
+    "actors/{id}/details": CachePolicy(ttl=300, max_entries=1000),
+}
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    revalidations: int = 0
+    bytes_saved: int = 0
+    size: int = 0
+
+
+@dataclass(frozen=True)
+class CacheConfig:
+    """
+    Settings for the response cache of MomentumClient and AsyncMomentumClient.
+
+    Args:
+        policies: Cache policy per endpoint pattern relative to the base URL, where
+            {id} matches any path segment
+        store: Persistent store the responses are also kept in, shared by processes (None: memory only)
+    """
+
+    policies: Mapping[str, CachePolicy] = field(default_factory=lambda: dict(DEFAULT_CACHE_POLICIES), hash=False)
+    store: Optional[SqliteCacheStore] = field(default=None, compare=False)
+
+    def create_cache(self, base_url: str, codec: Optional[JsonCodec] = None) -> "ResponseCache":
+        return ResponseCache(self.policies, base_url, self.store, codec)
+
+
+@dataclass
+class _Entry:
+    response: httpx.Response
+    expires_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    refreshing: bool = False
+
+
+class ResponseCache:
+    """
+    TTL and LRU bounded GET responses per endpoint pattern. Thread-safe.
+
+    Args:
+        policies: Cache policy per endpoint pattern
+        base_url: The client's base URL - patterns and writes are relative to its path
+        store: Persistent store consulted on a memory miss and updated on every change
+        codec: JSON codec for responses loaded from the store
+    """
+
+    def __init__(
+        self,
+        policies: Mapping[str, CachePolicy],
+        base_url: str = "",
+        store: Optional[SqliteCacheStore] = None,
+        codec: Optional[JsonCodec] = None,
+    ) -> None:
+        self.policies = dict(policies)
+        self.store = store
+        self._codec = codec
+        self._base_path = httpx.URL(base_url).path.rstrip("/")
+        self._entries: dict[str, OrderedDict[str, _Entry]] = {pattern: OrderedDict() for pattern in self.policies}
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def pattern_for(self, url: httpx.URL) -> Optional[str]:
+        """The pattern whose policy applies to `url`, or None if it is not cached."""
+        segments = self._relative_segments(url)
+        for pattern in self.policies:
+            wanted = pattern.strip("/").split("/")
+            if len(wanted) == len(segments) and all(w == "{id}" or w == s for w, s in zip(wanted, segments)):
+                return pattern
+        return None
+
+    def _relative_segments(self, url: httpx.URL) -> list[str]:
+        path = url.path
+        if path.startswith(self._base_path):
+            path = path[len(self._base_path):]
+        return path.strip("/").split("/")
+
+    def get(self, url: httpx.URL) -> Optional[httpx.Response]:
+        """
+        The cached response for `url`, or None on a miss.
+
+        A response within its stale_while_revalidate window is returned too - see claim_refresh.
+        """
+        pattern = self.pattern_for(url)
+        if pattern is None:
+            return None
+        key = str(url)
+        with self._lock:
+            entry = self._entries[pattern].get(key)
+            if entry is not None or self.store is None:
+                return self._serve(pattern, key, entry)
+        entry = self._load(pattern, key)
+        with self._lock:
+            return self._serve(pattern, key, entry)
+
+    def _serve(self, pattern: str, key: str, entry: Optional[_Entry]) -> Optional[httpx.Response]:
+        # Called with the lock held
+        now = time.monotonic()
+        if entry is None or entry.expires_at + self.policies[pattern].stale_while_revalidate <= now:
+            self._stats.misses += 1
+            return None
+        if self._entries[pattern].get(key) is entry:
+            self._entries[pattern].move_to_end(key)
+        if entry.expires_at <= now:
+            self._stats.stale_hits += 1
+        else:
+            self._stats.hits += 1
+        return entry.response
+
+    def claim_refresh(self, url: httpx.URL) -> bool:
+        """
+        Whether the caller should refresh the stale response for `url` in the background.
+
+        Returns True to one caller per stale response; it must call release_refresh when done.
+        """
+        pattern = self.pattern_for(url)
+        if pattern is None:
+            return False
+        with self._lock:
+            entry = self._entries[pattern].get(str(url))
+            if entry is None or entry.refreshing or entry.expires_at > time.monotonic():
+                return False
+            entry.refreshing = True
+            return True
+
+    def release_refresh(self, url: httpx.URL) -> None:
+        """Let the stale response for `url` be refreshed again, e.g. after a failed refresh."""
+        pattern = self.pattern_for(url)
+        if pattern is None:
+            return
+        with self._lock:
+            entry = self._entries[pattern].get(str(url))
+            if entry is not None:
+                entry.refreshing = False
+
+    def put(self, url: httpx.URL, response: httpx.Response) -> None:
+        """Cache a successful response to a GET of `url`, if a policy applies."""
+        pattern = self.pattern_for(url)
+        if pattern is None or response.status_code != 200:
+            return
+        policy = self.policies[pattern]
+        with self._lock:
+            self._insert(pattern, str(url), _Entry(
+                response,
+                time.monotonic() + policy.ttl,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            ))
+        if self.store is not None:
+            self.store.save(pattern, str(url), response, time.time() + policy.ttl, policy.max_entries)
+
+    def _entry(self, pattern: str, key: str) -> Optional[_Entry]:
+        """The entry for `key`, loaded from the store on a memory miss. Takes the lock itself."""
+        with self._lock:
+            entry = self._entries[pattern].get(key)
+        if entry is not None or self.store is None:
+            return entry
+        return self._load(pattern, key)
+
+    def _load(self, pattern: str, key: str) -> Optional[_Entry]:
+        """Load the entry for `key` from the store - outside the lock, so disk reads do not hold up other lookups."""
+        stored = self.store.load(key)
+        if stored is None:
+            return None
+        response, expires_at = stored
+        if self._codec is not None:
+            use_codec(response, self._codec)
+        entry = _Entry(
+            response,
+            time.monotonic() + expires_at - time.time(),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        with self._lock:
+            # Another thread may have cached a response for `key` meanwhile
+            current = self._entries[pattern].get(key)
+            if current is not None:
+                return current
+            self._insert(pattern, key, entry)
+        return entry
+
+    def _insert(self, pattern: str, key: str, entry: _Entry) -> None:
+        # Called with the lock held
+        entries = self._entries[pattern]
+        entries[key] = entry
+        entries.move_to_end(key)
+        while len(entries) > self.policies[pattern].max_entries:
+            entries.popitem(last=False)
+            self._stats.evictions += 1
+
+    def conditional_headers(self, url: httpx.URL) -> dict[str, str]:
+        """Headers asking the server to answer 304 if the cached response for `url` is still current."""
+        pattern = self.pattern_for(url)
+        if pattern is None:
+            return {}
+        entry = self._entry(pattern, str(url))
+        headers = {}
+        if entry is not None and entry.etag is not None:
+            headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified is not None:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def revalidated(self, url: httpx.URL, not_modified: httpx.Response) -> Optional[httpx.Response]:
+        """
+        Serve the cached response for `url` for another TTL after a 304 Not Modified.
+
+        Returns None if the response was evicted while the request was in flight.
+        """
+        pattern = self.pattern_for(url)
+        if pattern is None:
+            return None
+        with self._lock:
+            entry = self._entries[pattern].get(str(url))
+            if entry is None:
+                return None
+            ttl = self.policies[pattern].ttl
+            entry.expires_at = time.monotonic() + ttl
+            entry.etag = not_modified.headers.get("ETag", entry.etag)
+            entry.last_modified = not_modified.headers.get("Last-Modified", entry.last_modified)
+            entry.refreshing = False
+            self._entries[pattern].move_to_end(str(url))
+            self._stats.revalidations += 1
+            self._stats.bytes_saved += len(entry.response.content)
+        if self.store is not None:
+            self.store.touch(str(url), time.time() + ttl)
+        return entry.response
+
+    def invalidate_for(self, method: str, url: httpx.URL) -> None:
+        """Drop the responses a write request to `url` may have changed."""
+        if method not in WRITE_METHODS:
+            return
+        segment = self._relative_segments(url)[0]
+        with self._lock:
+            for pattern, policy in self.policies.items():
+                if policy.invalidated_by is None:
+                    related = pattern.strip("/").split("/", 1)[0] == segment
+                else:
+                    related = any(matches_endpoint(url.path, endpoint) for endpoint in policy.invalidated_by)
+                if related and self._entries[pattern]:
+                    self._entries[pattern].clear()
+                    self._stats.invalidations += 1
+                if related and self.store is not None:
+                    self.store.delete_pattern(pattern)
+
+    def clear(self) -> None:
+        with self._lock:
+            for entries in self._entries.values():
+                entries.clear()
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self) -> CacheStats:
+        """A snapshot of the cache statistics."""
+        with self._lock:
+            return replace(self._stats, size=sum(len(entries) for entries in self._entries.values()))
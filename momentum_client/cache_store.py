@@ -0,0 +1,134 @@
+"""
+Persistent store for the response cache, shared by robot runs on the same host.
+
+Robots are short-lived, so an in-memory cache is empty at every start. With
+``CacheConfig(store=SqliteCacheStore())`` cached responses are also written to
+a local SQLite file (permissions 0600). A new process loads them from there on
+a memory miss instead of calling the API. Writes that invalidate a pattern
+delete its stored responses too, so other processes do not serve them either.
+
+The store is best effort: if the file cannot be read or written, a warning is
+logged and the client falls back to the API.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from ._filelock import ensure_private_dir
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_STORE_PATH = Path.home() / ".momentum_client" / "cache.sqlite"
+
+# Only these headers are stored - the body is stored decoded, so Content-Encoding
+# and Content-Length of the original response no longer apply
+_STORED_HEADERS = ("content-type", "etag", "last-modified")
+
+# Saves of a pattern between two prunings of its oldest responses (at most its max_entries)
+_PRUNE_INTERVAL = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    pattern TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    content BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    stored_at REAL NOT NULL
+)
+"""
+
+
+class SqliteCacheStore:
+    """
+    Cached GET responses in a SQLite file. Thread-safe, and safe to share between processes.
+
+    Args:
+        path: Location of the database (default: ~/.momentum_client/cache.sqlite)
+        timeout: Seconds to wait for another process holding the database lock
+    """
+
+    def __init__(self, path: Optional[str | Path] = None, timeout: float = 5.0) -> None:
+        self.path = Path(path) if path is not None else DEFAULT_CACHE_STORE_PATH
+        self.timeout = timeout
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._saves: dict[str, int] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            ensure_private_dir(self.path.parent)
+            # Create the file with permissions 0600 before SQLite opens it
+            os.close(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600))
+            connection = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(_SCHEMA)
+            connection.execute("CREATE INDEX IF NOT EXISTS responses_pattern ON responses (pattern, stored_at)")
+            self._connection = connection
+        return self._connection
+
+    def _execute(self, sql: str, parameters: tuple = ()) -> list[tuple]:
+        with self._lock:
+            try:
+                return self._connect().execute(sql, parameters).fetchall()
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("Cachen %s kunne ikke bruges: %s", self.path, e)
+                return []
+
+    def load(self, url: str) -> Optional[tuple[httpx.Response, float]]:
+        """The stored response for `url` and when it expires (time.time()), or None."""
+        rows = self._execute("SELECT status, headers, content, expires_at FROM responses WHERE url = ?", (url,))
+        if not rows:
+            return None
+        status, headers, content, expires_at = rows[0]
+        response = httpx.Response(status, headers=json.loads(headers), content=content, request=httpx.Request("GET", url))
+        return response, expires_at
+
+    def save(self, pattern: str, url: str, response: httpx.Response, expires_at: float, max_entries: int) -> None:
+        """
+        Store `response` for `url`.
+
+        Every so many saves, the responses of the pattern beyond the `max_entries`
+        most recently stored are deleted - so a pattern briefly holds a few more.
+        """
+        headers = [(name, value) for name, value in response.headers.multi_items() if name.lower() in _STORED_HEADERS]
+        self._execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (url, pattern, response.status_code, json.dumps(headers), response.content, expires_at, time.time()),
+        )
+        with self._lock:
+            saves = self._saves[pattern] = self._saves.get(pattern, 0) + 1
+            if saves < min(_PRUNE_INTERVAL, max_entries):
+                return
+            self._saves[pattern] = 0
+        self._execute(
+            "DELETE FROM responses WHERE pattern = ? AND url NOT IN "
+            "(SELECT url FROM responses WHERE pattern = ? ORDER BY stored_at DESC, rowid DESC LIMIT ?)",
+            (pattern, pattern, max_entries),
+        )
+
+    def touch(self, url: str, expires_at: float) -> None:
+        """Extend the lifetime of the stored response for `url` after a revalidation."""
+        self._execute("UPDATE responses SET expires_at = ? WHERE url = ?", (expires_at, url))
+
+    def delete_pattern(self, pattern: str) -> None:
+        self._execute("DELETE FROM responses WHERE pattern = ?", (pattern,))
+
+    def clear(self) -> None:
+        self._execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
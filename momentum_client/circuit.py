@@ -0,0 +1,248 @@
+"""
+Circuit breakers per endpoint template.
+
+When an endpoint degrades, every caller would otherwise wait for the full
+timeout, and workers pile up. CircuitBreakerTransport keeps one circuit per
+endpoint template - the path with ids replaced by {id}, e.g.
+``/api/citizens/{id}`` - and
+
+- opens it when too many of the recent calls failed (5xx or a transport error,
+  timeouts included) or were slow - a call cut short by the caller's own
+  deadline does not count,
+- fails calls immediately with CircuitOpenError while it is open,
+- lets a few probe calls through after `open_duration` (half-open), and closes
+  it again if they succeed.
+
+Other endpoints are not affected. The transport wraps RetryTransport, so a
+call counts once however many attempts it took, and an open circuit is not
+retried.
+"""
+
+import logging
+import re
+import threading
+import time
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+from .deadline import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Path segments that identify a single resource: GUIDs, numbers and CPR numbers
+_ID_SEGMENT = re.compile(r"^(?:[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|\d+|\d{6}-\d{4})$")
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of sending a request while the circuit of its endpoint is open."""
+
+    def __init__(self, template: str, retry_after: float, request: httpx.Request) -> None:
+        super().__init__(
+            f"Momentum-endpointet {template} svarer ikke stabilt - kald afvises de næste {retry_after:.0f} sekunder",
+            request=request,
+        )
+        self.template = template
+        self.retry_after = retry_after
+
+
+def endpoint_template(path: str) -> str:
+    """The path with ids replaced by {id}, e.g. /api/citizens/{id}/tags."""
+    return "/".join("{id}" if _ID_SEGMENT.match(segment) else segment for segment in path.split("/"))
+
+
+def matches_endpoint(path: str, endpoint: str) -> bool:
+    """
+    Whether a URL path ends with `endpoint`, given relative to the base URL.
+
+    {id} in `endpoint` matches any single path segment, e.g. "citizens/{id}" or "taxonomies/{id}".
+    """
+    wanted = endpoint.strip("/").split("/")
+    segments = path.rstrip("/").split("/")
+    if len(segments) <= len(wanted):
+        return False
+    return all(w == "{id}" or w == s for w, s in zip(wanted, segments[-len(wanted):]))
+
+
+@dataclass(frozen=True)
+class CircuitBreakerPolicy:
+    """
+    When a circuit opens and how it recovers.
+
+    Args:
+        window_size: Number of recent calls per endpoint the rates are computed over
+        min_calls: Calls needed in the window before the circuit can open
+        failure_rate: Open when at least this fraction of the calls failed
+        slow_call_duration: Calls taking longer than this many seconds count as slow
+        slow_call_rate: Open when at least this fraction of the calls were slow
+        open_duration: Seconds calls are rejected before probe calls are let through
+        half_open_probes: Probe calls let through at a time while half-open
+    """
+
+    window_size: int = 20
+    min_calls: int = 10
+    failure_rate: float = 0.5
+    slow_call_duration: float = 10.0
+    slow_call_rate: float = 0.8
+    open_duration: float = 30.0
+    half_open_probes: int = 1
+
+
+class _Circuit:
+    """State of one endpoint template. Guarded by the CircuitBreaker lock."""
+
+    def __init__(self, policy: CircuitBreakerPolicy) -> None:
+        self.state = CLOSED
+        self.calls: deque[tuple[bool, bool]] = deque(maxlen=policy.window_size)
+        self.opened_at = 0.0
+        self.probes = 0
+
+
+class CircuitBreaker:
+    """
+    The circuits of all endpoint templates of one client. Thread-safe.
+
+    Args:
+        policy: When circuits open and how they recover
+    """
+
+    def __init__(self, policy: CircuitBreakerPolicy) -> None:
+        self.policy = policy
+        self._circuits: dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def state(self, template: str) -> str:
+        """State of an endpoint template: "closed", "open" or "half_open"."""
+        with self._lock:
+            circuit = self._circuits.get(template)
+            return circuit.state if circuit is not None else CLOSED
+
+    def before_call(self, template: str) -> Optional[float]:
+        """Admit a call to `template`. Returns None if it may go ahead, else the seconds until it may be retried."""
+        with self._lock:
+            circuit = self._circuits.setdefault(template, _Circuit(self.policy))
+            if circuit.state == OPEN:
+                remaining = circuit.opened_at + self.policy.open_duration - time.monotonic()
+                if remaining > 0:
+                    return remaining
+                circuit.state = HALF_OPEN
+                circuit.probes = 0
+            if circuit.state == HALF_OPEN:
+                if circuit.probes >= self.policy.half_open_probes:
+                    return self.policy.open_duration
+                circuit.probes += 1
+            return None
+
+    def after_call(self, template: str, failed: bool, duration: float) -> None:
+        """Record the outcome of an admitted call."""
+        slow = duration > self.policy.slow_call_duration
+        with self._lock:
+            circuit = self._circuits[template]
+            if circuit.state == HALF_OPEN:
+                circuit.probes -= 1
+                if failed or slow:
+                    self._open(template, circuit)
+                else:
+                    logger.info("Circuit for %s er lukket igen", template)
+                    circuit.state = CLOSED
+                    circuit.calls.clear()
+                return
+            if circuit.state == OPEN:
+                # A call admitted before the circuit opened
+                return
+
+            circuit.calls.append((failed, slow))
+            if len(circuit.calls) < self.policy.min_calls:
+                return
+            failures = sum(failed for failed, _ in circuit.calls) / len(circuit.calls)
+            slow_calls = sum(slow for _, slow in circuit.calls) / len(circuit.calls)
+            if failures >= self.policy.failure_rate or slow_calls >= self.policy.slow_call_rate:
+                self._open(template, circuit)
+
+    def cancel_call(self, template: str) -> None:
+        """Forget an admitted call that was cancelled before it completed."""
+        with self._lock:
+            circuit = self._circuits[template]
+            if circuit.state == HALF_OPEN:
+                circuit.probes -= 1
+
+    def _open(self, template: str, circuit: _Circuit) -> None:
+        logger.warning("Circuit for %s er åben - kald afvises i %.0f sekunder", template, self.policy.open_duration)
+        circuit.state = OPEN
+        circuit.opened_at = time.monotonic()
+        circuit.calls.clear()
+
+
+def _failed(response: httpx.Response) -> bool:
+    return response.status_code >= 500
+
+
+class CircuitBreakerTransport(httpx.BaseTransport):
+    """Transport that rejects requests to endpoints whose circuit is open."""
+
+    def __init__(self, transport: httpx.BaseTransport, policy: CircuitBreakerPolicy) -> None:
+        self._transport = transport
+        self.breaker = CircuitBreaker(policy)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        template = endpoint_template(request.url.path)
+        retry_after = self.breaker.before_call(template)
+        if retry_after is not None:
+            raise CircuitOpenError(template, retry_after, request)
+        start = time.monotonic()
+        try:
+            response = self._transport.handle_request(request)
+        except (DeadlineExceeded, CircuitOpenError):
+            # The caller's budget ran out, or an inner circuit refused - neither says anything about the endpoint
+            self.breaker.cancel_call(template)
+            raise
+        except httpx.TransportError:
+            self.breaker.after_call(template, True, time.monotonic() - start)
+            raise
+        except BaseException:
+            self.breaker.cancel_call(template)
+            raise
+        self.breaker.after_call(template, _failed(response), time.monotonic() - start)
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncCircuitBreakerTransport(httpx.AsyncBaseTransport):
+    """Async version of CircuitBreakerTransport."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, policy: CircuitBreakerPolicy) -> None:
+        self._transport = transport
+        self.breaker = CircuitBreaker(policy)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        template = endpoint_template(request.url.path)
+        retry_after = self.breaker.before_call(template)
+        if retry_after is not None:
+            raise CircuitOpenError(template, retry_after, request)
+        start = time.monotonic()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except (DeadlineExceeded, CircuitOpenError):
+            # The caller's budget ran out, or an inner circuit refused - neither says anything about the endpoint
+            self.breaker.cancel_call(template)
+            raise
+        except httpx.TransportError:
+            self.breaker.after_call(template, True, time.monotonic() - start)
+            raise
+        except BaseException:
+            self.breaker.cancel_call(template)
+            raise
+        self.breaker.after_call(template, _failed(response), time.monotonic() - start)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -1,15 +1,30 @@
 import httpx
+import asyncio
+import contextvars
+import copy
+import inspect
 import logging
+import time
 #import certifi
-from typing import Optional, List
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Iterable, Iterator, Optional, List, Self
 
 from urllib.parse import urljoin
-from .hooks import create_response_logging_hook
-from authlib.integrations.httpx_client import OAuth2Client
-from pathlib import Path
-
-CA_BUNDLE = Path(__file__).parent / "certs" / "digicert_chain.pem"
-COMBINED_CA = Path(__file__).parent / "certs" / "combined_ca.pem"
+from .auth import AsyncTokenManager, BearerTokenAuth, TokenManager, DEFAULT_REFRESH_MARGIN
+from .token_cache import FileTokenCache
+from .transport import CA_BUNDLE, COMBINED_CA, TransportConfig
+from .codec import JsonCodec, resolve_codec, use_codec
+from .cache import CacheConfig, ResponseCache
+from .cpr_cache import CprCache
+from .markeringsregister import MarkeringsRegister
+from .singleflight import AsyncSingleFlight, SingleFlight, coalesce_key
+from .session import current_session
+from .retry import IDEMPOTENT
+from .priority import BULK, PRIORITY, default_priority, validate_priority
+from .deadline import DEADLINE, DeadlineExceeded, cap_timeout, current_deadline, with_deadline
+from .pagination import SkipSizePaging, afetch_all, aiter_items, fetch_all, iter_items
+from .hooks import create_response_logging_hook, create_async_response_logging_hook, LogConfig, SKIP_LOGGING
+from authlib.integrations.httpx_client import OAuth2Client, AsyncOAuth2Client
 
 # Combine certifi’s bundle with DigiCert bundle - workaround for KMD BUG 31-10-2025
 #with open(COMBINED_CA, "wb") as out:
@@ -18,52 +33,141 @@ COMBINED_CA = Path(__file__).parent / "certs" / "combined_ca.pem"
 
 
 
-class MomentumClient:
-    
+TOKEN_URL = "https://login.microsoftonline.com/momentumb2c.onmicrosoft.com/oauth2/token"
+
+GODKENDTE_KATEGORIER = ['Citizen', 'Company', 'ContactPerson', 'Caseworker', 'Offer', 'JobOrder', 'JobAd', "Course"]
+SØG_BATCH_STØRRELSE = 200
+
+
+class _MomentumClientBase:
+    """Shared configuration and helpers for the sync and async Momentum clients."""
+
+    _single_flight: type
+
     def __init__(
         self,
         base_url: str,
         client_id: str,
-        client_secret: str,
-        api_key: str, 
-        resource: str
+        api_key: str,
+        resource: str,
+        token_refresh_margin: float,
+        token_cache: Optional[FileTokenCache],
+        transport_config: Optional[TransportConfig],
+        codec: str | JsonCodec,
+        cache_config: Optional[CacheConfig],
+        coalesce: bool,
+        cpr_cache: Optional[CprCache]
     ) -> None:
         # Set up logging
         self.logger = logging.getLogger(__name__)
         logging.getLogger("httpx").setLevel(logging.WARNING)
         logging.getLogger("httpcore").setLevel(logging.WARNING)
 
-        # Create response logging hook
-        response_hook = create_response_logging_hook(logger=self.logger)
-        hooks = {'response': [response_hook]}
-        
         # Store configuration
         self.api_key = api_key
         self._base_url = base_url
-        self._token_url = "https://login.microsoftonline.com/momentumb2c.onmicrosoft.com/oauth2/token"
-        self._timeout = 30
+        self._resource = resource
+        self._token_url = TOKEN_URL
+        self._transport_config = transport_config or TransportConfig()
+        self._codec = resolve_codec(codec)
+        self._token_refresh_margin = token_refresh_margin
+        self._token_cache = token_cache
+        self._token_cache_key = FileTokenCache.key(client_id, resource)
+        self._priority: Optional[str] = None
+        self._cache = cache_config.create_cache(base_url, self._codec) if cache_config is not None else None
+        self._in_flight = self._single_flight() if coalesce else None
+        self._cpr_cache = cpr_cache
+        self._markeringsregister = MarkeringsRegister()
 
-        self._client = OAuth2Client(
-            client_id=client_id,
-            client_secret=client_secret,
-            token_endpoint=self._token_url,
-            timeout=self._timeout,
-            event_hooks=hooks,
-            verify=str(COMBINED_CA)
-        )
+    @property
+    def cache(self) -> Optional[ResponseCache]:
+        """The response cache, if the client was created with a CacheConfig."""
+        return self._cache
 
-        # Automatically fetch the token during initialization using client credentials grant
-        self._client.fetch_token(
-            grant_type='client_credentials',
-            resource=resource
-        )
+    @property
+    def markeringsregister(self) -> MarkeringsRegister:
+        """The tag register shared by the functionality clients - its ttl can be adjusted."""
+        return self._markeringsregister
+
+    @property
+    def cpr_cache(self) -> Optional[CprCache]:
+        """The CPR to citizenId cache used by hent_borger, if the client was created with one."""
+        return self._cpr_cache
 
-        # Set default headers on the client
-        self._client.headers.update({
-            'apikey': self.api_key,
-            'Authorization': f'Bearer {self._client.token["access_token"]}'
-        })
+    def with_priority(self, priority: str) -> Self:
+        """
+        Return a view of the client that sends its requests with `priority`.
+
+        The view shares connections, token and configuration with this client,
+        so it should not be closed on its own.
+
+        :param priority: "interactive", "normal" or "bulk" (see momentum_client.priority)
+        """
+        view = copy.copy(self)
+        view._priority = validate_priority(priority)
+        return view
 
+    def _token_cache_min_remaining(self) -> float:
+        """Cached tokens must outlive the refresh margin, or they would be renewed right away."""
+        return max(self._token_refresh_margin, self._token_cache.min_remaining)
+
+    def _request_kwargs(self, url: str, idempotent: bool, kwargs: dict) -> dict:
+        """
+        Prepare httpx keyword arguments: encode a json= request body with the
+        client's codec, mark the request as safe to retry if `idempotent`,
+        attach its priority - from priority=, the client, or the default of the
+        current context, in that order - and set the timeout from the endpoint's
+        profile, limited to the time left until the current deadline.
+        """
+        if "timeout" not in kwargs:
+            timeout = self._transport_config.timeout_for(httpx.URL(url).path)
+            deadline = current_deadline()
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    raise DeadlineExceeded(f"Deadline overskredet før kald til {url}")
+                timeout = cap_timeout(timeout or self._transport_config.timeout, left)
+                kwargs["extensions"] = {**kwargs.get("extensions", {}), DEADLINE: deadline}
+            if timeout is not None:
+                kwargs["timeout"] = timeout
+        priority = kwargs.pop("priority", None) or self._priority or default_priority()
+        if priority is not None:
+            kwargs["extensions"] = {**kwargs.get("extensions", {}), PRIORITY: validate_priority(priority)}
+        body = kwargs.pop("json", None)
+        if body is not None:
+            kwargs["content"] = self._codec.dumps(body)
+            kwargs["headers"] = {**kwargs.get("headers", {}), "Content-Type": "application/json"}
+        if idempotent:
+            kwargs["extensions"] = {**kwargs.get("extensions", {}), IDEMPOTENT: True}
+        return kwargs
+
+    def _cache_url(self, method: str, url: str, kwargs: dict) -> Optional[httpx.URL]:
+        """The URL a GET is cached under, or None if the response cache does not apply."""
+        if self._cache is None or method != "GET":
+            return None
+        cache_url = httpx.URL(url, params=kwargs.get("params"))
+        return cache_url if self._cache.pattern_for(cache_url) is not None else None
+
+    def _conditional_kwargs(self, cache_url: httpx.URL, kwargs: dict) -> dict:
+        """Add If-None-Match / If-Modified-Since for a cached response whose TTL has passed."""
+        conditional = self._cache.conditional_headers(cache_url)
+        if not conditional:
+            return kwargs
+        return {**kwargs, "headers": {**kwargs.get("headers", {}), **conditional}}
+
+    @staticmethod
+    def _unconditional_kwargs(kwargs: dict) -> dict:
+        headers = {
+            name: value for name, value in kwargs.get("headers", {}).items()
+            if name not in ("If-None-Match", "If-Modified-Since")
+        }
+        return {**kwargs, "headers": headers}
+
+    def _update_cache(self, method: str, url: str, idempotent: bool, cache_url: Optional[httpx.URL], response: httpx.Response) -> None:
+        if cache_url is not None:
+            self._cache.put(cache_url, response)
+        elif self._cache is not None and not idempotent:
+            self._cache.invalidate_for(method, httpx.URL(url))
 
     def _normalize_url(self, endpoint: str) -> str:
         """Ensure the URL is absolute, handling relative URLs."""
@@ -74,60 +178,272 @@ class MomentumClient:
         endpoint = endpoint.lstrip("/")
         return urljoin(self._base_url + "/", endpoint)
 
+    @staticmethod
+    def _søgeskabelon(søgeterm: str, kategori: str, kun_active: bool) -> dict:
+        """Valider kategorien og byg request body til /search."""
+        if kategori not in GODKENDTE_KATEGORIER:
+            raise ValueError(f"Ugyldig kategori: {kategori}. Godkendte kategorier er: {', '.join(GODKENDTE_KATEGORIER)}")
+
+        return {
+            "term": f"{søgeterm}",
+            "size": SØG_BATCH_STØRRELSE,
+            "skip": 0,
+            "allowedCategories": [
+                "Citizen",
+                "Company",
+                "ContactPerson",
+                "Caseworker",
+                "Offer",
+                "JobOrder",
+                "JobAd",
+                "Course"
+            ],
+            "parentId": None,
+            "isActive": kun_active,
+            "hasUserId": None,
+            "isPhoneNumbersOnly": None,
+            "includeInternalUsers": False
+        }
+
+
+class SubClient:
+    """
+    Base class of the functionality clients (borgere, virksomheder, ...).
+
+    All public methods of a functionality client accept deadline= - seconds the
+    whole operation may take, across all the requests it makes (see
+    momentum_client.deadline).
+    """
+
+    _client: "MomentumClient | AsyncMomentumClient"
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        for name, attribute in list(vars(cls).items()):
+            if not name.startswith("_") and inspect.isfunction(attribute):
+                setattr(cls, name, with_deadline(attribute))
+
+    def with_priority(self, priority: str) -> Self:
+        """
+        Return a copy of the functionality client whose requests are sent with `priority`.
+
+        :param priority: "interactive", "normal" or "bulk" (see momentum_client.priority)
+        """
+        return type(self)(self._client.with_priority(priority))
+
+
+class MomentumClient(_MomentumClientBase):
+
+    _single_flight = SingleFlight
+
+    def __init__(
+        self,
+        base_url: str,
+        client_id: str,
+        client_secret: str,
+        api_key: str, 
+        resource: str,
+        token_refresh_margin: float = DEFAULT_REFRESH_MARGIN,
+        token_cache: Optional[FileTokenCache] = None,
+        transport_config: Optional[TransportConfig] = None,
+        log_config: Optional[LogConfig] = None,
+        codec: str | JsonCodec = "auto",
+        cache_config: Optional[CacheConfig] = None,
+        coalesce: bool = False,
+        cpr_cache: Optional[CprCache] = None
+    ) -> None:
+        super().__init__(base_url, client_id, api_key, resource, token_refresh_margin, token_cache, transport_config, codec, cache_config, coalesce, cpr_cache)
+
+        # Create response logging hook - with LogConfig(background=True) a worker thread does the logging
+        self._log_worker = (log_config or LogConfig()).create_worker()
+        response_hook = create_response_logging_hook(logger=self.logger, config=log_config, worker=self._log_worker, codec=self._codec)
+        hooks = {'response': [response_hook]}
+
+        self._client = OAuth2Client(
+            client_id=client_id,
+            client_secret=client_secret,
+            token_endpoint=self._token_url,
+            event_hooks=hooks,
+            **self._transport_config.client_kwargs(rate_limit_key=self.api_key)
+        )
+
+        # Set default headers on the client - the bearer token is added per request
+        self._client.headers.update({'apikey': self.api_key})
+        # The token is fetched on the first request (or by warmup()), so construction does no I/O
+        self._tokens = TokenManager(self._fetch_token, refresh_margin=token_refresh_margin)
+        self._auth = BearerTokenAuth(self._tokens)
+        # Stale cached responses are refreshed here - threads are only started when needed
+        self._refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="momentum-cache-refresh")
+
+    def __enter__(self) -> "MomentumClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Luk den underliggende HTTP-klient og dens forbindelser, og tøm logkøen."""
+        self._refresh_pool.shutdown(wait=False, cancel_futures=True)
+        self._client.close()
+        if self._log_worker is not None:
+            self._log_worker.close()
+
+    def _fetch_token(self) -> dict:
+        """Get a new token - from the token cache if one is configured and holds a usable token."""
+        if self._token_cache is None:
+            return self._fetch_new_token()
+        return self._token_cache.get_or_fetch(
+            self._token_cache_key,
+            self._fetch_new_token,
+            min_remaining=self._token_cache_min_remaining()
+        )
+
+    def _fetch_new_token(self) -> dict:
+        """Fetch a new token using the client credentials grant."""
+        return self._client.fetch_token(
+            grant_type='client_credentials',
+            resource=self._resource
+        )
+
+    def _request(self, method: str, endpoint: str, idempotent: bool = False, **kwargs) -> httpx.Response:
+        """Send a request with the current bearer token and raise on HTTP errors."""
+        url = self._normalize_url(endpoint)
+        session = current_session()
+        if session is None:
+            return self._fetch(method, url, idempotent, kwargs)
+        key = session.key(method, url, kwargs)
+        if key is not None and (remembered := session.get(key)) is not None:
+            return remembered
+        try:
+            response = self._fetch(method, url, idempotent, kwargs)
+        finally:
+            if not idempotent:
+                session.invalidate_for(method, url, self._base_url)
+        if key is not None:
+            session.put(key, url, self._base_url, response)
+        return response
+
+    def _fetch(self, method: str, url: str, idempotent: bool, kwargs: dict) -> httpx.Response:
+        cache_url = self._cache_url(method, url, kwargs)
+        if cache_url is not None and (cached := self._from_cache(url, cache_url, kwargs)) is not None:
+            return cached
+        key = coalesce_key(method, url, kwargs) if self._in_flight is not None else None
+        if key is None:
+            return self._send(method, url, idempotent, cache_url, kwargs)
+        # Requests in different priority lanes are not shared, so a bulk request does not hold up an interactive one
+        key = (key, kwargs.get("priority") or self._priority or default_priority())
+        return self._in_flight.do(key, lambda: self._send(method, url, idempotent, cache_url, kwargs))
+
+    def _from_cache(self, url: str, cache_url: httpx.URL, kwargs: dict) -> Optional[httpx.Response]:
+        """The cached response, refreshing it in a background thread if it is stale."""
+        cached = self._cache.get(cache_url)
+        if cached is not None and self._cache.claim_refresh(cache_url):
+            self._refresh_pool.submit(self._refresh, url, cache_url, kwargs)
+        return cached
+
+    def _refresh(self, url: str, cache_url: httpx.URL, kwargs: dict) -> None:
+        try:
+            self._send("GET", url, False, cache_url, {**kwargs, "priority": BULK})
+        except Exception:
+            self.logger.debug("Kunne ikke forny %s i cachen", cache_url, exc_info=True)
+        finally:
+            self._cache.release_refresh(cache_url)
+
+    def _send(self, method: str, url: str, idempotent: bool, cache_url: Optional[httpx.URL], kwargs: dict) -> httpx.Response:
+        if cache_url is not None:
+            kwargs = self._conditional_kwargs(cache_url, kwargs)
+        response = self._client.request(method, url, auth=self._auth, **self._request_kwargs(url, idempotent, dict(kwargs)))
+        if response.status_code == 304 and cache_url is not None:
+            if (cached := self._cache.revalidated(cache_url, response)) is not None:
+                return cached
+            # Evicted while the request was in flight - fetch it in full
+            response = self._client.request(method, url, auth=self._auth, **self._request_kwargs(url, idempotent, self._unconditional_kwargs(kwargs)))
+        response.raise_for_status()
+        use_codec(response, self._codec)
+        self._update_cache(method, url, idempotent, cache_url, response)
+        return response
+
+    def _open_connection(self) -> None:
+        """Open a pooled connection to the API host with an unauthenticated HEAD request."""
+        try:
+            self._client.request("HEAD", self._base_url, withhold_token=True, extensions={SKIP_LOGGING: True})
+        except httpx.HTTPError:
+            self.logger.debug("Kunne ikke åbne forbindelse til %s under warmup", self._base_url, exc_info=True)
+
+    def warmup(self, connections: int = 1, preload: Iterable[str] = ()) -> dict[str, Any]:
+        """
+        Betal opstartsomkostningerne på forhånd og parallelt i stedet for ved første kald.
+
+        Tokenet hentes samtidig med at der åbnes forbindelser til API'et. Så snart tokenet
+        er hentet, hentes referencedata fra endpoints i preload (f.eks. "/tags" og "/taxonomies").
+
+        :param connections: Antal forbindelser der åbnes i forbindelsespuljen
+        :param preload: GET-endpoints der hentes på forhånd
+        :return: JSON svar for hvert endpoint i preload
+        """
+        preload = list(preload)
+        with ThreadPoolExecutor(max_workers=1 + connections + len(preload)) as pool:
+            token = pool.submit(self._tokens.access_token)
+            forbindelser = [pool.submit(self._open_connection) for _ in range(connections)]
+
+            token.result()
+            referencedata = [pool.submit(lambda endpoint: self.get(endpoint).json(), endpoint) for endpoint in preload]
+
+            wait(forbindelser)
+            return {endpoint: future.result() for endpoint, future in zip(preload, referencedata)}
+
+    @with_deadline
     def get(self, endpoint: str, **kwargs) -> httpx.Response:
         """
         Perform GET request to the specified endpoint.
 
         :param endpoint: API endpoint (relative or absolute URL)
-        :param kwargs: Additional arguments passed to httpx
+        :param kwargs: Additional arguments passed to httpx, priority="interactive", "normal" or "bulk",
+            or deadline= seconds the call may take
         :return: HTTP response
         """
-        url = self._normalize_url(endpoint)
-        response = self._client.get(url, **kwargs)
-        response.raise_for_status()
-        return response
+        return self._request("GET", endpoint, **kwargs)
 
-    def post(self, endpoint: str, json: dict | None = None, **kwargs) -> httpx.Response:
+    @with_deadline
+    def post(self, endpoint: str, json: dict | None = None, idempotent: bool = False, **kwargs) -> httpx.Response:
         """
         Perform POST request to the specified endpoint.
 
         :param endpoint: API endpoint (relative or absolute URL)
         :param json: JSON data to send in request body
-        :param kwargs: Additional arguments passed to httpx
+        :param idempotent: The request only reads data (e.g. a search) and may be retried on transient failures
+        :param kwargs: Additional arguments passed to httpx, priority="interactive", "normal" or "bulk",
+            or deadline= seconds the call may take
         :return: HTTP response
         """
-        url = self._normalize_url(endpoint)
-        response = self._client.post(url, json=json, **kwargs)
-        response.raise_for_status()
-        return response
+        return self._request("POST", endpoint, idempotent=idempotent, json=json, **kwargs)
 
+    @with_deadline
     def put(self, endpoint: str, json: dict | None = None, **kwargs) -> httpx.Response:
         """
         Perform PUT request to the specified endpoint.
 
         :param endpoint: API endpoint (relative or absolute URL)
         :param json: JSON data to send in request body
-        :param kwargs: Additional arguments passed to httpx
+        :param kwargs: Additional arguments passed to httpx, priority="interactive", "normal" or "bulk",
+            or deadline= seconds the call may take
         :return: HTTP response
         """
-        url = self._normalize_url(endpoint)
-        response = self._client.put(url, json=json, **kwargs)
-        response.raise_for_status()
-        return response
+        return self._request("PUT", endpoint, json=json, **kwargs)
 
+    @with_deadline
     def delete(self, endpoint: str, **kwargs) -> httpx.Response:
         """
         Perform DELETE request to the specified endpoint.
 
         :param endpoint: API endpoint (relative or absolute URL)
-        :param kwargs: Additional arguments passed to httpx
+        :param kwargs: Additional arguments passed to httpx, priority="interactive", "normal" or "bulk",
+            or deadline= seconds the call may take
         :return: HTTP response
         """
-        url = self._normalize_url(endpoint)
-        response = self._client.delete(url, **kwargs)
-        response.raise_for_status()
-        return response
+        return self._request("DELETE", endpoint, **kwargs)
     
+    @with_deadline
     def søg(self, søgeterm: str, kategori: str, kun_active = True, ønsket_antal = 100) -> Optional[dict]:
         """
         Søg efter borgere/virksomheder/kontaktpersoner/osv.
@@ -138,54 +454,302 @@ class MomentumClient:
         :param ønsket_antal: Ønsket antal resultater at returnere.
         :return: JSON svar fra API'et eller None hvis anmodningen fejler.
         """
+        søgeskabelon = self._søgeskabelon(søgeterm, kategori, kun_active)
 
-        # konstanter
-        GODKENDTE_KATEGORIER = ['Citizen', 'Company', 'ContactPerson', 'Caseworker', 'Offer', 'JobOrder', 'JobAd', "Course"]
-        BATCH_STØRRELSE = 200
+        # Første batch afslører totalCount - resten af batchene hentes samtidigt.
+        # ønsket_antal = 0 henter alle
+        return fetch_all(
+            self._hent_søgebatch,
+            søgeskabelon,
+            SkipSizePaging(SØG_BATCH_STØRRELSE),
+            items="results",
+            max_items=ønsket_antal,
+        )
 
-        if kategori not in GODKENDTE_KATEGORIER:
-            raise ValueError(f"Ugyldig kategori: {kategori}. Godkendte kategorier er: {', '.join(GODKENDTE_KATEGORIER)}")
-        
-        spring_over = 0
-        
-        søgeskabelon = {
-            "term": f"{søgeterm}",
-            "size": BATCH_STØRRELSE,
-            "skip": spring_over,
-            "allowedCategories": [
-                "Citizen",
-                "Company",
-                "ContactPerson",
-                "Caseworker",
-                "Offer",
-                "JobOrder",
-                "JobAd",
-                "Course"
-            ],
-            "parentId": None,
-            "isActive": kun_active,
-            "hasUserId": None,
-            "isPhoneNumbersOnly": None,
-            "includeInternalUsers": False
-        }
+    @with_deadline
+    def iter_søg(self, søgeterm: str, kategori: str, kun_active = True, ønsket_antal = 0) -> Iterator[dict]:
+        """
+        Som søg, men giver resultaterne én batch ad gangen mens næste batch hentes i baggrunden.
+
+        :param søgeterm: Hvad søges der efter.
+        :param kategori: Kategori at søge indenfor (f.eks. 'borger', 'virksomhed', 'kontaktperson', 'sagsbehandler').
+        :param kun_active: Om kun aktive borgere skal inkluderes.
+        :param ønsket_antal: Ønsket antal resultater (0 = alle). Der stoppes efter den batch der når antallet.
+        :return: Iterator over søgeresultater.
+        """
+        return iter_items(
+            self._hent_søgebatch,
+            self._søgeskabelon(søgeterm, kategori, kun_active),
+            SkipSizePaging(SØG_BATCH_STØRRELSE),
+            items="results",
+            max_items=ønsket_antal,
+        )
+
+    def _hent_søgebatch(self, body: dict) -> dict:
+        return self.post("/search", json=body, idempotent=True).json()
 
-        søgning = self.post("/search", json=søgeskabelon).json()
-        # Skal vi hente alle?
-        if ønsket_antal == 0 or ønsket_antal > søgning["totalCount"]:
-            ønsket_antal = søgning["totalCount"]
 
-        # Opret resultat liste
-        resultat: List[dict] = []
 
-        # Tilføj første batch til resultat
-        resultat.extend(søgning.get('results', []))
+class AsyncMomentumClient(_MomentumClientBase):
+    """
+    Asynkron udgave af MomentumClient bygget på httpx.AsyncClient.
 
-        # Hent flere batches hvis nødvendigt
-        if len(resultat) < ønsket_antal:
-            while len(resultat) < ønsket_antal:
-                spring_over = spring_over + BATCH_STØRRELSE
-                søgeskabelon["skip"] = f"{spring_over}"
-                søgning = self.post("/search", json=søgeskabelon).json()
-                resultat.extend(søgning.get('results', []))
+    Tokenet hentes ved første forespørgsel, da det ikke kan ske i __init__, og fornyes automatisk før det udløber.
+    Brug klienten som async context manager eller kald aclose() når den ikke skal bruges mere.
+    """
+
+    _single_flight = AsyncSingleFlight
+
+    def __init__(
+        self,
+        base_url: str,
+        client_id: str,
+        client_secret: str,
+        api_key: str,
+        resource: str,
+        token_refresh_margin: float = DEFAULT_REFRESH_MARGIN,
+        token_cache: Optional[FileTokenCache] = None,
+        transport_config: Optional[TransportConfig] = None,
+        log_config: Optional[LogConfig] = None,
+        codec: str | JsonCodec = "auto",
+        cache_config: Optional[CacheConfig] = None,
+        coalesce: bool = False,
+        cpr_cache: Optional[CprCache] = None
+    ) -> None:
+        super().__init__(base_url, client_id, api_key, resource, token_refresh_margin, token_cache, transport_config, codec, cache_config, coalesce, cpr_cache)
+
+        # Create response logging hook - with LogConfig(background=True) a worker thread does the logging
+        self._log_worker = (log_config or LogConfig()).create_worker()
+        response_hook = create_async_response_logging_hook(logger=self.logger, config=log_config, worker=self._log_worker, codec=self._codec)
+        hooks = {'response': [response_hook]}
+
+        self._client = AsyncOAuth2Client(
+            client_id=client_id,
+            client_secret=client_secret,
+            token_endpoint=self._token_url,
+            event_hooks=hooks,
+            **self._transport_config.client_kwargs(asynchronous=True, rate_limit_key=self.api_key)
+        )
+        self._client.headers.update({'apikey': self.api_key})
+        self._tokens = AsyncTokenManager(self._fetch_token, refresh_margin=token_refresh_margin)
+        self._auth = BearerTokenAuth(self._tokens)
+        self._refresh_tasks: set[asyncio.Task] = set()
+
+    async def __aenter__(self) -> "AsyncMomentumClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Luk den underliggende HTTP-klient og dens forbindelser, og tøm logkøen."""
+        for task in self._refresh_tasks:
+            task.cancel()
+        await self._client.aclose()
+        if self._log_worker is not None:
+            await asyncio.to_thread(self._log_worker.close)
+
+    async def _fetch_token(self) -> dict:
+        """Get a new token - from the token cache if one is configured and holds a usable token."""
+        if self._token_cache is None:
+            return await self._fetch_new_token()
+
+        return await self._token_cache.aget_or_fetch(
+            self._token_cache_key,
+            self._fetch_new_token,
+            min_remaining=self._token_cache_min_remaining()
+        )
+
+    async def _fetch_new_token(self) -> dict:
+        """Fetch a new token using the client credentials grant."""
+        return await self._client.fetch_token(
+            grant_type='client_credentials',
+            resource=self._resource
+        )
+
+    async def _request(self, method: str, endpoint: str, idempotent: bool = False, **kwargs) -> httpx.Response:
+        """Send a request with the current bearer token and raise on HTTP errors."""
+        url = self._normalize_url(endpoint)
+        session = current_session()
+        if session is None:
+            return await self._fetch(method, url, idempotent, kwargs)
+        key = session.key(method, url, kwargs)
+        if key is not None and (remembered := session.get(key)) is not None:
+            return remembered
+        try:
+            response = await self._fetch(method, url, idempotent, kwargs)
+        finally:
+            if not idempotent:
+                session.invalidate_for(method, url, self._base_url)
+        if key is not None:
+            session.put(key, url, self._base_url, response)
+        return response
+
+    async def _fetch(self, method: str, url: str, idempotent: bool, kwargs: dict) -> httpx.Response:
+        cache_url = self._cache_url(method, url, kwargs)
+        if cache_url is not None and (cached := self._from_cache(url, cache_url, kwargs)) is not None:
+            return cached
+        key = coalesce_key(method, url, kwargs) if self._in_flight is not None else None
+        if key is None:
+            return await self._send(method, url, idempotent, cache_url, kwargs)
+        # Requests in different priority lanes are not shared, so a bulk request does not hold up an interactive one
+        key = (key, kwargs.get("priority") or self._priority or default_priority())
+        return await self._in_flight.do(key, lambda: self._send(method, url, idempotent, cache_url, kwargs))
+
+    def _from_cache(self, url: str, cache_url: httpx.URL, kwargs: dict) -> Optional[httpx.Response]:
+        """The cached response, refreshing it in a background task if it is stale."""
+        cached = self._cache.get(cache_url)
+        if cached is not None and self._cache.claim_refresh(cache_url):
+            # A fresh context, so the refresh does not inherit the caller's deadline
+            task = asyncio.create_task(self._refresh(url, cache_url, kwargs), context=contextvars.Context())
+            self._refresh_tasks.add(task)
+            task.add_done_callback(self._refresh_tasks.discard)
+        return cached
+
+    async def _refresh(self, url: str, cache_url: httpx.URL, kwargs: dict) -> None:
+        try:
+            await self._send("GET", url, False, cache_url, {**kwargs, "priority": BULK})
+        except Exception:
+            self.logger.debug("Kunne ikke forny %s i cachen", cache_url, exc_info=True)
+        finally:
+            self._cache.release_refresh(cache_url)
+
+    async def _send(self, method: str, url: str, idempotent: bool, cache_url: Optional[httpx.URL], kwargs: dict) -> httpx.Response:
+        if cache_url is not None:
+            kwargs = self._conditional_kwargs(cache_url, kwargs)
+        response = await self._client.request(method, url, auth=self._auth, **self._request_kwargs(url, idempotent, dict(kwargs)))
+        if response.status_code == 304 and cache_url is not None:
+            if (cached := self._cache.revalidated(cache_url, response)) is not None:
+                return cached
+            # Evicted while the request was in flight - fetch it in full
+            response = await self._client.request(method, url, auth=self._auth, **self._request_kwargs(url, idempotent, self._unconditional_kwargs(kwargs)))
+        response.raise_for_status()
+        use_codec(response, self._codec)
+        self._update_cache(method, url, idempotent, cache_url, response)
+        return response
+
+    async def _open_connection(self) -> None:
+        """Open a pooled connection to the API host with an unauthenticated HEAD request."""
+        try:
+            await self._client.request("HEAD", self._base_url, withhold_token=True, extensions={SKIP_LOGGING: True})
+        except httpx.HTTPError:
+            self.logger.debug("Kunne ikke åbne forbindelse til %s under warmup", self._base_url, exc_info=True)
+
+    async def warmup(self, connections: int = 1, preload: Iterable[str] = ()) -> dict[str, Any]:
+        """
+        Betal opstartsomkostningerne på forhånd og parallelt i stedet for ved første kald.
+
+        Se MomentumClient.warmup.
+
+        :param connections: Antal forbindelser der åbnes i forbindelsespuljen
+        :param preload: GET-endpoints der hentes på forhånd
+        :return: JSON svar for hvert endpoint i preload
+        """
+        preload = list(preload)
+
+        async def hent_referencedata() -> list:
+            await self._tokens.access_token()
+            svar = await asyncio.gather(*(self.get(endpoint) for endpoint in preload))
+            return [response.json() for response in svar]
+
+        referencedata, *_ = await asyncio.gather(
+            hent_referencedata(),
+            *(self._open_connection() for _ in range(connections))
+        )
+        return dict(zip(preload, referencedata))
+
+    @with_deadline
+    async def get(self, endpoint: str, **kwargs) -> httpx.Response:
+        """
+        Perform GET request to the specified endpoint.
+
+        :param endpoint: API endpoint (relative or absolute URL)
+        :param kwargs: Additional arguments passed to httpx, priority="interactive", "normal" or "bulk",
+            or deadline= seconds the call may take
+        :return: HTTP response
+        """
+        return await self._request("GET", endpoint, **kwargs)
+
+    @with_deadline
+    async def post(self, endpoint: str, json: dict | None = None, idempotent: bool = False, **kwargs) -> httpx.Response:
+        """
+        Perform POST request to the specified endpoint.
+
+        :param endpoint: API endpoint (relative or absolute URL)
+        :param json: JSON data to send in request body
+        :param idempotent: The request only reads data (e.g. a search) and may be retried on transient failures
+        :param kwargs: Additional arguments passed to httpx, priority="interactive", "normal" or "bulk",
+            or deadline= seconds the call may take
+        :return: HTTP response
+        """
+        return await self._request("POST", endpoint, idempotent=idempotent, json=json, **kwargs)
+
+    @with_deadline
+    async def put(self, endpoint: str, json: dict | None = None, **kwargs) -> httpx.Response:
+        """
+        Perform PUT request to the specified endpoint.
+
+        :param endpoint: API endpoint (relative or absolute URL)
+        :param json: JSON data to send in request body
+        :param kwargs: Additional arguments passed to httpx, priority="interactive", "normal" or "bulk",
+            or deadline= seconds the call may take
+        :return: HTTP response
+        """
+        return await self._request("PUT", endpoint, json=json, **kwargs)
+
+    @with_deadline
+    async def delete(self, endpoint: str, **kwargs) -> httpx.Response:
+        """
+        Perform DELETE request to the specified endpoint.
+
+        :param endpoint: API endpoint (relative or absolute URL)
+        :param kwargs: Additional arguments passed to httpx, priority="interactive", "normal" or "bulk",
+            or deadline= seconds the call may take
+        :return: HTTP response
+        """
+        return await self._request("DELETE", endpoint, **kwargs)
+
+    @with_deadline
+    async def søg(self, søgeterm: str, kategori: str, kun_active = True, ønsket_antal = 100) -> Optional[dict]:
+        """
+        Søg efter borgere/virksomheder/kontaktpersoner/osv.
+
+        :param søgeterm: Hvad søges der efter.
+        :param kategori: Kategori at søge indenfor (f.eks. 'borger', 'virksomhed', 'kontaktperson', 'sagsbehandler').
+        :param kun_active: Om kun aktive borgere skal inkluderes.
+        :param ønsket_antal: Ønsket antal resultater at returnere.
+        :return: JSON svar fra API'et eller None hvis anmodningen fejler.
+        """
+        søgeskabelon = self._søgeskabelon(søgeterm, kategori, kun_active)
+
+        # Første batch afslører totalCount - resten af batchene hentes samtidigt.
+        # ønsket_antal = 0 henter alle
+        return await afetch_all(
+            self._hent_søgebatch,
+            søgeskabelon,
+            SkipSizePaging(SØG_BATCH_STØRRELSE),
+            items="results",
+            max_items=ønsket_antal,
+        )
+
+    @with_deadline
+    def iter_søg(self, søgeterm: str, kategori: str, kun_active = True, ønsket_antal = 0) -> AsyncIterator[dict]:
+        """
+        Som søg, men giver resultaterne én batch ad gangen mens næste batch hentes i baggrunden.
+
+        :param søgeterm: Hvad søges der efter.
+        :param kategori: Kategori at søge indenfor (f.eks. 'borger', 'virksomhed', 'kontaktperson', 'sagsbehandler').
+        :param kun_active: Om kun aktive borgere skal inkluderes.
+        :param ønsket_antal: Ønsket antal resultater (0 = alle). Der stoppes efter den batch der når antallet.
+        :return: Async iterator over søgeresultater.
+        """
+        return aiter_items(
+            self._hent_søgebatch,
+            self._søgeskabelon(søgeterm, kategori, kun_active),
+            SkipSizePaging(SØG_BATCH_STØRRELSE),
+            items="results",
+            max_items=ønsket_antal,
+        )
 
-        return resultat
+    async def _hent_søgebatch(self, body: dict) -> dict:
+        return (await self.post("/search", json=body, idempotent=True)).json()
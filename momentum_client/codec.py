@@ -0,0 +1,136 @@
+"""
+JSON codecs for request bodies and response payloads.
+
+Decoding large pages dominates client CPU on big exports, so the clients can
+use orjson or msgspec when one of them is installed and fall back to the
+standard library otherwise:
+
+    pip install "momentum-client[orjson]"   # or [msgspec]
+
+All codecs encode to the same compact UTF-8 JSON that httpx produces, and raise
+ValueError on invalid JSON, so they can be swapped without other changes.
+"""
+
+import functools
+import json
+
+from typing import Any, Protocol
+
+import httpx
+
+_DECODED = "_momentum_json"
+
+
+class JsonCodec(Protocol):
+    name: str
+
+    def dumps(self, obj: Any) -> bytes:
+        ...
+
+    def loads(self, data: bytes | str) -> Any:
+        ...
+
+
+class StdlibCodec:
+    """The standard library json module, with the same settings as httpx."""
+
+    name = "stdlib"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+    def loads(self, data: bytes | str) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """orjson - usually the fastest for both encoding and decoding."""
+
+    name = "orjson"
+
+    def __init__(self) -> None:
+        import orjson
+        self._orjson = orjson
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._orjson.dumps(obj)
+
+    def loads(self, data: bytes | str) -> Any:
+        # orjson.JSONDecodeError is a ValueError
+        return self._orjson.loads(data)
+
+
+class MsgspecCodec:
+    """msgspec.json with reusable encoder and decoder instances."""
+
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        import msgspec
+        self._error = msgspec.DecodeError
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj)
+
+    def loads(self, data: bytes | str) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except self._error as e:
+            raise ValueError(str(e)) from e
+
+
+_CODECS = {"orjson": OrjsonCodec, "msgspec": MsgspecCodec, "stdlib": StdlibCodec}
+
+
+@functools.cache
+def get_codec(name: str = "auto") -> JsonCodec:
+    """
+    Return the codec called `name`.
+
+    "auto" picks orjson, then msgspec, then the standard library, depending on
+    what is installed. Asking for orjson or msgspec explicitly raises
+    ImportError if it is not installed.
+    """
+    if name == "auto":
+        for candidate in ("orjson", "msgspec"):
+            try:
+                return _CODECS[candidate]()
+            except ImportError:
+                continue
+        return StdlibCodec()
+    if name not in _CODECS:
+        raise ValueError(f"Ukendt JSON codec: {name}. Gyldige værdier er 'auto', {', '.join(map(repr, _CODECS))}")
+    try:
+        return _CODECS[name]()
+    except ImportError as e:
+        raise ImportError(f"JSON codec '{name}' kræver at pakken er installeret: pip install \"momentum-client[{name}]\"") from e
+
+
+def resolve_codec(codec: str | JsonCodec) -> JsonCodec:
+    """Accept either a codec name or a codec instance."""
+    return get_codec(codec) if isinstance(codec, str) else codec
+
+
+def decode_response(response: httpx.Response, codec: JsonCodec) -> Any:
+    """Decode the body of a read response once - later calls return the same object."""
+    try:
+        return response.__dict__[_DECODED]
+    except KeyError:
+        pass
+    decoded = codec.loads(response.content)
+    response.__dict__[_DECODED] = decoded
+    return decoded
+
+
+def use_codec(response: httpx.Response, codec: JsonCodec) -> None:
+    """Make response.json() decode with `codec`, and only once."""
+    response.json = functools.partial(_json, response, codec)
+
+
+def _json(response: httpx.Response, codec: JsonCodec, **kwargs: Any) -> Any:
+    if kwargs:
+        # json.loads keyword arguments are only understood by the standard library
+        return httpx.Response.json(response, **kwargs)
+    return decode_response(response, codec)
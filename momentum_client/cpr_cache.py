@@ -0,0 +1,133 @@
+"""
+Cache of CPR number to citizenId.
+
+hent_borger needs two requests: citizens/find?cpr= to get the citizenId, and
+citizens/{id} for the citizen. The mapping practically never changes, and jobs
+look up the same CPR numbers run after run. With a CprCache the client
+remembers it, so a known CPR number costs one request.
+
+CPR numbers are never stored - only an HMAC-SHA256 of them under a secret key.
+With a path, the mapping is kept in a SQLite file (permissions 0600) shared by
+runs on the host. The secret must then be the same in every run and kept away
+from the file - without it the file cannot be linked to CPR numbers.
+"""
+
+import hashlib
+import hmac
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from ._filelock import ensure_private_dir
+
+logger = logging.getLogger(__name__)
+
+# Puts between two prunings of the oldest mappings in the file (at most max_entries)
+_PRUNE_INTERVAL = 1000
+
+
+class CprCache:
+    """
+    Bounded mapping from CPR number to citizenId. Thread-safe.
+
+    Args:
+        max_entries: CPR numbers kept, evicting the least recently used
+        path: SQLite file the mapping is kept in across runs (None: memory only)
+        secret: HMAC key for the CPR numbers - required with a path, else a random key is used
+    """
+
+    def __init__(self, max_entries: int = 100_000, path: Optional[str | Path] = None, secret: Optional[str | bytes] = None) -> None:
+        if path is not None and secret is None:
+            raise ValueError("En CprCache med en sti kræver en hemmelig nøgle (secret)")
+        if isinstance(secret, str):
+            secret = secret.encode("utf-8")
+        self.max_entries = max_entries
+        self.path = Path(path) if path is not None else None
+        self._secret = secret if secret is not None else os.urandom(32)
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._puts = 0
+
+    def key(self, cpr: str) -> str:
+        """The HMAC of a CPR number, with or without a dash. Malformed input gets a key of its own and misses."""
+        return hmac.new(self._secret, cpr.replace("-", "").strip().encode("utf-8", "surrogatepass"), hashlib.sha256).hexdigest()
+
+    def get(self, cpr: str) -> Optional[str]:
+        """The citizenId of `cpr`, or None if it is not known."""
+        key = self.key(cpr)
+        with self._lock:
+            citizen_id = self._entries.get(key)
+            if citizen_id is None and self.path is not None:
+                rows = self._execute("SELECT citizen_id FROM citizens WHERE cpr_hmac = ?", (key,))
+                citizen_id = rows[0][0] if rows else None
+                if citizen_id is not None:
+                    self._remember(key, citizen_id)
+            elif citizen_id is not None:
+                self._entries.move_to_end(key)
+            return citizen_id
+
+    def put(self, cpr: str, citizen_id: str) -> None:
+        key = self.key(cpr)
+        with self._lock:
+            self._remember(key, citizen_id)
+            if self.path is not None:
+                self._execute("INSERT OR REPLACE INTO citizens VALUES (?, ?, ?)", (key, citizen_id, time.time()))
+                # The file is pruned every so many puts, so it briefly holds a few more than max_entries
+                self._puts += 1
+                if self._puts < min(_PRUNE_INTERVAL, self.max_entries):
+                    return
+                self._puts = 0
+                self._execute(
+                    "DELETE FROM citizens WHERE cpr_hmac NOT IN "
+                    "(SELECT cpr_hmac FROM citizens ORDER BY stored_at DESC, rowid DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+
+    def forget(self, cpr: str) -> None:
+        """Drop the mapping of `cpr`, e.g. when its citizenId no longer exists."""
+        key = self.key(cpr)
+        with self._lock:
+            self._entries.pop(key, None)
+            if self.path is not None:
+                self._execute("DELETE FROM citizens WHERE cpr_hmac = ?", (key,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _remember(self, key: str, citizen_id: str) -> None:
+        # Called with the lock held
+        self._entries[key] = citizen_id
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _execute(self, sql: str, parameters: tuple) -> list[tuple]:
+        # Called with the lock held
+        try:
+            if self._connection is None:
+                ensure_private_dir(self.path.parent)
+                os.close(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600))
+                self._connection = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+                self._connection.execute("PRAGMA journal_mode=WAL")
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS citizens (cpr_hmac TEXT PRIMARY KEY, citizen_id TEXT NOT NULL, stored_at REAL NOT NULL)"
+                )
+                self._connection.execute("CREATE INDEX IF NOT EXISTS citizens_stored_at ON citizens (stored_at)")
+            return self._connection.execute(sql, parameters).fetchall()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("CPR-cachen %s kunne ikke bruges: %s", self.path, e)
+            return []
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,145 @@
+"""
+Deadlines for operations spanning several requests.
+
+The public methods of the clients accept ``deadline=`` - a budget in seconds
+for the whole operation. While the method runs, every request it makes
+(including pages fetched in worker threads, retries and backoff) gets at most
+the time left, and a request that would start after the deadline fails right
+away with DeadlineExceeded. Nested deadlines never extend an outer one.
+
+The deadline lives in a contextvar, so it follows the call into asyncio tasks.
+Thread pools do not copy contextvars - the pagination engine runs its page
+requests in a copy of the caller's context for that reason.
+"""
+
+import contextvars
+import functools
+import inspect
+import time
+
+from contextlib import contextmanager
+from typing import AsyncIterator, Callable, Iterator, Optional, TypeVar
+
+import httpx
+
+# Request extension with the absolute deadline (time.monotonic()) of the request
+DEADLINE = "momentum_client.deadline"
+
+F = TypeVar("F", bound=Callable)
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("momentum_deadline", default=None)
+
+
+class DeadlineExceeded(httpx.TimeoutException):
+    """The deadline of the operation passed before the request could be sent."""
+
+
+def current_deadline() -> Optional[float]:
+    """The absolute deadline (time.monotonic()) in the current context, or None."""
+    return _deadline.get()
+
+
+def remaining() -> Optional[float]:
+    """Seconds left until the current deadline, or None without a deadline."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """Run the block with at most `seconds` left (None: keep the current deadline)."""
+    if seconds is None:
+        yield
+        return
+    token = _deadline.set(_earliest(time.monotonic() + seconds))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def _earliest(deadline: float) -> float:
+    current = _deadline.get()
+    return deadline if current is None else min(current, deadline)
+
+
+def cap_timeout(timeout: httpx.Timeout, seconds: float) -> httpx.Timeout:
+    """`timeout` with each of its parts limited to `seconds`."""
+    cap = lambda value: seconds if value is None else min(value, seconds)
+    return httpx.Timeout(connect=cap(timeout.connect), read=cap(timeout.read), write=cap(timeout.write), pool=cap(timeout.pool))
+
+
+def cap_request_timeout(request: httpx.Request) -> None:
+    """Limit the timeouts of `request` to the time left until its deadline, for a retry."""
+    deadline = request.extensions.get(DEADLINE)
+    timeout = request.extensions.get("timeout")
+    if deadline is None or timeout is None:
+        return
+    left = max(0.0, deadline - time.monotonic())
+    request.extensions["timeout"] = {
+        key: left if value is None else min(value, left) for key, value in timeout.items()
+    }
+
+
+def with_deadline(fn: F) -> F:
+    """
+    Give `fn` a ``deadline=`` keyword argument: seconds the whole call may take.
+
+    Works for functions, coroutine functions and functions returning a
+    (async) iterator, where the deadline applies while iterating.
+    """
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, deadline: Optional[float] = None, **kwargs):
+            with deadline_scope(deadline):
+                return await fn(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, deadline: Optional[float] = None, **kwargs):
+        if deadline is None:
+            return fn(*args, **kwargs)
+        with deadline_scope(deadline):
+            result = fn(*args, **kwargs)
+            absolute = _deadline.get()
+        if isinstance(result, Iterator):
+            return _iterate_until(result, absolute)
+        if isinstance(result, AsyncIterator):
+            return _aiterate_until(result, absolute)
+        return result
+    return wrapper
+
+
+def _iterate_until(iterator: Iterator, deadline: float) -> Iterator:
+    # The deadline is set around each step only, so it does not leak into the consumer
+    try:
+        while True:
+            token = _deadline.set(deadline)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _deadline.reset(token)
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+
+
+async def _aiterate_until(iterator: AsyncIterator, deadline: float) -> AsyncIterator:
+    try:
+        while True:
+            token = _deadline.set(deadline)
+            try:
+                item = await anext(iterator)
+            except StopAsyncIteration:
+                return
+            finally:
+                _deadline.reset(token)
+            yield item
+    finally:
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
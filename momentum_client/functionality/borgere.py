@@ -1,21 +1,509 @@
-from typing import Optional, List
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, Optional, List
+import asyncio
+import contextvars
 import datetime
+import itertools
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from enum import Enum
 from httpx import HTTPStatusError
-from momentum_client.client import MomentumClient
+from momentum_client.client import MomentumClient, AsyncMomentumClient, SubClient
+from momentum_client.pagination import PageNumberPaging, afetch_all, aiter_items, fetch_all, iter_items
+from momentum_client.priority import BULK, awith_default_priority, with_default_priority
 
 
-class BorgereClient:
+def _opret_markering_body(markering: dict, start_dato: datetime.date) -> dict:
+    return {
+        "createdAt": None,
+        "updatedAt": None,
+        "start": f"{start_dato}",
+        "end": None,
+        "tagId": markering["id"],
+        "correctionComment": None,
+        "attachmentsToAdd": [],
+        "attachmentsToRemove": []
+    }
+
+
+def _afslut_markering_body(markering: dict, slut_dato: datetime.date) -> dict:
+    # Format slut_dato as yyyy-MM-ddT22:00:00Z
+    formatted_slut_dato = slut_dato.strftime("%Y-%m-%dT22:00:00Z")
+
+    return {
+        "tagId": f"{markering['tag']['id']}",
+        "start": markering["start"],
+        "end": f"{formatted_slut_dato}",
+        "correctionComment": {
+            "referenceId": f"{markering['id']}",
+            "referenceType": None,
+            "body": None,
+            "title": None,
+            "commentTypeCode": None
+        },
+        "attachmentsToAdd": [
+        ],
+        "attachmentsToRemove": [
+        ]
+    }
+
+
+def _notifikation_body(
+    borger: dict,
+    titel: str,
+    start_dato: datetime.date,
+    slut_dato: datetime.date,
+    vigtighed_af_notifikation: str,
+    beskrivelse: Optional[str],
+    synlig_i_header: bool
+) -> dict:
+    godkendte_vigtigheder = {"info", "high", "low", "normal"}
+
+    if vigtighed_af_notifikation not in godkendte_vigtigheder:
+        raise ValueError(f"Ugyldig vigtighed: {vigtighed_af_notifikation}")
+
+    return {
+        "referenceId": borger["citizenId"],
+        "title": titel,
+        "start": f"{start_dato}",
+        "end": f"{slut_dato}",
+        "alertSeverity": vigtighed_af_notifikation,
+        "description": beskrivelse,
+        "visibleInHeaderBar": synlig_i_header,
+        "applicationContext" : 0,
+        "attachmentIds": [
+        ]
+    }
+
+
+def _ansvarlige_body(
+    alle_caseworkers_json: List[dict],
+    medarbejderid: str,
+    medarbejdertype: Optional[int],
+    medarbejderrolle: str,
+    privat_kontaktperson: bool
+) -> dict:
+    """
+    Byg body til /citizens/{id}/responsibleactors med den nye medarbejder
+    samt borgerens nuværende aktive ansvarlige og private kontaktpersoner.
+    """
+    if privat_kontaktperson == False:
+        json_body = {
+            "caseworkers": [
+                {
+                "actorId": f"{medarbejderid}",
+                "role": medarbejdertype,
+                "responsibilities": [
+                    {
+                    "responsibilityCode": f"{medarbejderrolle}",
+                    "showInJobnet": None
+                    }
+                ]
+                }
+            ],
+            "privateContactPersons": []
+            }
+    else:
+        if medarbejderrolle == "Bisidder":
+            private_responsibility_code = "0acce8a4-d610-4a97-9c57-5abd4d14ae80"
+        elif medarbejderrolle == "Partsrepræsentant":
+            private_responsibility_code = "fbe758a1-03aa-49c1-9ad5-27400b379cb7"
+        elif medarbejderrolle == "Nexus-sagsbehandler":
+            private_responsibility_code = "55a5c534-54b2-4f43-9ef9-ee535e10827a"
+        else:  # DUBU-sagsbehandler
+            private_responsibility_code = "a81ee47b-77a6-47f5-90dd-91bea366ea7f"
+        json_body = {
+            "caseworkers": [],
+            "privateContactPersons": [
+                {
+                "actorId": f"{medarbejderid}",
+                "responsibilityCodes": [f"{private_responsibility_code}"]
+                }
+            ]
+            }
+
+    # filtrer de aktive caseworkers
+    active_caseworkers = [
+        item for item in alle_caseworkers_json
+        if item.get("endDate") is None
+    ]
+
+    # Process caseworkers using the logic from C# code
+    # original_json is json_body, caseworker_json is active_caseworkers
+    caseworkers = json_body.get("caseworkers", [])
+    private_contacts = json_body.get("privateContactPersons", [])
+
+    # Responsibility name to code mapping
+    responsibility_mapping = {
+        "Øvrig ansvarlig": "OVRIG_ANSVARLIG",
+        "Beskæftigelsessagsbehandler": "BESKAFTIGELSESSAGSBEHANDLER",
+        "Anden aktør": "ANDEN_AKTOR",
+        "Sanktionsteam": "74be96ca-5fd3-44c2-a951-cba7f3dc9c97",
+        "Fastholdelseskonsulent": "CASEWORKER_RESPONSIBILITY_FASTHOLDELSESKONSULENT",
+        "Jobkonsulent": "CASEWORKER_RESPONSIBILITY_JOBKONSULENT",
+        "Kommunal udslusningskoordinator": "KOMMUNAL_UDSLUSNINGSKOORDINATOR",
+        "Sekundær ansvarlig": "SEKUNDER_ANSVARLIG",
+        "Leder": "LEDER",
+        "Mentor": "MENTOR",
+        "Personlig jobformidler": "PERSONLIG_JOBFORMIDLER",
+        "Koordinerende sagsbehandler": "KOORDINERENDE_SAGSBEHANDLER",
+        "Virksomhedskonsulent": "VIRKSOMHEDSKONSULENT",
+        "Støtte-kontaktperson": "STØTTE-KONTAKTPERSON",
+        "Ydelsesmedarbejder": "YDELSESMEDARBEJDER",
+        "Tilbudsansvarlig": "TILBUDSANSVARLIG",
+        "Uddannelsesvejleder": "UDDANNELSESVEJLEDER"
+    }
+
+    for item in active_caseworkers:
+        actor_id = str(item["caseworkerId"])
+        responsibility_name = str(item["responsibilityName"]).strip()  # Ensure it's a string and remove any leading/trailing whitespace
+
+        # Handle private contact persons separately
+        if responsibility_name in ["Bisidder", "Partsrepræsentant", "DUBU-sagsbehandler", "Nexus-sagsbehandler"]:
+            private_contact_id = str(item["id"])  # Use "id" instead of "caseworkerId"
+            if responsibility_name == "Bisidder": # KONTROLLÉR AT ID ER KORREKT - EDU & PROD DATA stemmer ikke overens nødvendigvis
+                private_responsibility_code = "0acce8a4-d610-4a97-9c57-5abd4d14ae80"
+            elif responsibility_name == "Partsrepræsentant": 
+                private_responsibility_code = "6044f4f7-0731-48c3-aaa2-61a4181956c9"
+            elif responsibility_name == "Nexus-sagsbehandler": 
+                private_responsibility_code = "55a5c534-54b2-4f43-9ef9-ee535e10827a"
+            else:  # DUBU-sagsbehandler
+                private_responsibility_code = "a81ee47b-77a6-47f5-90dd-91bea366ea7f"
+
+            private_contact = {
+                "actorId": private_contact_id,
+                "responsibilityCodes": [private_responsibility_code]
+            }
+
+            private_contacts.append(private_contact)
+            continue  # Skip the rest of the loop since it's not a caseworker
+
+        # Parse role as a floating-point value
+        role_value = float(item["role"])
+        role = 1 if role_value == 1.0 else 0
+
+        new_caseworker = {
+            "actorId": actor_id,
+            "role": role
+        }
+
+        # Map responsibilityName to responsibilityCode
+        responsibility_code = responsibility_mapping.get(responsibility_name, "OVRIG_ANSVARLIG")
+
+        # Safely parse "showInJobnet" without exceptions
+        show_in_jobnet = (
+            item.get("showInJobnet") is not None and 
+            isinstance(item["showInJobnet"], bool) and 
+            item["showInJobnet"]
+        )
+
+        if role == 0:  # When role is 0
+            responsibility_obj = {
+                "responsibilityCode": responsibility_code
+            }
+
+            # Only add showInJobnet if it's true
+            if show_in_jobnet:
+                responsibility_obj["showInJobnet"] = True
+            else:
+                responsibility_obj["showInJobnet"] = None
+
+            new_caseworker["responsibilities"] = [responsibility_obj]
+        else:  # When role is 1
+            new_caseworker["responsibilities"] = []  # Empty responsibilities
+
+        caseworkers.append(new_caseworker)
+
+    # Update json_body with processed data
+    json_body["caseworkers"] = caseworkers
+    json_body["privateContactPersons"] = private_contacts
+    return json_body
+
+
+def _borgersøgning(filters: List[dict], søgeterm: str) -> dict:
+    return {
+        "filters": filters,
+        "søgeterm": søgeterm,
+    }
+
+
+def _kontaktsøgning(columns: List[str]) -> dict:
+    """Byg body til /citizens/{id}/searchContacts for borgerens aktive kontakter."""
+    return {
+        "columns": columns,
+        "paging": {"pageNumber": 0, "pageSize": 50},
+        "sort": [
+            {"fieldName": "sortableEndDate", "ascending": False},
+            {"fieldName": "startDate", "ascending": False}
+        ],
+        "filters": [
+            {
+                "fieldName" : "endDate",
+                "values" : [
+                   None, None, "true"
+                ],
+            }
+        ],
+        "searchFieldsDetails": [],
+        "impersonateCaseworkerId": None,
+        "term": ""
+    }
+
+
+def _fjern_kontaktperson_body(kontakter: dict, email: str) -> dict:
+    """
+    Byg body til /citizens/{id}/responsibleactors med alle borgerens aktive kontakter
+    undtagen den med den angivne email.
+    """
+    json_body = {
+        "caseworkers": [],
+        "privateContactPersons": []
+    }
+
+    # hvis sagsbehandler["type"] == 2, så er det en private. Ellers er det en caseworker:
+    for item in kontakter["data"]:
+        # Skip personen der skal fjernes
+        if item.get("email", "").lower().strip() == email.lower().strip():
+            continue  # Spring denne person over - den bliver ikke tilføjet til json_body
+        if item.get("supplementalCaseName") is not None:
+            continue  # Spring denne person over - den bliver ikke tilføjet til json_body
+        if item.get("type") == 2:  # Privat kontaktperson
+            json_body["privateContactPersons"].append({
+                "actorId": str(item.get("actorId")),
+                "responsibilityCodes": [item.get("responsibilityTypeCode")]
+            })
+        else:  # Sagsbehandler
+            # Determine responsibilities based on type
+            if item.get("type") == 1:
+                responsibilities = []
+            else:
+                responsibilities = [
+                    {
+                        "responsibilityCode": item.get("responsibilityTypeCode"),
+                        "showInJobnet": None
+                    }
+                ]
+
+            json_body["caseworkers"].append({
+                "actorId": str(item.get("actorId")),
+                "role": 1 if float(item.get("type", 0)) == 1.0 else 0,
+                "responsibilities": responsibilities
+            })
+
+    return json_body
+
+
+def _privat_kontaktperson_body(borger: dict, navn: str, email: str, telefon: str) -> dict:
+    return {
+        "email": {"email": email},
+        "mobile": {"number": telefon, "isMobile": True},
+        "phone": {"number": "", "isMobile": False},
+        "address": {
+            "street": "",
+            "building": "",
+            "suite": "",
+            "postalCode": "",
+            "city": "",
+            "countryCode": None,
+            "start": None,
+            "end": None
+        },
+        "description": "",
+        "isActive": False,
+        "cpr": "",
+        "name": navn,
+        "citizenId": borger['id']
+    }
+
+
+def _strukturér_privat_kontaktperson_data(kontaktperson_json: dict, borger: dict) -> dict:
+    """
+    Strukturer privat kontaktperson data til det korrekte format for API opdatering.
+
+    :param kontaktperson_json: Den rå kontaktperson data fra API'et
+    :param borger: Borgerens data som en Dict
+    :return: Struktureret kontaktperson data klar til API opdatering
+    """
+    # Sørg for at vi har de nødvendige felter med fallback værdier
+    structured_data = {
+        "email": {
+            "email": kontaktperson_json.get('email', {}).get('address', '') if isinstance(kontaktperson_json.get('email'), dict) else ""
+        },
+        "mobile": {
+            "number": kontaktperson_json.get('mobile', {}).get('number', '') if isinstance(kontaktperson_json.get('mobile'), dict) else "",
+            "isMobile": True
+        },
+        "phone": {
+            "number": kontaktperson_json.get('phone', {}).get('number', '') if isinstance(kontaktperson_json.get('phone'), dict) else "",
+            "isMobile": False
+        },
+        "address": {
+            "street": kontaktperson_json.get('address', {}).get('street', '') if isinstance(kontaktperson_json.get('address'), dict) else "",
+            "building": kontaktperson_json.get('address', {}).get('building', '') if isinstance(kontaktperson_json.get('address'), dict) else "",
+            "suite": kontaktperson_json.get('address', {}).get('suite', '') if isinstance(kontaktperson_json.get('address'), dict) else "",
+            "postalCode": kontaktperson_json.get('address', {}).get('postalCode', '') if isinstance(kontaktperson_json.get('address'), dict) else "",
+            "city": kontaktperson_json.get('address', {}).get('city', '') if isinstance(kontaktperson_json.get('address'), dict) else "",
+            "countryCode": kontaktperson_json.get('address', {}).get('countryCode') if isinstance(kontaktperson_json.get('address'), dict) else None,
+            "start": kontaktperson_json.get('address', {}).get('start') if isinstance(kontaktperson_json.get('address'), dict) else None,
+            "end": kontaktperson_json.get('address', {}).get('end') if isinstance(kontaktperson_json.get('address'), dict) else None
+        },
+        "description": kontaktperson_json.get('description', ''),
+        "title": kontaktperson_json.get('title', ''),
+        "isActive": kontaktperson_json.get('isActive', False),
+        "cpr": kontaktperson_json.get('cpr', ''),
+        "id": kontaktperson_json.get('id', ''),
+        "name": kontaktperson_json.get('name', kontaktperson_json.get('displayName', '')),
+        "citizenId": borger['id']
+    }
+
+    return structured_data
+
+
+@dataclass(frozen=True)
+class CprOpslagsfejl:
+    """Resultatet for et CPR-nummer, der ikke kunne slås op med hent_borgere_for_cpr."""
+    cpr: str
+
+
+@dataclass(frozen=True)
+class IkkeFundet(CprOpslagsfejl):
+    """Momentum kender ikke CPR-nummeret."""
+
+
+@dataclass(frozen=True)
+class OpslagFejlede(CprOpslagsfejl):
+    """Opslaget fejlede, f.eks. med en timeout eller en 5xx-fejl."""
+    fejl: Exception
+
+
+@dataclass(frozen=True)
+class CprFremskridt:
+    """Status for hent_borgere_for_cpr, givet til fremskridt-funktionen efter hvert CPR-nummer."""
+    færdige: int
+    i_alt: int
+    ikke_fundet: int
+    fejlede: int
+    sekunder: float
+
+    @property
+    def pr_sekund(self) -> float:
+        return self.færdige / self.sekunder if self.sekunder > 0 else 0.0
+
+
+class _CprOpslag:
+    """Resultater og fremskridt for et hent_borgere_for_cpr-kald."""
+
+    def __init__(self, cprs: list[str], fremskridt: Optional[Callable[[CprFremskridt], None]]) -> None:
+        self.cprs = cprs
+        self.resultater: dict[str, dict | CprOpslagsfejl] = {}
+        self._fremskridt = fremskridt
+        self._ikke_fundet = 0
+        self._fejlede = 0
+        self._start = time.monotonic()
+
+    def registrér(self, cpr: str, borger: Optional[dict] = None, fejl: Optional[Exception] = None) -> None:
+        if fejl is not None:
+            self.resultater[cpr] = OpslagFejlede(cpr, fejl)
+            self._fejlede += 1
+        elif borger is None:
+            self.resultater[cpr] = IkkeFundet(cpr)
+            self._ikke_fundet += 1
+        else:
+            self.resultater[cpr] = borger
+        if self._fremskridt is not None:
+            self._fremskridt(self.status())
+
+    def status(self) -> CprFremskridt:
+        return CprFremskridt(
+            færdige=len(self.resultater),
+            i_alt=len(self.cprs),
+            ikke_fundet=self._ikke_fundet,
+            fejlede=self._fejlede,
+            sekunder=time.monotonic() - self._start,
+        )
+
+    def mangler(self) -> Iterator[str]:
+        return (cpr for cpr in self.cprs if cpr not in self.resultater)
+
+    def i_rækkefølge(self) -> dict[str, dict | CprOpslagsfejl]:
+        return {cpr: self.resultater[cpr] for cpr in self.cprs}
+
+
+def _normaliser_cpr(cpr: str) -> str:
+    return cpr.replace("-", "").strip()
+
+
+def _cpr_batches(cprs: list[str], batch_størrelse: int) -> Iterator[list[str]]:
+    return (cprs[i:i + batch_størrelse] for i in range(0, len(cprs), batch_størrelse))
+
+
+def _citizen_ids(side: Optional[dict], batch: list[str]) -> Iterator[tuple[str, str]]:
+    """The CPR number and citizenId of each citizen in a search result that belongs to the batch."""
+    i_batch = set(batch)
+    for borger in (side or {}).get("data", []):
+        cpr = _normaliser_cpr(str(borger.get("cpr", "")))
+        if cpr in i_batch and borger.get("id"):
+            yield cpr, borger["id"]
+
+
+def _begrænset(pool: ThreadPoolExecutor, fn: Callable, elementer: Iterable, vindue: int) -> Iterator[tuple[Any, Future]]:
+    """Call fn(element) in `pool` with at most `vindue` calls in flight, yielding (element, future) as they complete."""
+    elementer = iter(elementer)
+    undervejs: dict[Future, Any] = {}
+
+    def send(element) -> None:
+        undervejs[pool.submit(contextvars.copy_context().run, fn, element)] = element
+
+    for element in itertools.islice(elementer, vindue):
+        send(element)
+    while undervejs:
+        færdige, _ = wait(undervejs, return_when=FIRST_COMPLETED)
+        for future in færdige:
+            yield undervejs.pop(future), future
+            for element in itertools.islice(elementer, 1):
+                send(element)
+
+
+def _cpr_filter(cprs: list[str]) -> List[dict]:
+    return [{"fieldName": "cpr", "values": cprs}]
+
+
+async def _arbejdere(fn: Callable, elementer: Iterable, samtidige: int) -> None:
+    """Await fn(element) for each element with `samtidige` workers, so only a few coroutines exist at a time."""
+    elementer = iter(elementer)
+
+    async def arbejder() -> None:
+        for element in elementer:
+            await fn(element)
+
+    await asyncio.gather(*(arbejder() for _ in range(samtidige)))
+
+
+class BorgereClient(SubClient):
     def __init__(self, client: MomentumClient):
         self._client = client
 
-    def hent_borger(self, cpr: str) -> Optional[dict]:
+    def hent_borger(self, cpr: str, minimal: bool = False) -> Optional[dict]:
         """
         Fetch a citizen's data by their CPR number.
 
+        With a CprCache on the client, a CPR number looked up before costs one request.
+
         :param cpr: Citizen's CPR number
+        :param minimal: Only resolve the citizenId - returns {"citizenId": ...} without fetching the citizen
         :return: Citizen data as a dictionary or None if not found
         """
+        cpr_cache = self._client.cpr_cache
+        citizen_id = cpr_cache.get(cpr) if cpr_cache is not None else None
+        if citizen_id is not None:
+            if minimal:
+                return {"citizenId": citizen_id}
+            borger = self._hent_borger_med_citizen_id(citizen_id)
+            if borger is not None:
+                return borger
+            # The cached citizenId no longer exists - look the CPR number up again
+            cpr_cache.forget(cpr)
+
         endpoint = f"citizens/find?cpr={cpr}"
         try:
             response = self._client.get(endpoint)
@@ -25,8 +513,15 @@ class BorgereClient:
             raise
         
         borger = response.json()
+        if cpr_cache is not None:
+            cpr_cache.put(cpr, borger["citizenId"])
+        if minimal:
+            return {"citizenId": borger["citizenId"]}
+
+        return self._hent_borger_med_citizen_id(borger["citizenId"])
 
-        endpoint = f"citizens/{borger["citizenId"]}"
+    def _hent_borger_med_citizen_id(self, citizen_id: str) -> Optional[dict]:
+        endpoint = f"citizens/{citizen_id}"
         try:
             response = self._client.get(endpoint)
         except HTTPStatusError as e:
@@ -36,6 +531,56 @@ class BorgereClient:
 
         return response.json()
     
+    def hent_borgere_for_cpr(
+            self,
+            cprs: Iterable[str],
+            samtidige: int = 8,
+            batch_størrelse: Optional[int] = None,
+            fremskridt: Optional[Callable[[CprFremskridt], None]] = None
+        ) -> dict[str, dict | CprOpslagsfejl]:
+        """
+        Fetch the citizens of many CPR numbers, instead of calling hent_borger in a loop.
+
+        The lookups are sent concurrently at bulk priority. A CPR number that cannot be
+        looked up does not stop the others, but gives IkkeFundet or OpslagFejlede in the result.
+
+        :param cprs: CPR numbers, with or without a dash - duplicates are looked up once
+        :param samtidige: Number of lookups sent concurrently
+        :param batch_størrelse: First resolve the citizenIds with citizensearch and a cpr filter in
+            batches of this size, saving the citizens/find request per CPR number found
+            (None: resolve each CPR number with citizens/find)
+        :param fremskridt: Called with a CprFremskridt after each CPR number, e.g. to log the rate per second
+        :return: The full citizen, IkkeFundet or OpslagFejlede for each CPR number, in the given order
+        """
+        opslag = _CprOpslag(list(dict.fromkeys(_normaliser_cpr(cpr) for cpr in cprs)), fremskridt)
+        if not opslag.cprs:
+            return {}
+
+        citizen_ids: dict[str, str] = {}
+        vindue = 2 * samtidige
+        with ThreadPoolExecutor(max_workers=samtidige) as pool:
+            if batch_størrelse:
+                søg = with_default_priority(self.hent_borgere, BULK)
+                for batch, future in _begrænset(pool, lambda batch: søg(_cpr_filter(batch)), _cpr_batches(opslag.cprs, batch_størrelse), vindue):
+                    if future.exception() is None:
+                        # CPR numbers of a failed batch are resolved one by one instead
+                        citizen_ids.update(_citizen_ids(future.result(), batch))
+
+            hent = with_default_priority(lambda cpr: self._hent_borger_for_cpr(cpr, citizen_ids.get(cpr)), BULK)
+            for cpr, future in _begrænset(pool, hent, opslag.mangler(), vindue):
+                opslag.registrér(cpr, future.result() if future.exception() is None else None, future.exception())
+
+        return opslag.i_rækkefølge()
+
+    def _hent_borger_for_cpr(self, cpr: str, citizen_id: Optional[str]) -> Optional[dict]:
+        if citizen_id is not None:
+            borger = self._hent_borger_med_citizen_id(citizen_id)
+            if borger is not None:
+                if self._client.cpr_cache is not None:
+                    self._client.cpr_cache.put(cpr, citizen_id)
+                return borger
+        return self.hent_borger(cpr)
+
     def hent_borger_med_id(self, borger_id: str) -> Optional[dict]:
         """
         Fetch a citizen's data by their ID.
@@ -50,6 +595,18 @@ class BorgereClient:
         
         return response.json()
     
+    def _hent_borgerside(self, json_body: dict) -> Optional[dict]:
+        try:
+            response = self._client.post("citizensearch", json=json_body, idempotent=True)
+        except HTTPStatusError as e:
+            if e.response.status_code == 504:
+                raise TimeoutError("Forespørgslen timed out.")
+            raise
+
+        if response.status_code == 404:
+            return None
+        return response.json()
+
     def hent_borgere(self, filters: List[dict], søgeterm = "*") -> Optional[dict]:
         """
         Hent borgere med angivne filtre og søgeterm.
@@ -57,57 +614,33 @@ class BorgereClient:
         :param søgeterm: Search term to filter citizens. Default is * ("alle")
         :return: List of citizens matching the criteria or None if not found
         """
-        endpoint = f"citizensearch"
-        all_data = []
-        page_number = 0
-        has_more = True
-        
-        for _ in iter(int, 1):
-            if not has_more:
-                break
-                
-            json_body = {
-                "filters": filters,
-                "søgeterm": søgeterm,
-                "paging": {
-                    "pageNumber": page_number,
-                    "pageSize": 1000
-                }
-            }
-            try:
-                response = self._client.post(endpoint, json=json_body)
-            except HTTPStatusError as e:
-                if e.response.status_code == 504:
-                    raise TimeoutError("Forespørgslen timed out.")
-                raise
-            
-            if response.status_code == 404:
-                return None
-            
-            data = response.json()
-            all_data.extend(data.get("data", []))
-            has_more = data.get("hasMore", False)
-            page_number += 1
-        
+        all_data = fetch_all(self._hent_borgerside, _borgersøgning(filters, søgeterm), PageNumberPaging(1000))
+        if all_data is None:
+            return None
+
         return {"data": all_data}
+
+    def iter_borgere(self, filters: List[dict], søgeterm = "*") -> Iterator[dict]:
+        """
+        Som hent_borgere, men giver borgerne én side ad gangen mens næste side hentes i baggrunden.
+        Bruges til store udtræk - der holdes højst ca. to sider i hukommelsen.
+        :param filters: Dictionary of filters to apply
+        :param søgeterm: Search term to filter citizens. Default is * ("alle")
+        :return: Iterator over citizens matching the criteria
+        """
+        return iter_items(self._hent_borgerside, _borgersøgning(filters, søgeterm), PageNumberPaging(1000))
     
     def hent_markering(self, markeringsnavn = "ØF-JC-AC-IT-emnebank") -> Optional[dict]:
         """
         Hent specifik markering baseret på markeringsnavn.
+
+        Markeringen slås op i klientens MarkeringsRegister, som kun henter /tags når det er forældet
+        eller navnet er ukendt.
         
         :param markeringsnavn: Navnet på markeringen
         :return: Markeringsdata som en Dict eller None hvis ikke fundet
         """
-
-        endpoint = f"/tags"
-        response = self._client.get(endpoint)
-        if response.status_code == 404:
-            return None
-        tags = response.json()
-        ønsket_markering = next((tag for tag in tags if tag.get("title") == markeringsnavn), None)
-        if ønsket_markering is None:
-            return None
-        return ønsket_markering
+        return self._client.markeringsregister.slå_op(self._client, markeringsnavn)
     
     def hent_markeringer(self, borger: dict) -> Optional[dict]:
         """
@@ -135,16 +668,7 @@ class BorgereClient:
         if markering is None:
             raise ValueError(f"Markering '{markeringsnavn}' findes ikke.")
         
-        body = {
-            "createdAt": None,
-            "updatedAt": None,
-            "start": f"{start_dato}",
-            "end": None,
-            "tagId": markering["id"],
-            "correctionComment": None,
-            "attachmentsToAdd": [],
-            "attachmentsToRemove": []
-        }
+        body = _opret_markering_body(markering, start_dato)
         
         endpoint = f"/tagassignments?referenceId={borger['id']}"
         response = self._client.post(endpoint, json=body)
@@ -172,25 +696,7 @@ class BorgereClient:
         :param slut_dato: Slutdato for markeringen
         :return: Opdateret markering som dict eller None hvis fejlet
         """
-        # Format slut_dato as yyyy-MM-ddT22:00:00Z
-        formatted_slut_dato = slut_dato.strftime("%Y-%m-%dT22:00:00Z")
-
-        body = {
-            "tagId": f"{markering['tag']['id']}",
-            "start": markering["start"],
-            "end": f"{formatted_slut_dato}",
-            "correctionComment": {
-                "referenceId": f"{markering['id']}",
-                "referenceType": None,
-                "body": None,
-                "title": None,
-                "commentTypeCode": None
-            },
-            "attachmentsToAdd": [
-            ],
-            "attachmentsToRemove": [
-            ]
-        }
+        body = _afslut_markering_body(markering, slut_dato)
 
         endpoint = f"/tagassignments/{markering['id']}"
         response = self._client.put(endpoint, json=body)
@@ -218,23 +724,7 @@ class BorgereClient:
         :param synlig_i_header: Boolean flag indicating visibility in header
         :return: Created notification data as a dictionary or None if failed
         """
-        godkendte_vigtigheder = {"info", "high", "low", "normal"}
-
-        if vigtighed_af_notifikation not in godkendte_vigtigheder:
-            raise ValueError(f"Ugyldig vigtighed: {vigtighed_af_notifikation}")
-
-        body = {
-            "referenceId": borger["citizenId"],
-            "title": titel,
-            "start": f"{start_dato}",
-            "end": f"{slut_dato}",
-            "alertSeverity": vigtighed_af_notifikation,
-            "description": beskrivelse,
-            "visibleInHeaderBar": synlig_i_header,
-            "applicationContext" : 0,
-            "attachmentIds": [
-            ]
-        }
+        body = _notifikation_body(borger, titel, start_dato, slut_dato, vigtighed_af_notifikation, beskrivelse, synlig_i_header)
 
         endpoint = f"/alerts"
         response = self._client.post(endpoint, json=body)
@@ -284,139 +774,10 @@ class BorgereClient:
         pr 07/11/25 er listen opdateret - måske fuldent
         """
 
-        if privat_kontaktperson == False:
-            json_body = {
-                "caseworkers": [
-                    {
-                    "actorId": f"{medarbejderid}",
-                    "role": medarbejdertype,
-                    "responsibilities": [
-                        {
-                        "responsibilityCode": f"{medarbejderrolle}",
-                        "showInJobnet": None
-                        }
-                    ]
-                    }
-                ],
-                "privateContactPersons": []
-                }
-        else:
-            if medarbejderrolle == "Bisidder":
-                private_responsibility_code = "0acce8a4-d610-4a97-9c57-5abd4d14ae80"
-            elif medarbejderrolle == "Partsrepræsentant":
-                private_responsibility_code = "fbe758a1-03aa-49c1-9ad5-27400b379cb7"
-            elif medarbejderrolle == "Nexus-sagsbehandler":
-                private_responsibility_code = "55a5c534-54b2-4f43-9ef9-ee535e10827a"
-            else:  # DUBU-sagsbehandler
-                private_responsibility_code = "a81ee47b-77a6-47f5-90dd-91bea366ea7f"
-            json_body = {
-                "caseworkers": [],
-                "privateContactPersons": [
-                    {
-                    "actorId": f"{medarbejderid}",
-                    "responsibilityCodes": [f"{private_responsibility_code}"]
-                    }
-                ]
-                }
-
         # hent alle borgers caseworkers:
         endpoint = f"/responsibleCaseworkers/all/byCitizen/{borger['id']}"
         alle_caseworkers_json = self._client.get(endpoint).json()
-        # filtrer de aktive caseworkers
-        active_caseworkers = [
-            item for item in alle_caseworkers_json
-            if item.get("endDate") is None
-        ]
-
-        # Process caseworkers using the logic from C# code
-        # original_json is json_body, caseworker_json is active_caseworkers
-        caseworkers = json_body.get("caseworkers", [])
-        private_contacts = json_body.get("privateContactPersons", [])
-        
-        # Responsibility name to code mapping
-        responsibility_mapping = {
-            "Øvrig ansvarlig": "OVRIG_ANSVARLIG",
-            "Beskæftigelsessagsbehandler": "BESKAFTIGELSESSAGSBEHANDLER",
-            "Anden aktør": "ANDEN_AKTOR",
-            "Sanktionsteam": "74be96ca-5fd3-44c2-a951-cba7f3dc9c97",
-            "Fastholdelseskonsulent": "CASEWORKER_RESPONSIBILITY_FASTHOLDELSESKONSULENT",
-            "Jobkonsulent": "CASEWORKER_RESPONSIBILITY_JOBKONSULENT",
-            "Kommunal udslusningskoordinator": "KOMMUNAL_UDSLUSNINGSKOORDINATOR",
-            "Sekundær ansvarlig": "SEKUNDER_ANSVARLIG",
-            "Leder": "LEDER",
-            "Mentor": "MENTOR",
-            "Personlig jobformidler": "PERSONLIG_JOBFORMIDLER",
-            "Koordinerende sagsbehandler": "KOORDINERENDE_SAGSBEHANDLER",
-            "Virksomhedskonsulent": "VIRKSOMHEDSKONSULENT",
-            "Støtte-kontaktperson": "STØTTE-KONTAKTPERSON",
-            "Ydelsesmedarbejder": "YDELSESMEDARBEJDER",
-            "Tilbudsansvarlig": "TILBUDSANSVARLIG",
-            "Uddannelsesvejleder": "UDDANNELSESVEJLEDER"
-        }
-        
-        for item in active_caseworkers:
-            actor_id = str(item["caseworkerId"])
-            responsibility_name = str(item["responsibilityName"]).strip()  # Ensure it's a string and remove any leading/trailing whitespace
-            
-            # Handle private contact persons separately
-            if responsibility_name in ["Bisidder", "Partsrepræsentant", "DUBU-sagsbehandler", "Nexus-sagsbehandler"]:
-                private_contact_id = str(item["id"])  # Use "id" instead of "caseworkerId"
-                if responsibility_name == "Bisidder": # KONTROLLÉR AT ID ER KORREKT - EDU & PROD DATA stemmer ikke overens nødvendigvis
-                    private_responsibility_code = "0acce8a4-d610-4a97-9c57-5abd4d14ae80"
-                elif responsibility_name == "Partsrepræsentant": 
-                    private_responsibility_code = "6044f4f7-0731-48c3-aaa2-61a4181956c9"
-                elif responsibility_name == "Nexus-sagsbehandler": 
-                    private_responsibility_code = "55a5c534-54b2-4f43-9ef9-ee535e10827a"
-                else:  # DUBU-sagsbehandler
-                    private_responsibility_code = "a81ee47b-77a6-47f5-90dd-91bea366ea7f"
-                
-                private_contact = {
-                    "actorId": private_contact_id,
-                    "responsibilityCodes": [private_responsibility_code]
-                }
-                
-                private_contacts.append(private_contact)
-                continue  # Skip the rest of the loop since it's not a caseworker
-            
-            # Parse role as a floating-point value
-            role_value = float(item["role"])
-            role = 1 if role_value == 1.0 else 0
-            
-            new_caseworker = {
-                "actorId": actor_id,
-                "role": role
-            }
-            
-            # Map responsibilityName to responsibilityCode
-            responsibility_code = responsibility_mapping.get(responsibility_name, "OVRIG_ANSVARLIG")
-            
-            # Safely parse "showInJobnet" without exceptions
-            show_in_jobnet = (
-                item.get("showInJobnet") is not None and 
-                isinstance(item["showInJobnet"], bool) and 
-                item["showInJobnet"]
-            )
-            
-            if role == 0:  # When role is 0
-                responsibility_obj = {
-                    "responsibilityCode": responsibility_code
-                }
-                
-                # Only add showInJobnet if it's true
-                if show_in_jobnet:
-                    responsibility_obj["showInJobnet"] = True
-                else:
-                    responsibility_obj["showInJobnet"] = None
-                
-                new_caseworker["responsibilities"] = [responsibility_obj]
-            else:  # When role is 1
-                new_caseworker["responsibilities"] = []  # Empty responsibilities
-            
-            caseworkers.append(new_caseworker)
-        
-        # Update json_body with processed data
-        json_body["caseworkers"] = caseworkers
-        json_body["privateContactPersons"] = private_contacts        
+        json_body = _ansvarlige_body(alle_caseworkers_json, medarbejderid, medarbejdertype, medarbejderrolle, privat_kontaktperson)
 
         endpoint = f"/citizens/{borger['id']}/responsibleactors"
         response = self._client.put(endpoint, json=json_body)
@@ -464,26 +825,8 @@ class BorgereClient:
         :param borger: Borgerens data som en Dict
         :return: Liste af aktive sagsbehandlere som Dicts eller None hvis fejlet
         """
-        endpoint_body = {
-            "columns": ["name", "type", "responsibilityTypeCode", "startDate", "endDate", "mobile", "email", "supplementalCaseTypeId"],
-            "paging": {"pageNumber": 0, "pageSize": 50},
-            "sort": [
-                {"fieldName": "sortableEndDate", "ascending": False},
-                {"fieldName": "startDate", "ascending": False}
-            ],
-            "filters": [
-                {
-                    "fieldName" : "endDate",
-                    "values" : [
-                       None, None, "true"
-                    ],
-                }
-            ],
-            "searchFieldsDetails": [],
-            "impersonateCaseworkerId": None,
-            "term": ""
-        }
-        response = self._client.post(f"/citizens/{borger['id']}/searchContacts", json=endpoint_body).json()
+        endpoint_body = _kontaktsøgning(["name", "type", "responsibilityTypeCode", "startDate", "endDate", "mobile", "email", "supplementalCaseTypeId"])
+        response = self._client.post(f"/citizens/{borger['id']}/searchContacts", json=endpoint_body, idempotent=True).json()
         return response
     
     def hent_alle_private_kontaktpersoner(self, borger: dict) -> Optional[List[dict]]:
@@ -495,7 +838,7 @@ class BorgereClient:
         """
         endpoint = f"/citizens/{borger['id']}/searchPrivateContacts"
         body = {"term":" ","paging":{"pageNumber":1,"pageSize":999}}
-        response = self._client.post(endpoint, json=body).json()
+        response = self._client.post(endpoint, json=body, idempotent=True).json()
         if response is None:
             return None
 
@@ -511,7 +854,7 @@ class BorgereClient:
         """
         endpoint = f"/citizens/{borger['id']}/searchPrivateContacts"
         body = {"term": søgeterm, "paging": {"pageNumber": 1, "pageSize": 10}}
-        response = self._client.post(endpoint, json=body).json()
+        response = self._client.post(endpoint, json=body, idempotent=True).json()
         if response is None:
             return None
 
@@ -557,71 +900,10 @@ class BorgereClient:
         :return: Oprettet kontaktperson data som en Dict eller None hvis fejlet
         """
         endpoint = f"/citizens/{borger['id']}/privateContacts"
-        json_body = {
-            "email": {"email": email},
-            "mobile": {"number": telefon, "isMobile": True},
-            "phone": {"number": "", "isMobile": False},
-            "address": {
-                "street": "",
-                "building": "",
-                "suite": "",
-                "postalCode": "",
-                "city": "",
-                "countryCode": None,
-                "start": None,
-                "end": None
-            },
-            "description": "",
-            "isActive": False,
-            "cpr": "",
-            "name": navn,
-            "citizenId": borger['id']
-        }
+        json_body = _privat_kontaktperson_body(borger, navn, email, telefon)
         response = self._client.post(endpoint, json=json_body)
         return response.json() if response.status_code == 200 else None
     
-    def _strukturér_privat_kontaktperson_data(self, kontaktperson_json: dict, borger: dict) -> dict:
-        """
-        Strukturer privat kontaktperson data til det korrekte format for API opdatering.
-        
-        :param kontaktperson_json: Den rå kontaktperson data fra API'et
-        :param borger: Borgerens data som en Dict
-        :return: Struktureret kontaktperson data klar til API opdatering
-        """
-        # Sørg for at vi har de nødvendige felter med fallback værdier
-        structured_data = {
-            "email": {
-                "email": kontaktperson_json.get('email', {}).get('address', '') if isinstance(kontaktperson_json.get('email'), dict) else ""
-            },
-            "mobile": {
-                "number": kontaktperson_json.get('mobile', {}).get('number', '') if isinstance(kontaktperson_json.get('mobile'), dict) else "",
-                "isMobile": True
-            },
-            "phone": {
-                "number": kontaktperson_json.get('phone', {}).get('number', '') if isinstance(kontaktperson_json.get('phone'), dict) else "",
-                "isMobile": False
-            },
-            "address": {
-                "street": kontaktperson_json.get('address', {}).get('street', '') if isinstance(kontaktperson_json.get('address'), dict) else "",
-                "building": kontaktperson_json.get('address', {}).get('building', '') if isinstance(kontaktperson_json.get('address'), dict) else "",
-                "suite": kontaktperson_json.get('address', {}).get('suite', '') if isinstance(kontaktperson_json.get('address'), dict) else "",
-                "postalCode": kontaktperson_json.get('address', {}).get('postalCode', '') if isinstance(kontaktperson_json.get('address'), dict) else "",
-                "city": kontaktperson_json.get('address', {}).get('city', '') if isinstance(kontaktperson_json.get('address'), dict) else "",
-                "countryCode": kontaktperson_json.get('address', {}).get('countryCode') if isinstance(kontaktperson_json.get('address'), dict) else None,
-                "start": kontaktperson_json.get('address', {}).get('start') if isinstance(kontaktperson_json.get('address'), dict) else None,
-                "end": kontaktperson_json.get('address', {}).get('end') if isinstance(kontaktperson_json.get('address'), dict) else None
-            },
-            "description": kontaktperson_json.get('description', ''),
-            "title": kontaktperson_json.get('title', ''),
-            "isActive": kontaktperson_json.get('isActive', False),
-            "cpr": kontaktperson_json.get('cpr', ''),
-            "id": kontaktperson_json.get('id', ''),
-            "name": kontaktperson_json.get('name', kontaktperson_json.get('displayName', '')),
-            "citizenId": borger['id']
-        }
-        
-        return structured_data
-    
     def inaktiver_privat_kontaktperson(self, borger: dict, kontaktperson_navn: str) -> bool:
         """
         Inaktiver en privat kontaktperson for en given borger.
@@ -636,7 +918,7 @@ class BorgereClient:
             return False
         
         # Strukturer data til korrekt format
-        structured_data = self._strukturér_privat_kontaktperson_data(kontaktperson_json, borger)
+        structured_data = _strukturér_privat_kontaktperson_data(kontaktperson_json, borger)
         structured_data['isActive'] = False  # Sæt til inaktiv
         
         endpoint = f"/citizens/{borger['id']}/privateContacts/{structured_data['id']}"
@@ -651,62 +933,10 @@ class BorgereClient:
         :param email: Emailen på den ansvarlige sagsbehandler eller private kontaktperson der skal fjernes
         :return: True hvis fjernelse lykkedes, ellers False
         """
-        json_body = {
-            "caseworkers": [],
-            "privateContactPersons": []
-        }
-        
         # henter alle borgers aktive sagsbehandlere og private kontaktpersoner med tilhørende JSON
-        endpoint_body = {
-            "columns": ["name", "type", "responsibilityTypeCode", "startDate", "endDate",],
-            "paging": {"pageNumber": 0, "pageSize": 50},
-            "sort": [
-                {"fieldName": "sortableEndDate", "ascending": False},
-                {"fieldName": "startDate", "ascending": False}
-            ],
-            "filters": [
-                {
-                    "fieldName" : "endDate",
-                    "values" : [
-                       None, None, "true"
-                    ],
-                }
-            ],
-            "searchFieldsDetails": [],
-            "impersonateCaseworkerId": None,
-            "term": ""
-        }
-        alle_borgers_sagsbehandlere_og_private_kontaktpersoner = self._client.post(f"/citizens/{borger['id']}/searchContacts", json=endpoint_body).json()
-
-        # hvis sagsbehandler["type"] == 2, så er det en private. Ellers er det en caseworker:
-        for item in alle_borgers_sagsbehandlere_og_private_kontaktpersoner["data"]:
-            # Skip personen der skal fjernes
-            if item.get("email", "").lower().strip() == email.lower().strip():
-                continue  # Spring denne person over - den bliver ikke tilføjet til json_body
-            if item.get("supplementalCaseName") is not None:
-                continue  # Spring denne person over - den bliver ikke tilføjet til json_body
-            if item.get("type") == 2:  # Privat kontaktperson
-                json_body["privateContactPersons"].append({
-                    "actorId": str(item.get("actorId")),
-                    "responsibilityCodes": [item.get("responsibilityTypeCode")]
-                })
-            else:  # Sagsbehandler
-                # Determine responsibilities based on type
-                if item.get("type") == 1:
-                    responsibilities = []
-                else:
-                    responsibilities = [
-                        {
-                            "responsibilityCode": item.get("responsibilityTypeCode"),
-                            "showInJobnet": None
-                        }
-                    ]
-                
-                json_body["caseworkers"].append({
-                    "actorId": str(item.get("actorId")),
-                    "role": 1 if float(item.get("type", 0)) == 1.0 else 0,
-                    "responsibilities": responsibilities
-                })
+        endpoint_body = _kontaktsøgning(["name", "type", "responsibilityTypeCode", "startDate", "endDate",])
+        alle_borgers_sagsbehandlere_og_private_kontaktpersoner = self._client.post(f"/citizens/{borger['id']}/searchContacts", json=endpoint_body, idempotent=True).json()
+        json_body = _fjern_kontaktperson_body(alle_borgers_sagsbehandlere_og_private_kontaktpersoner, email)
 
         # alle_borgers_sagsbehandlere_og_private_kontaktpersoner = self.hent_aktive_sagsbehandlere(borger)
 
@@ -781,4 +1011,485 @@ class BorgereClient:
         response = self._client.get(endpoint)
         if response.status_code == 404:
             return None
-        return response.json()
\ No newline at end of file
+        return response.json()
+
+class AsyncBorgereClient(SubClient):
+    def __init__(self, client: AsyncMomentumClient):
+        self._client = client
+
+    async def hent_borger(self, cpr: str, minimal: bool = False) -> Optional[dict]:
+        """
+        Fetch a citizen's data by their CPR number.
+
+        With a CprCache on the client, a CPR number looked up before costs one request.
+
+        :param cpr: Citizen's CPR number
+        :param minimal: Only resolve the citizenId - returns {"citizenId": ...} without fetching the citizen
+        :return: Citizen data as a dictionary or None if not found
+        """
+        cpr_cache = self._client.cpr_cache
+        citizen_id = cpr_cache.get(cpr) if cpr_cache is not None else None
+        if citizen_id is not None:
+            if minimal:
+                return {"citizenId": citizen_id}
+            borger = await self._hent_borger_med_citizen_id(citizen_id)
+            if borger is not None:
+                return borger
+            cpr_cache.forget(cpr)
+
+        try:
+            response = await self._client.get(f"citizens/find?cpr={cpr}")
+        except HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return None
+            raise
+        
+        borger = response.json()
+        if cpr_cache is not None:
+            cpr_cache.put(cpr, borger["citizenId"])
+        if minimal:
+            return {"citizenId": borger["citizenId"]}
+
+        return await self._hent_borger_med_citizen_id(borger["citizenId"])
+
+    async def _hent_borger_med_citizen_id(self, citizen_id: str) -> Optional[dict]:
+        try:
+            response = await self._client.get(f"citizens/{citizen_id}")
+        except HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return None
+            raise
+
+        return response.json()
+    
+    async def hent_borgere_for_cpr(
+            self,
+            cprs: Iterable[str],
+            samtidige: int = 8,
+            batch_størrelse: Optional[int] = None,
+            fremskridt: Optional[Callable[[CprFremskridt], None]] = None
+        ) -> dict[str, dict | CprOpslagsfejl]:
+        """
+        Fetch the citizens of many CPR numbers, instead of calling hent_borger in a loop.
+
+        See BorgereClient.hent_borgere_for_cpr.
+
+        :param cprs: CPR numbers, with or without a dash - duplicates are looked up once
+        :param samtidige: Number of lookups sent concurrently
+        :param batch_størrelse: First resolve the citizenIds with citizensearch in batches of this size
+            (None: resolve each CPR number with citizens/find)
+        :param fremskridt: Called with a CprFremskridt after each CPR number
+        :return: The full citizen, IkkeFundet or OpslagFejlede for each CPR number, in the given order
+        """
+        opslag = _CprOpslag(list(dict.fromkeys(_normaliser_cpr(cpr) for cpr in cprs)), fremskridt)
+        if not opslag.cprs:
+            return {}
+        citizen_ids: dict[str, str] = {}
+
+        async def søg(batch: list[str]) -> None:
+            try:
+                side = await awith_default_priority(self.hent_borgere, BULK)(_cpr_filter(batch))
+            except Exception:
+                # CPR numbers of a failed batch are resolved one by one instead
+                return
+            citizen_ids.update(_citizen_ids(side, batch))
+
+        async def hent(cpr: str) -> None:
+            try:
+                borger = await awith_default_priority(self._hent_borger_for_cpr, BULK)(cpr, citizen_ids.get(cpr))
+            except Exception as e:
+                opslag.registrér(cpr, fejl=e)
+                return
+            opslag.registrér(cpr, borger)
+
+        if batch_størrelse:
+            await _arbejdere(søg, _cpr_batches(opslag.cprs, batch_størrelse), samtidige)
+        await _arbejdere(hent, opslag.mangler(), samtidige)
+        return opslag.i_rækkefølge()
+
+    async def _hent_borger_for_cpr(self, cpr: str, citizen_id: Optional[str]) -> Optional[dict]:
+        if citizen_id is not None:
+            borger = await self._hent_borger_med_citizen_id(citizen_id)
+            if borger is not None:
+                if self._client.cpr_cache is not None:
+                    self._client.cpr_cache.put(cpr, citizen_id)
+                return borger
+        return await self.hent_borger(cpr)
+
+    async def hent_borger_med_id(self, borger_id: str) -> Optional[dict]:
+        """
+        Fetch a citizen's data by their ID.
+
+        :param borger_id: Citizen's ID
+        :return: Citizen data as a dictionary or None if not found
+        """
+        response = await self._client.get(f"citizens/{borger_id}")
+        if response.status_code == 404:
+            return None
+        
+        return response.json()
+    
+    async def _hent_borgerside(self, json_body: dict) -> Optional[dict]:
+        try:
+            response = await self._client.post("citizensearch", json=json_body, idempotent=True)
+        except HTTPStatusError as e:
+            if e.response.status_code == 504:
+                raise TimeoutError("Forespørgslen timed out.")
+            raise
+
+        if response.status_code == 404:
+            return None
+        return response.json()
+
+    async def hent_borgere(self, filters: List[dict], søgeterm = "*") -> Optional[dict]:
+        """
+        Hent borgere med angivne filtre og søgeterm.
+        :param filters: Dictionary of filters to apply
+        :param søgeterm: Search term to filter citizens. Default is * ("alle")
+        :return: List of citizens matching the criteria or None if not found
+        """
+        all_data = await afetch_all(self._hent_borgerside, _borgersøgning(filters, søgeterm), PageNumberPaging(1000))
+        if all_data is None:
+            return None
+
+        return {"data": all_data}
+
+    def iter_borgere(self, filters: List[dict], søgeterm = "*") -> AsyncIterator[dict]:
+        """
+        Som hent_borgere, men giver borgerne én side ad gangen mens næste side hentes i baggrunden.
+        Bruges til store udtræk - der holdes højst ca. to sider i hukommelsen.
+        :param filters: Dictionary of filters to apply
+        :param søgeterm: Search term to filter citizens. Default is * ("alle")
+        :return: Async iterator over citizens matching the criteria
+        """
+        return aiter_items(self._hent_borgerside, _borgersøgning(filters, søgeterm), PageNumberPaging(1000))
+    
+    async def hent_markering(self, markeringsnavn = "ØF-JC-AC-IT-emnebank") -> Optional[dict]:
+        """
+        Hent specifik markering baseret på markeringsnavn.
+
+        Markeringen slås op i klientens MarkeringsRegister, som kun henter /tags når det er forældet
+        eller navnet er ukendt.
+        
+        :param markeringsnavn: Navnet på markeringen
+        :return: Markeringsdata som en Dict eller None hvis ikke fundet
+        """
+        return await self._client.markeringsregister.aslå_op(self._client, markeringsnavn)
+    
+    async def hent_markeringer(self, borger: dict) -> Optional[dict]:
+        """
+        Henter en borgers markeringer
+
+        :param borger: Borgerens data som en Dict
+        :return: Liste af markeringer som en Dict eller None hvis fejlet
+        """
+        response = await self._client.get(f"/tagassignments?referenceId={borger['id']}")
+        if response.status_code == 404:
+            return None
+        return response.json()
+
+    async def opret_markering(self, markeringsnavn: str, borger: dict, start_dato: datetime.date) -> Optional[dict]:
+        """
+        Opret en markering for en borger.
+        
+        :param markeringsnavn: Navnet på markeringen
+        :param borger: Borgerens data som en Dict
+        :param start_dato: Startdato for markeringen
+        :return: Oprettet markering som en Dict eller None hvis fejlet
+        """
+        markering = await self.hent_markering(markeringsnavn)
+        if markering is None:
+            raise ValueError(f"Markering '{markeringsnavn}' findes ikke.")
+        
+        body = _opret_markering_body(markering, start_dato)
+        
+        endpoint = f"/tagassignments?referenceId={borger['id']}"
+        response = await self._client.post(endpoint, json=body)
+
+        if response.status_code == 404:
+            return None
+        return response.json() if response.status_code == 201 else None
+    
+    async def slet_markering(self, markerings_id: str) -> bool:
+        """
+        Slet en markering baseret på markerings ID.
+
+        :param markerings_id: ID'et for markeringen der skal slettes
+        :return: True hvis markeringen blev slettet, ellers False
+        """
+        response = await self._client.post(f"/tagassignments/{markerings_id}/delete")
+        return response.status_code == 200
+    
+    async def afslut_markering(self, markering: dict, slut_dato: datetime.date) -> Optional[dict]:
+        """
+        Afslutter en markering.
+
+        :param Markering: den fulde markering som dict
+        :param slut_dato: Slutdato for markeringen
+        :return: Opdateret markering som dict eller None hvis fejlet
+        """
+        body = _afslut_markering_body(markering, slut_dato)
+
+        response = await self._client.put(f"/tagassignments/{markering['id']}", json=body)
+        return response.json() if response.status_code == 200 else None
+    
+    async def opret_notifikation(
+        self,
+        borger: dict,
+        titel: str,
+        start_dato: datetime.date,
+        slut_dato: datetime.date,
+        vigtighed_af_notifikation: str,
+        beskrivelse: Optional[str] = None,
+        synlig_i_header: bool = False
+    ) -> Optional[dict]:
+        """
+        Create a notification for a citizen.
+
+        :param borger: Citizen's data as a dictionary
+        :param titel: Title of the notification
+        :param start_dato: Start date of the notification
+        :param slut_dato: End date of the notification
+        :param vigtighed_af_notifikation: Importance level of the notification
+        :param beskrivelse: Optional description of the notification
+        :param synlig_i_header: Boolean flag indicating visibility in header
+        :return: Created notification data as a dictionary or None if failed
+        """
+        body = _notifikation_body(borger, titel, start_dato, slut_dato, vigtighed_af_notifikation, beskrivelse, synlig_i_header)
+
+        response = await self._client.post("/alerts", json=body)
+        return response.json() if response.status_code == 200 else None
+    
+    async def opdater_borgers_ansvarlige_og_kontaktpersoner(
+            self,
+            borger: dict,
+            medarbejderid: str,
+            medarbejdertype: Optional[int] = 0,
+            medarbejderrolle: str = "OVRIG_ANSVARLIG",
+            privat_kontaktperson: bool = False
+        ) -> Optional[dict]:
+        """
+        Opdaterer en borgers ansvarlige og kontaktpersoner.
+
+        Se BorgereClient.opdater_borgers_ansvarlige_og_kontaktpersoner for beskrivelse af
+        medarbejdertype og medarbejderrolle.
+
+        :param borger: Borgerens data som en Dict
+        :param medarbejderid: Medarbejderens ID der skal påsættes borgeren
+        :param medarbejdertype: 0 = Øvrige, 1 = Primære
+        :param medarbejderrolle: Medarbejderrolle som den står i UI
+        :param privat_kontaktperson: Flag som indikerer om det er en privat kontaktperson eller ej. Default er False.
+        """
+        # hent alle borgers caseworkers:
+        endpoint = f"/responsibleCaseworkers/all/byCitizen/{borger['id']}"
+        alle_caseworkers_json = (await self._client.get(endpoint)).json()
+        json_body = _ansvarlige_body(alle_caseworkers_json, medarbejderid, medarbejdertype, medarbejderrolle, privat_kontaktperson)
+
+        endpoint = f"/citizens/{borger['id']}/responsibleactors"
+        response = await self._client.put(endpoint, json=json_body)
+        return response.json() if response.status_code == 200 else None
+        
+    async def hent_sagsbehandler(self, initialer: str) -> Optional[dict]:
+        """
+        Hent sagsbehandler information baseret på medarbejderinitialer.
+
+        :param initialer: Medarbejderens initialer
+        :return: Sagsbehandler data som en Dict eller None hvis ikke fundet
+        """
+        medarbejdere = await self._client.søg(søgeterm=initialer, kategori="Caseworker", kun_active=True, ønsket_antal=10)
+
+        if not medarbejdere:
+            return None
+
+        # Description indeholder "initialer"@odense.dk og bruges til at finde den korrekte medarbejder:
+        return next((item for item in medarbejdere if item.get("description") == f"{initialer}@odense.dk"), None)
+    
+    async def hent_ansvarlige_sagsbehandlere(self, borger: dict) -> Optional[List[dict]]:
+        """
+        Hent ansvarlige sagsbehandlere for en given borger.
+
+        :param borger: Borgerens data som en Dict
+        :return: Liste af ansvarlige sagsbehandlere som Dicts eller None hvis fejlet
+        """
+        endpoint = f"/responsibleCaseworkers/all/byCitizen/{borger['id']}"
+        response = (await self._client.get(endpoint)).json()
+        if response is None:
+            return None
+
+        # behold kun aktive sagsbehandlere: caseworkerIsActive = 1, role = 1 og endDate = None
+        return [
+            item for item in response if item.get("caseworkerIsActive") == 1 and item.get("role") == 1 and item.get("endDate") is None
+        ]
+    
+    async def hent_aktive_sagsbehandlere(self, borger: dict) -> Optional[List[dict]]:
+        """
+        Hent aktive sagsbehandlere for en given borger.
+
+        :param borger: Borgerens data som en Dict
+        :return: Liste af aktive sagsbehandlere som Dicts eller None hvis fejlet
+        """
+        endpoint_body = _kontaktsøgning(["name", "type", "responsibilityTypeCode", "startDate", "endDate", "mobile", "email", "supplementalCaseTypeId"])
+        return (await self._client.post(f"/citizens/{borger['id']}/searchContacts", json=endpoint_body, idempotent=True)).json()
+    
+    async def hent_alle_private_kontaktpersoner(self, borger: dict) -> Optional[List[dict]]:
+        """
+        Hent alle private kontaktpersoner for en given borger.
+
+        :param borger: Borgerens data som en Dict
+        :return: Liste af private kontaktpersoner som Dicts eller None hvis fejlet
+        """
+        endpoint = f"/citizens/{borger['id']}/searchPrivateContacts"
+        body = {"term":" ","paging":{"pageNumber":1,"pageSize":999}}
+        return (await self._client.post(endpoint, json=body, idempotent=True)).json()
+    
+    async def søg_specifik_privat_kontaktperson(self, borger: dict, søgeterm: str) -> Optional[dict]:
+        """
+        Hent en specifik privat kontaktperson for en given borger baseret på søgeterm.
+
+        :param borger: Borgerens data som en Dict
+        :param søgeterm: Søgeterm for kontaktpersonen
+        :return: Kontaktperson data som en Dict eller None hvis ikke fundet
+        """
+        endpoint = f"/citizens/{borger['id']}/searchPrivateContacts"
+        body = {"term": søgeterm, "paging": {"pageNumber": 1, "pageSize": 10}}
+        return (await self._client.post(endpoint, json=body, idempotent=True)).json()
+    
+    async def hent_specifik_privat_kontaktperson(self, borger: dict, kontaktperson_id: str) -> Optional[dict]:
+        """
+        Hent en specifik privat kontaktperson for en given borger baseret på kontaktperson ID.
+
+        :param borger: Borgerens data som en Dict
+        :param kontaktperson_id: Kontaktpersonens ID
+        :return: Kontaktperson data som en Dict eller None hvis ikke fundet
+        """
+        response = await self._client.get(f"/citizens/{borger['id']}/privateContacts/{kontaktperson_id}")
+        if response.status_code == 404:
+            return None
+        return response.json()
+
+    async def hent_aktør(self, aktør_id: str) -> Optional[dict]:
+        """
+        Hent aktør information baseret på aktør ID.
+        Aktør ID kan findes ved at bruge hent_sagsbehandler metoden.
+
+        :param aktør_id: Aktørens ID
+        :return: Aktør data som en Dict eller None hvis ikke fundet
+        """
+        response = await self._client.get(f"/actors/{aktør_id}/details")
+        if response.status_code == 404:
+            return None
+        return response.json()
+    
+    async def opret_privat_kontaktperson(self, borger: dict,
+                                    navn: str, email: str, telefon: str) -> Optional[dict]:
+        """
+        Opret en privat kontaktperson for en given borger.
+
+        :param borger: Borgerens data som en Dict
+        :param navn: Navn på kontaktpersonen
+        :param email: Email på kontaktpersonen
+        :param telefon: Telefonnummer på kontaktpersonen
+        :return: Oprettet kontaktperson data som en Dict eller None hvis fejlet
+        """
+        endpoint = f"/citizens/{borger['id']}/privateContacts"
+        json_body = _privat_kontaktperson_body(borger, navn, email, telefon)
+        response = await self._client.post(endpoint, json=json_body)
+        return response.json() if response.status_code == 200 else None
+    
+    async def inaktiver_privat_kontaktperson(self, borger: dict, kontaktperson_navn: str) -> bool:
+        """
+        Inaktiver en privat kontaktperson for en given borger.
+
+        :param borger: Borgerens data som en Dict
+        :param kontaktperson_navn: Navnet på den private kontaktperson der skal inaktiveres
+        :return: True hvis inaktivering lykkedes, ellers False
+        """
+        kontaktperson_data = await self.søg_specifik_privat_kontaktperson(borger, kontaktperson_navn)
+        kontaktperson_json = await self.hent_specifik_privat_kontaktperson(borger, kontaktperson_data["data"][0]['id'])
+        if kontaktperson_json is None:
+            return False
+        
+        # Strukturer data til korrekt format
+        structured_data = _strukturér_privat_kontaktperson_data(kontaktperson_json, borger)
+        structured_data['isActive'] = False  # Sæt til inaktiv
+        
+        endpoint = f"/citizens/{borger['id']}/privateContacts/{structured_data['id']}"
+        response = await self._client.put(endpoint, json=structured_data)
+        return response.status_code == 200
+    
+    async def fjern_ansvarlig_eller_privat_kontaktperson(self, borger: dict, email: str) -> bool:
+        """
+        Fjern en ansvarlig sagsbehandler eller privat kontaktperson fra en given borger.
+
+        :param borger: Borgerens data som en Dict
+        :param email: Emailen på den ansvarlige sagsbehandler eller private kontaktperson der skal fjernes
+        :return: True hvis fjernelse lykkedes, ellers False
+        """
+        # henter alle borgers aktive sagsbehandlere og private kontaktpersoner med tilhørende JSON
+        endpoint_body = _kontaktsøgning(["name", "type", "responsibilityTypeCode", "startDate", "endDate",])
+        kontakter = (await self._client.post(f"/citizens/{borger['id']}/searchContacts", json=endpoint_body, idempotent=True)).json()
+        json_body = _fjern_kontaktperson_body(kontakter, email)
+
+        response = await self._client.put(f"/citizens/{borger['id']}/responsibleactors", json=json_body)
+        return response.status_code == 200
+
+    async def hent_personvisitationstatus(self, borger: dict) -> Optional[dict]:
+        """
+        Hent en borgers personvisitationstatus.
+
+        :param borger: Borgerens data som en Dict
+        :return: Personvisitationstatus som en Dict eller None hvis fejlet
+        """
+        response = await self._client.get(f"/citizen/{borger['id']}/personvisitationstatus")
+        if response.status_code == 404:
+            return None
+        return response.json()
+
+    async def hent_jobsøgningsdefinition(self, borger: dict) -> Optional[dict]:
+        """
+        Hent en borgers jobsøgningsdefinition.
+
+        :param borger: Borgerens data som en Dict
+        :return: Jobsøgningsdefinition som en Dict eller None hvis fejlet
+        """
+        response = await self._client.get(f"/citizens/{borger['id']}/jobSearchDefinition")
+        if response.status_code == 404:
+            return None
+        return response.json()
+
+    async def hent_joblog(self, borger: dict) -> Optional[dict]:
+        """
+        Hent en borgers joblog.
+
+        :param borger: Borgerens data som en Dict
+        :return: Joblog som en Dict eller None hvis fejlet
+        """
+        response = await self._client.get(f"/citizens/{borger['id']}/joblog")
+        if response.status_code == 404:
+            return None
+        return response.json()
+    
+    async def hent_uddannelser(self, borger: dict) -> Optional[dict]:
+        """
+        Hent en borgers uddannelser.
+
+        :param borger: Borgerens data som en Dict
+        :return: Uddannelser som en Dict eller None hvis fejlet
+        """
+        response = await self._client.get(f"/citizens/{borger['id']}/cvs/")
+        if response.status_code in (404, 204):
+            return None
+        # vi er kun interesseret i uddannelserne:
+        return response.json().get("educations", [])
+
+    async def hent_målgrupper(self, borger: dict) -> Optional[dict]:
+        """
+        Hent en borgers målgrupper.
+
+        :param borger: Borgerens data som en Dict
+        :return: Målgrupper som en Dict eller None hvis fejlet
+        """
+        response = await self._client.get(f"/classifications/{borger['id']}")
+        if response.status_code == 404:
+            return None
+        return response.json()
@@ -1,9 +1,9 @@
 from typing import Optional
 
-from momentum_client.client import MomentumClient
+from momentum_client.client import MomentumClient, AsyncMomentumClient, SubClient
 
 
-class JournalnotaterClient:
+class JournalnotaterClient(SubClient):
     def __init__(self, client: MomentumClient):
         self._client = client
 
@@ -13,4 +13,17 @@ class JournalnotaterClient:
         
         response = self._client.get(endpoint)
         
-        return response.json()
\ No newline at end of file
+        return response.json()
+
+
+class AsyncJournalnotaterClient(SubClient):
+    def __init__(self, client: AsyncMomentumClient):
+        self._client = client
+
+    async def hent_journalnotater(self, referenceid:str) -> Optional[dict]:
+        
+        endpoint = f"/journals/{referenceid}"
+        
+        response = await self._client.get(endpoint)
+        
+        return response.json()
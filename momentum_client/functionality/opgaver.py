@@ -1,9 +1,62 @@
 from datetime import datetime
 from enum import Enum
-from momentum_client.client import MomentumClient
+from typing import AsyncIterator, Iterator, Optional
+from momentum_client.client import MomentumClient, AsyncMomentumClient, SubClient
+from momentum_client.pagination import PageNumberPaging, afetch_all, aiter_items, fetch_all, iter_items
+
+
+def _opgave_skabelon(borger: dict | None, medarbejdere: list[dict], forfaldsdato: datetime, titel: str, beskrivelse: str, task_type: int | None, borger_opgave: bool) -> dict:
+    opgave_skabelon = {            
+        "title": titel,
+        "description": beskrivelse,
+        "deadline": forfaldsdato.isoformat(),
+        "assignedActorsId": [medarbejder["id"] if isinstance(medarbejder, dict) else medarbejder for medarbejder in medarbejdere],
+        "taskType": task_type,
+        "reference": None
+    }
+    if borger:
+        opgave_skabelon["reference"] = {
+            "id": borger["id"] if isinstance(borger, dict) else borger, # TODO: Udvid til at kunne håndtere andre typer referencer
+            "type": "CITIZEN" if borger_opgave else "PRODUCTIONUNIT"
+        }
+    return opgave_skabelon
+
+
+_OPGAVESIDE_STØRRELSE = 150
+
+
+def _opgavesøgning(felt: str, værdi: str, sidenummer: int, sidestørrelse: int) -> dict:
+    return {
+        "columns": [],
+        "filters": [
+            {
+                "fieldName": felt,
+                "values": [værdi]
+            }
+        ],
+        "sort": [
+            {
+                "fieldName": "deadline",
+                "ascending": True
+            }
+        ],
+        "paging": {
+            "pageNumber": sidenummer,
+            "pageSize": sidestørrelse
+        }
+    }
+
+
+def _borgeropgavesøgning(borger: dict) -> dict:
+    return _opgavesøgning(
+        "citizenId",
+        f"{borger['id']}" if isinstance(borger, dict) else f"{borger}",
+        0,
+        _OPGAVESIDE_STØRRELSE
+    )
 
 
-class OpgaverClient:
+class OpgaverClient(SubClient):
     class Status(Enum):
         """Status værdier for opgaver i Momentum."""
         gennemført = 0
@@ -26,20 +79,7 @@ class OpgaverClient:
         """
 
 
-        opgave_skabelon = {            
-            "title": titel,
-            "description": beskrivelse,
-            "deadline": forfaldsdato.isoformat(),
-            "assignedActorsId": [medarbejder["id"] if isinstance(medarbejder, dict) else medarbejder for medarbejder in medarbejdere],
-            "taskType": task_type,
-            "reference": None
-        }
-        if borger:
-            opgave_skabelon["reference"] = {
-                "id": borger["id"] if isinstance(borger, dict) else borger, # TODO: Udvid til at kunne håndtere andre typer referencer
-                "type": "CITIZEN" if borger_opgave else "PRODUCTIONUNIT"
-            }
-            
+        opgave_skabelon = _opgave_skabelon(borger, medarbejdere, forfaldsdato, titel, beskrivelse, task_type, borger_opgave)
        
         endpoint = "/tasks"
 
@@ -55,90 +95,36 @@ class OpgaverClient:
         :param borger: Borger objekt eller ID
         :return: Liste af opgaver som dictionaries
         """
-        antal_hentet_opgaver = 150
-        alle_opgaver = []
-        page_number = 0
-        borgers_totale_antal_opgaver = 0
-
-        while len(alle_opgaver) < borgers_totale_antal_opgaver or page_number == 0:
-            json_skabelon = {
-                "columns": [],
-                "filters": [
-                    {
-                        "fieldName": "citizenId",
-                        "values": [f"{borger['id']}" if isinstance(borger, dict) else f"{borger}"]
-                    }
-                ],
-                "sort": [
-                    {
-                        "fieldName": "deadline",
-                        "ascending": True
-                    }
-                ],
-                "paging": {
-                    "pageNumber": page_number,
-                    "pageSize": antal_hentet_opgaver
-                }
-            }
+        return fetch_all(self._hent_borgeropgaveside, _borgeropgavesøgning(borger), PageNumberPaging(_OPGAVESIDE_STØRRELSE))
+
+    def iter_opgaver(self, borger: dict) -> Iterator[dict]:
+        """
+        Som hent_opgaver, men giver opgaverne én side ad gangen mens næste side hentes i baggrunden.
+
+        :param borger: Borger objekt eller ID
+        :return: Iterator over opgaver som dictionaries
+        """
+        return iter_items(self._hent_borgeropgaveside, _borgeropgavesøgning(borger), PageNumberPaging(_OPGAVESIDE_STØRRELSE))
 
-            endpoint = "/tasks/citizen"
-            response = self._client.post(endpoint, json=json_skabelon)
-            response.raise_for_status()
-            opgaver = response.json()
-            
-            alle_opgaver.extend(opgaver.get("data", []))
-            borgers_totale_antal_opgaver = opgaver.get("totalSearchCount", 0)
-            
-            page_number += 1
-
-        return alle_opgaver
+    def _hent_borgeropgaveside(self, body: dict) -> dict:
+        response = self._client.post("/tasks/citizen", json=body, idempotent=True)
+        response.raise_for_status()
+        return response.json()
     
     def hent_opgaver_på_virksomhed(self, virksomhedsid:str) -> list[dict] | None:
         
-        opgave_liste = []
         antal_hentet_opgaver = 150
-        side_nummer = 0
         endpoint = "/tasks/company"
-        flere_sider = True
-
-        while flere_sider:
-            json_skabelon = {
-                "columns": [],
-                "filters": [
-                    {
-                        "fieldName": "productionUnitId",
-                        "values": [virksomhedsid]
-                    }
-                ],
-                "sort": [
-                    {
-                        "fieldName": "deadline",
-                        "ascending": True
-                    }
-                ],
-                "paging": {
-                    "pageNumber": side_nummer,
-                    "pageSize": antal_hentet_opgaver
-                }
-            }
+        json_skabelon = _opgavesøgning("productionUnitId", virksomhedsid, 0, antal_hentet_opgaver)
 
-            response = self._client.post(endpoint, json=json_skabelon)
-                
+        def hent_side(body: dict) -> Optional[dict]:
+            response = self._client.post(endpoint, json=body, idempotent=True)
             if response.status_code == 404:
                 return None
-            
-            data = response.json()
-
-            if data is not None:
-                opgave_liste.extend(data['data'])
-                
-            # Tjek om der er flere sider
-            if len(opgave_liste) >= data['totalSearchCount'] or side_nummer > 20:
-                flere_sider = False
-            
-            side_nummer += 1
-        
-        return opgave_liste
+            return response.json()
+
+        # Sikkerhedstjek på mere end 20 sider (side_nummer 0-21)
+        return fetch_all(hent_side, json_skabelon, PageNumberPaging(antal_hentet_opgaver), max_pages=22)
     
     def opdater_opgave_status(self, opgaveid: str, status: Status) -> dict:
         """Ændre status på en opgave."""
@@ -159,25 +145,86 @@ class OpgaverClient:
         :param side_størrelse: Antal opgaver pr. side
         :return: Liste af opgaver som dictionaries
         """
-        sidenummer = 0        
-        endpoint = "/tasks/citizen"
-        samlede_opgaver = []
+        return fetch_all(self._hent_borgeropgaveside, søge_filtre, PageNumberPaging(side_størrelse))
 
-        while True:
-            response = self._client.post(endpoint, json=søge_filtre)
-            response.raise_for_status()
 
-            if response.status_code != 200:
-                break
+class AsyncOpgaverClient(SubClient):
+    Status = OpgaverClient.Status
 
-            payload = response.json()
-            samlede_opgaver.extend(payload.get("data", []))
+    def __init__(self, client: AsyncMomentumClient):
+        self._client = client
 
-            total_search_count = payload.get("totalSearchCount", len(samlede_opgaver))
-            if total_search_count <= side_størrelse * (sidenummer + 1):
-                break
+    async def opret_opgave(self, borger: dict | None, medarbejdere: list[dict], forfaldsdato: datetime, titel: str, beskrivelse: str, task_type: int | None = None, borger_opgave: bool = True) -> dict:
+        """
+        Opret en opgave for en given borger.
 
-            sidenummer += 1
-            søge_filtre["paging"]["pageNumber"] = sidenummer
+        :param borger: Borger objekt eller ID
+        :param medarbejdere: Liste af medarbejder objekter eller IDs
+        :param forfaldsdato: Dato for opgavens forfald
+        :param titel: Titel på opgaven
+        :param beskrivelse: Beskrivelse af opgaven
+        :return: Opgave information som dictionary
+        """
+        opgave_skabelon = _opgave_skabelon(borger, medarbejdere, forfaldsdato, titel, beskrivelse, task_type, borger_opgave)
+
+        response = await self._client.post("/tasks", json=opgave_skabelon)
+        response.raise_for_status()
+
+        return response.json()
 
-        return samlede_opgaver
\ No newline at end of file
+    async def hent_opgaver(self, borger: dict) -> list[dict]:
+        """
+        Hent alle opgaver for en given borger.
+
+        :param borger: Borger objekt eller ID
+        :return: Liste af opgaver som dictionaries
+        """
+        return await afetch_all(self._hent_borgeropgaveside, _borgeropgavesøgning(borger), PageNumberPaging(_OPGAVESIDE_STØRRELSE))
+
+    def iter_opgaver(self, borger: dict) -> AsyncIterator[dict]:
+        """
+        Som hent_opgaver, men giver opgaverne én side ad gangen mens næste side hentes i baggrunden.
+
+        :param borger: Borger objekt eller ID
+        :return: Async iterator over opgaver som dictionaries
+        """
+        return aiter_items(self._hent_borgeropgaveside, _borgeropgavesøgning(borger), PageNumberPaging(_OPGAVESIDE_STØRRELSE))
+
+    async def _hent_borgeropgaveside(self, body: dict) -> dict:
+        response = await self._client.post("/tasks/citizen", json=body, idempotent=True)
+        response.raise_for_status()
+        return response.json()
+
+    async def hent_opgaver_på_virksomhed(self, virksomhedsid:str) -> list[dict] | None:
+        antal_hentet_opgaver = 150
+        json_skabelon = _opgavesøgning("productionUnitId", virksomhedsid, 0, antal_hentet_opgaver)
+
+        async def hent_side(body: dict) -> Optional[dict]:
+            response = await self._client.post("/tasks/company", json=body, idempotent=True)
+            if response.status_code == 404:
+                return None
+            return response.json()
+
+        # Sikkerhedstjek på mere end 20 sider (side_nummer 0-21)
+        return await afetch_all(hent_side, json_skabelon, PageNumberPaging(antal_hentet_opgaver), max_pages=22)
+
+    async def opdater_opgave_status(self, opgaveid: str, status: Status) -> dict:
+        """Ændre status på en opgave."""
+        endpoint = f"tasks/{opgaveid}/{status.value}"
+
+        response = await self._client.put(endpoint)
+
+        if response.status_code == 400:
+            raise Exception("Fejl, kunne ikke ændre status")
+
+        return response.json()
+
+    async def søg_borger_opgaver(self, søge_filtre: dict, side_størrelse: int = 100) -> list[dict]:
+        """
+        Søg efter opgaver for en given borger.
+
+        :param søge_filtre: Dictionary med filtre for søgningen
+        :param side_størrelse: Antal opgaver pr. side
+        :return: Liste af opgaver som dictionaries
+        """
+        return await afetch_all(self._hent_borgeropgaveside, søge_filtre, PageNumberPaging(side_størrelse))
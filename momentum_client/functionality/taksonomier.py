@@ -1,9 +1,9 @@
 from typing import Optional
-from momentum_client.client import MomentumClient
+from momentum_client.client import MomentumClient, AsyncMomentumClient, SubClient
 from typing import Optional, List
 
 
-class TaksonomierClient:
+class TaksonomierClient(SubClient):
     def __init__(self, client: MomentumClient):
         self._client = client
     
@@ -23,4 +23,27 @@ class TaksonomierClient:
         if response.status_code == 404:
             return None
         
-        return response.json()
\ No newline at end of file
+        return response.json()
+
+
+class AsyncTaksonomierClient(SubClient):
+    def __init__(self, client: AsyncMomentumClient):
+        self._client = client
+    
+    async def hent_alle_taksonomier(self) -> dict:
+        endpoint = f"/taxonomies"
+
+        response = await self._client.get(endpoint)
+
+        return response.json()
+
+
+    async def find_taksonomi_gruppe(self, taxanomi_kode:str) -> Optional[dict]:
+        endpoint = f"/taxonomies/{taxanomi_kode}"
+
+        response = await self._client.get(endpoint)
+
+        if response.status_code == 404:
+            return None
+        
+        return response.json()
@@ -1,9 +1,20 @@
 from typing import Optional
-from momentum_client.client import MomentumClient
-from typing import Optional, List
+from momentum_client.client import MomentumClient, AsyncMomentumClient, SubClient
+from momentum_client.pagination import PageNumberPaging, afetch_all, aiter_items, fetch_all, iter_items
+from typing import AsyncIterator, Iterator, Optional, List
 
+# Sikkerhedstjek på mere end 110 sider (sideindex 0-111)
+_MAKS_VIRKSOMHEDSSIDER = 112
 
-class VirksomhederClient:
+
+def _virksomhedssøgning(filters: List[dict], søgeterm: str) -> dict:
+    return {
+        "filters": filters,
+        "term": søgeterm
+    }
+
+
+class VirksomhederClient(SubClient):
     def __init__(self, client: MomentumClient):
         self._client = client
 
@@ -13,46 +24,30 @@ class VirksomhederClient:
         
         :param filters: Dictionary of filters to apply (optional)
         :param søgeterm: Search term to filter production units. Default is * ("alle")
-        :param pagenumber: Page number for pagination. Default is 0
-        :param pagesize: Number of items per page. Default is 1000
         :return: List of production units matching the criteria or None if not found
         """
-        endpoint = "punits/searchproductionunits"
-        sideindex = 0
-        virksomheder = []
-        has_more = True
-        
-        while has_more:
-            # Klargør body
-            body = {
-                "paging": {
-                    "pageNumber": sideindex,
-                    "pageSize": 6000
-                },
-                
-                "filters": filters,
-                "term": søgeterm
-            }
-            
-            response = self._client.post(endpoint, json=body)
-            
-            if response.status_code == 404:
-                return None
-            
-            data = response.json()
-            
-            # Tilføj resultaterne til listen
-            if data is not None:
-                virksomheder.extend(data['data'])
-            
-            # Tjek om der er flere sider, sikkerhedstjek på mere end 110 sider
-            if data['hasMore'] == False or sideindex > 110:
-                has_more = False
-            
-            # Inkrementer sideindex for næste kald
-            sideindex += 1
-        
+        virksomheder = fetch_all(self._hent_virksomhedsside, _virksomhedssøgning(filters, søgeterm), PageNumberPaging(6000), max_pages=_MAKS_VIRKSOMHEDSSIDER)
+        if virksomheder is None:
+            return None
+
         return {'data': virksomheder}
+
+    def iter_virksomheder(self, filters: List[dict], søgeterm: str = "*") -> Iterator[dict]:
+        """
+        Som hent_virksomheder, men giver virksomhederne én side ad gangen mens næste side hentes i baggrunden.
+        Bruges til store udtræk - der holdes højst ca. to sider i hukommelsen.
+
+        :param filters: Dictionary of filters to apply (optional)
+        :param søgeterm: Search term to filter production units. Default is * ("alle")
+        :return: Iterator over production units matching the criteria
+        """
+        return iter_items(self._hent_virksomhedsside, _virksomhedssøgning(filters, søgeterm), PageNumberPaging(6000), max_pages=_MAKS_VIRKSOMHEDSSIDER)
+
+    def _hent_virksomhedsside(self, body: dict) -> Optional[dict]:
+        response = self._client.post("punits/searchproductionunits", json=body, idempotent=True)
+        if response.status_code == 404:
+            return None
+        return response.json()
     
     def hent_virksomheder_med_cvr(self, cvr: str) -> Optional[dict]:
         """
@@ -246,4 +241,217 @@ class VirksomhederClient:
 
         response = self._client.put(endpoint, opdateret_sagsbehandlere)
 
-        return response.json()
\ No newline at end of file
+        return response.json()
+
+
+class AsyncVirksomhederClient(SubClient):
+    def __init__(self, client: AsyncMomentumClient):
+        self._client = client
+
+    async def hent_virksomheder(self, filters: List[dict], søgeterm: str = "*") -> Optional[dict]:
+        """
+        Hent virksomheder med angivne filtre og søgeterm.
+        
+        :param filters: Dictionary of filters to apply (optional)
+        :param søgeterm: Search term to filter production units. Default is * ("alle")
+        :return: List of production units matching the criteria or None if not found
+        """
+        virksomheder = await afetch_all(self._hent_virksomhedsside, _virksomhedssøgning(filters, søgeterm), PageNumberPaging(6000), max_pages=_MAKS_VIRKSOMHEDSSIDER)
+        if virksomheder is None:
+            return None
+
+        return {'data': virksomheder}
+
+    def iter_virksomheder(self, filters: List[dict], søgeterm: str = "*") -> AsyncIterator[dict]:
+        """
+        Som hent_virksomheder, men giver virksomhederne én side ad gangen mens næste side hentes i baggrunden.
+        Bruges til store udtræk - der holdes højst ca. to sider i hukommelsen.
+
+        :param filters: Dictionary of filters to apply (optional)
+        :param søgeterm: Search term to filter production units. Default is * ("alle")
+        :return: Async iterator over production units matching the criteria
+        """
+        return aiter_items(self._hent_virksomhedsside, _virksomhedssøgning(filters, søgeterm), PageNumberPaging(6000), max_pages=_MAKS_VIRKSOMHEDSSIDER)
+
+    async def _hent_virksomhedsside(self, body: dict) -> Optional[dict]:
+        response = await self._client.post("punits/searchproductionunits", json=body, idempotent=True)
+        if response.status_code == 404:
+            return None
+        return response.json()
+    
+    async def hent_virksomheder_med_cvr(self, cvr: str) -> Optional[dict]:
+        """
+        Hent virksomhedser med angivet CVR-nummer.
+        
+        :param cvr: CVR-nummer for virksomheden
+        :return: Company information or None if not found
+        """
+        response = await self._client.get(f"/companies/{cvr}")
+        
+        if response.status_code == 404:
+            return None
+        
+        return response.json()
+    
+    async def hent_virksomhed_med_cvr_og_pnummer(self, cvr: str, pNummer: str) -> Optional[dict]:
+        """
+        Hent virksomhedsoplysninger på virksomhed der matcher angivet cvr og pnummer.
+        
+        :param cvr: CVR-nummer for virksomheden
+        :return: Company information or None if not found
+        """
+        response = await self._client.get(f"/companies/{cvr}/productionunits/{pNummer}")
+        
+        if response.status_code == 404:
+            return None
+        
+        return response.json()
+    
+    async def find_borgere_i_tilbud_på_virksomhed(self, virksomhedsid: str, filters: dict = None, søgeterm: str = ""):
+        """
+        Find borgere (citizens) in tilbud (offers/placements) at a specific virksomhed (company).
+        
+        :param virksomhedsid: Production unit ID for the company
+        :param filters: List of filter dictionaries with fieldName, values, etc.
+        :param søgeterm: Search term
+        :return: Search results or None if not found
+        """
+        endpoint = f"/placements/productionUnit/{virksomhedsid}/search"
+        body = {
+            "term": søgeterm or "",
+            "filters": filters or [],
+        }
+        
+        response = await self._client.post(endpoint, json=body)
+        
+        if response.status_code == 404:
+            return None
+            
+        return response.json()
+    
+    async def find_jobordre_på_virksomhed(self, virksomhedsid: str, filters: dict = None, søgeterm: str = ""):
+        """
+        Find jobordre (job orders/recruitments) at a specific virksomhed (company).
+        
+        :param virksomhedsid: Production unit ID for the company
+        :param filters: List of filter dictionaries with fieldName, values, etc.
+        :param søgeterm: Search term
+        :return: Search results or None if not found
+        """
+        request_filters = filters.copy() if filters else []
+        
+        # Add the required providerId filter
+        request_filters.append({
+            "values": [virksomhedsid],
+            "fieldName": "providerId"
+        })
+        
+        body = {
+            "term": søgeterm or "",
+            "filters": request_filters
+        }
+        
+        response = await self._client.post("/companyrecruitmentsearch", json=body)
+        
+        if response.status_code == 404:
+            return None
+            
+        return response.json()
+
+    async def søg_virksomhed_med_p_nummer(self, pnummer: str) -> Optional[dict]:
+        """
+        Hent virksomhedsoplysninger baseret på P-nummer.
+        
+        :param pnummer: P-nummer for virksomheden
+        :return: Company information or None if not found
+        """
+        body = {"term": pnummer, 
+                "size": 15, 
+                "skip": 0, 
+                "allowedCategories": 
+                    ["Citizen", "Company", "ContactPerson", "Caseworker", "Offer", "JobOrder", "JobAd", "Course"], 
+                "parentId": None,
+                "isActive": True,
+                "hasUserId": None,
+                "isPhoneNumbersOnly": None,
+                "includeInternalUsers": False
+            }
+
+        response = await self._client.post("/search", json=body)
+        
+        if response.status_code == 404:
+            return None
+
+        return response.json()
+    
+    async def hent_virksomheds_kontaktpersoner(self, virksomhedsId: str, søgeterm = "", sidetal_resultater: int = 1, antal_resultater: int = 999999, kun_active = True) -> Optional[dict]:
+        """
+        Hent kontaktpersoner for en given virksomhed baseret på virksomhedsId.
+        
+        :param virksomhedsId: ID for virksomheden
+        :return: List of contact persons or None if not found
+        """
+        endpoint = f"/punits/{virksomhedsId}/contactpersons?&pageNumber={sidetal_resultater}&pageSize={antal_resultater}"
+        body = {
+            "searchText": søgeterm,
+            "pageNumber": sidetal_resultater,
+            "pageSize": antal_resultater,
+            "onlyActive": kun_active
+        }
+
+        response = await self._client.post(endpoint, json=body)
+
+        if response.status_code == 404:
+            return None
+        
+        return response.json()
+    
+    async def hent_virksomheds_sagsbehandlere(self, virksomhedsId: str, søgeterm = "", sidetal_resultater: int = 1, antal_resultater: int = 999999, kun_active = True) -> Optional[dict]:
+        """
+        Hent sagsbehandlere for en given virksomhed baseret på virksomhedsId.
+        
+        :param virksomhedsId: ID for virksomheden
+        :return: List of caseworkers or None if not found
+        """
+        endpoint = f"/punits/{virksomhedsId}/caseworkers?&pageNumber={sidetal_resultater}&pageSize={antal_resultater}"
+        body = {
+            "searchText": søgeterm,
+            "pageNumber": sidetal_resultater,
+            "pageSize": antal_resultater,
+            "onlyActive": kun_active
+        }
+
+        response = await self._client.post(endpoint, json=body)
+
+        if response.status_code == 404:
+            return None
+        
+        return response.json()
+    
+    async def ændr_kontaktpersons_status(self, kontaktpersonId: str, status = False) -> bool:
+        """
+        Ændr status for en kontaktperson baseret på kontaktpersonId.
+
+        :param kontaktpersonId: ID for kontaktpersonen
+        :return: True if successful, False otherwise
+        """
+        endpoint = f"/employees/{kontaktpersonId}/status/{str(status).lower()}"
+
+        response = await self._client.post(endpoint)
+
+        return response.status_code == 200
+    
+    async def hent_en_virksomheds_overblik(self, virksomhedsId:str) -> Optional[dict]:
+        response = await self._client.get(f"/punits/{virksomhedsId}")
+
+        if response.status_code == 404:
+            return None
+
+        return response.json()
+    
+    async def opdater_sagsbehandlere_på_overblik(self, virksomhedsId: str, opdateret_sagsbehandlere: dict) -> dict:
+        endpoint = f"/punits/{virksomhedsId}/responsiblecaseworkers"
+
+        response = await self._client.put(endpoint, opdateret_sagsbehandlere)
+
+        return response.json()
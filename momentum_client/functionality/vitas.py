@@ -1,8 +1,23 @@
-from typing import Optional, List
-from momentum_client.client import MomentumClient
+from typing import AsyncIterator, Iterator, Optional, List
+from momentum_client.client import MomentumClient, AsyncMomentumClient, SubClient
+from momentum_client.pagination import PageNumberPaging, afetch_all, aiter_items, fetch_all, iter_items
 
 
-class VitasClient:
+def _vitassøgning(søgeterm: str, filters: Optional[List[dict]]) -> dict:
+    term = søgeterm or "*"
+    if not term.endswith("*"):
+        term = term + "* "
+    return {
+        "sort": [{"fieldName": "title", "ascending": False}],
+        "columns": [],
+        "searchFields": ["type"],
+        "filters": filters or [],
+        "term": term,
+        "impersonateCaseworkerId": None
+    }
+
+
+class VitasClient(SubClient):
     def __init__(self, client: MomentumClient):
         self._client = client
 
@@ -14,33 +29,23 @@ class VitasClient:
         :param filters: Liste af filtre der skal anvendes. Standard er ingen filtre.
         :return: Liste af VITAS-poster eller None hvis ikke fundet
         """
-        endpoint = "/vitas/searchvitas"
-        all_data = []
-        page_number = 0
-        has_more = True
-
-        while has_more:
-            term = søgeterm or "*"
-            if not term.endswith("*"):
-                term = term + "* "
-            body = {
-                "sort": [{"fieldName": "title", "ascending": False}],
-                "paging": {"pageNumber": page_number, "pageSize": 1000},
-                "columns": [],
-                "searchFields": ["type"],
-                "filters": filters or [],
-                "term": term,
-                "impersonateCaseworkerId": None
-            }
-            response = self._client.post(endpoint, json=body)
-            if response.status_code == 404:
-                return None
-            data = response.json()
-            all_data.extend(data.get("data", []))
-            has_more = data.get("hasMore", False)
-            page_number += 1
-
-        return all_data
+        return fetch_all(self._hent_vitasside, _vitassøgning(søgeterm, filters), PageNumberPaging(1000))
+
+    def iter_vitas(self, søgeterm: str = "*", filters: List[dict] = None) -> Iterator[dict]:
+        """
+        Som hent_vitas, men giver VITAS-posterne én side ad gangen mens næste side hentes i baggrunden.
+
+        :param søgeterm: Søgeterm til filtrering. Standard er * ("alle")
+        :param filters: Liste af filtre der skal anvendes. Standard er ingen filtre.
+        :return: Iterator over VITAS-poster
+        """
+        return iter_items(self._hent_vitasside, _vitassøgning(søgeterm, filters), PageNumberPaging(1000))
+
+    def _hent_vitasside(self, body: dict) -> Optional[dict]:
+        response = self._client.post("/vitas/searchvitas", json=body, idempotent=True)
+        if response.status_code == 404:
+            return None
+        return response.json()
 
     def hent_vita(self, id: str, type: str = "personalassistance" ) -> Optional[dict]:
         """
@@ -54,4 +59,49 @@ class VitasClient:
         response = self._client.get(endpoint)
         if response.status_code == 404:
             return None
-        return response.json()
\ No newline at end of file
+        return response.json()
+
+
+class AsyncVitasClient(SubClient):
+    def __init__(self, client: AsyncMomentumClient):
+        self._client = client
+
+    async def hent_vitas(self, søgeterm: str = "*", filters: List[dict] = None) -> Optional[List[dict]]:
+        """
+        Hent VITAS-poster med angivet søgeterm og filtre.
+
+        :param søgeterm: Søgeterm til filtrering. Standard er * ("alle")
+        :param filters: Liste af filtre der skal anvendes. Standard er ingen filtre.
+        :return: Liste af VITAS-poster eller None hvis ikke fundet
+        """
+        return await afetch_all(self._hent_vitasside, _vitassøgning(søgeterm, filters), PageNumberPaging(1000))
+
+    def iter_vitas(self, søgeterm: str = "*", filters: List[dict] = None) -> AsyncIterator[dict]:
+        """
+        Som hent_vitas, men giver VITAS-posterne én side ad gangen mens næste side hentes i baggrunden.
+
+        :param søgeterm: Søgeterm til filtrering. Standard er * ("alle")
+        :param filters: Liste af filtre der skal anvendes. Standard er ingen filtre.
+        :return: Async iterator over VITAS-poster
+        """
+        return aiter_items(self._hent_vitasside, _vitassøgning(søgeterm, filters), PageNumberPaging(1000))
+
+    async def _hent_vitasside(self, body: dict) -> Optional[dict]:
+        response = await self._client.post("/vitas/searchvitas", json=body, idempotent=True)
+        if response.status_code == 404:
+            return None
+        return response.json()
+
+    async def hent_vita(self, id: str, type: str = "personalassistance" ) -> Optional[dict]:
+        """
+        Hent en specifik VITAS-bevilling baseret på ID.
+
+        :param id: ID for den ønskede VITAS-bevilling
+        :param type: Type af VITAS-bevilling (standard er "personalassistance")
+        :return: VITAS-bevilling som dict eller None hvis ikke fundet
+        """
+        endpoint = f"/vitas/{type}/{id}"
+        response = await self._client.get(endpoint)
+        if response.status_code == 404:
+            return None
+        return response.json()
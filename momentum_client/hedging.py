@@ -0,0 +1,237 @@
+"""
+Hedged requests for single-resource GETs.
+
+A few slow responses dominate workflows that look up one resource after the
+other (citizens/{id}, actors/{id}/details, punits/{id}, ...). HedgingTransport
+keeps the recent latencies of each endpoint template, and when a GET has not
+answered by their p95, sends the same request once more and returns whichever
+response arrives first. The other one is cancelled (async) or closed as soon as
+it completes (sync, where a running request cannot be interrupted).
+
+A sync request that runs in the caller's thread cannot be abandoned when its
+hedge answers first, so the sync transport sends a request from its thread pool
+only when a hedge could be sent for it. Requests that cannot be hedged - no
+latencies yet, the budget is used up, or the deadline or timeout of the request
+ends before the hedge would be sent - are sent inline.
+
+Hedges draw from a budget of a small fraction of the requests, so they add
+little load - and only when the API is slow for a few calls, not for all.
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Optional
+
+import httpx
+
+from .circuit import endpoint_template
+from .deadline import DEADLINE
+from .retry import RetryBudget
+
+logger = logging.getLogger(__name__)
+
+
+def _hedge_budget() -> RetryBudget:
+    return RetryBudget(ratio=0.05, min_per_second=0.0, capacity=5.0)
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """
+    When a GET is hedged.
+
+    Args:
+        percentile: Send the hedge when the first attempt is slower than this percentile of recent latencies
+        min_delay: Never hedge sooner than this many seconds
+        min_samples: Latencies needed for an endpoint before its requests are hedged
+        sample_size: Recent latencies kept per endpoint
+        methods: Methods that are hedged - only idempotent ones are safe
+        budget: Hedges allowed per request (default: at most one hedge per 20 requests)
+    """
+
+    percentile: float = 0.95
+    min_delay: float = 0.05
+    min_samples: int = 20
+    sample_size: int = 200
+    methods: frozenset[str] = frozenset({"GET"})
+    budget: RetryBudget = field(default_factory=_hedge_budget, compare=False)
+
+
+class LatencyTracker:
+    """Recent latencies per endpoint template. Thread-safe."""
+
+    def __init__(self, sample_size: int) -> None:
+        self.sample_size = sample_size
+        self._samples: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, template: str, latency: float) -> None:
+        with self._lock:
+            samples = self._samples.get(template)
+            if samples is None:
+                samples = self._samples[template] = deque(maxlen=self.sample_size)
+            samples.append(latency)
+
+    def percentile(self, template: str, percentile: float, min_samples: int) -> Optional[float]:
+        """The `percentile` of the recent latencies, or None with fewer than `min_samples`."""
+        with self._lock:
+            samples = sorted(self._samples.get(template, ()))
+        if not samples or len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, math.ceil(percentile * len(samples)) - 1)]
+
+
+class _Hedging:
+    """Decisions shared by the sync and async transports."""
+
+    def __init__(self, policy: HedgePolicy) -> None:
+        self.policy = policy
+        self.latencies = LatencyTracker(policy.sample_size)
+
+    def delay(self, request: httpx.Request, template: str) -> Optional[float]:
+        """Seconds to wait before hedging `request`, or None if it is not hedged."""
+        if request.method not in self.policy.methods:
+            return None
+        self.policy.budget.record_request()
+        p = self.latencies.percentile(template, self.policy.percentile, self.policy.min_samples)
+        return None if p is None else max(self.policy.min_delay, p)
+
+    def could_hedge(self, request: httpx.Request, delay: float) -> bool:
+        """Whether a hedge could still be sent for `request` after `delay`, without spending the budget."""
+        if not self.policy.budget.available():
+            return False
+        limits = [request.extensions.get("timeout", {}).get("read")]
+        deadline = request.extensions.get(DEADLINE)
+        if deadline is not None:
+            limits.append(deadline - time.monotonic())
+        return all(limit is None or limit > delay for limit in limits)
+
+    def may_hedge(self, request: httpx.Request, delay: float) -> bool:
+        if not self.policy.budget.try_spend():
+            return False
+        logger.debug("Sender ekstra %s %s efter %.3f sekunder uden svar", request.method, request.url, delay)
+        return True
+
+
+class HedgingTransport(httpx.BaseTransport):
+    """
+    Transport that hedges slow requests to the wrapped transport according to a HedgePolicy.
+
+    Hedged requests are sent from a thread pool of up to `max_workers`
+    threads, which should be at least the number of concurrent requests.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, policy: HedgePolicy, max_workers: int = 100) -> None:
+        self._transport = transport
+        self._hedging = _Hedging(policy)
+        self._max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def latencies(self) -> LatencyTracker:
+        return self._hedging.latencies
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        template = endpoint_template(request.url.path)
+        delay = self._hedging.delay(request, template)
+        if delay is None or not self._hedging.could_hedge(request, delay):
+            return self._send(request, template)
+
+        pool = self._get_pool()
+        attempts = [pool.submit(self._send, request, template)]
+        done, _ = wait(attempts, timeout=delay)
+        if not done and self._hedging.may_hedge(request, delay):
+            attempts.append(pool.submit(self._send, request, template))
+
+        pending = set(attempts)
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((future for future in done if future.exception() is None), None)
+            if winner is not None or not pending:
+                break
+        for future in attempts:
+            if future is not winner:
+                future.add_done_callback(_close_response)
+        if winner is None:
+            # All attempts failed - raise the error of the first
+            return attempts[0].result()
+        return winner.result()
+
+    def _send(self, request: httpx.Request, template: str) -> httpx.Response:
+        start = time.monotonic()
+        response = self._transport.handle_request(request)
+        self._hedging.latencies.record(template, time.monotonic() - start)
+        return response
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="momentum-hedge")
+            return self._pool
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+        self._transport.close()
+
+
+def _close_response(future: Future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+class AsyncHedgingTransport(httpx.AsyncBaseTransport):
+    """Async version of HedgingTransport. The losing attempt is cancelled."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, policy: HedgePolicy) -> None:
+        self._transport = transport
+        self._hedging = _Hedging(policy)
+
+    @property
+    def latencies(self) -> LatencyTracker:
+        return self._hedging.latencies
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        template = endpoint_template(request.url.path)
+        delay = self._hedging.delay(request, template)
+        if delay is None or not self._hedging.could_hedge(request, delay):
+            return await self._send(request, template)
+
+        attempts = [asyncio.create_task(self._send(request, template))]
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if not done and self._hedging.may_hedge(request, delay):
+                attempts.append(asyncio.create_task(self._send(request, template)))
+
+            pending = set(attempts)
+            winner = None
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), None)
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+        for task in attempts:
+            if task is not winner and task.done() and not task.cancelled() and task.exception() is None:
+                await task.result().aclose()
+        if winner is None:
+            return attempts[0].result()
+        return winner.result()
+
+    async def _send(self, request: httpx.Request, template: str) -> httpx.Response:
+        start = time.monotonic()
+        response = await self._transport.handle_async_request(request)
+        self._hedging.latencies.record(template, time.monotonic() - start)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -6,75 +6,332 @@ event hook system to add cross-cutting concerns like logging and error handling
 to the Momentum client.
 """
 
-import json
+import functools
 import logging
+import random
 import httpx
 
-from typing import Callable, Optional, Any
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, Any
+
+from .codec import JsonCodec, decode_response, get_codec, use_codec
+from .log_worker import LogWorker, QueuePolicy
+
+# Request extension that keeps a request out of the transaction log (e.g. connection warmup)
+SKIP_LOGGING = "momentum_client.skip_logging"
+
+DEFAULT_MAX_PAYLOAD_BYTES = 1024 * 1024
+
+DEFAULT_REDACT_KEYS = frozenset({
+    "access_token", "refresh_token", "id_token", "client_secret", "password", "apikey", "api_key",
+})
+REDACTED = "***"
+
+
+@dataclass(frozen=True)
+class LogConfig:
+    """
+    Settings for the HTTP transaction log.
+
+    Args:
+        max_payload_bytes: Request and response bodies larger than this are not
+            parsed and logged (None: no limit)
+        payload_sample_rate: Fraction of successful transactions that are logged
+            with their bodies. Failed transactions always include them.
+        background: Parse, redact and emit the log records on a background
+            thread instead of in the response hook
+        queue_size: Maximum number of records waiting for the background thread
+        queue_policy: "drop" records when the queue is full, or "block" the
+            request until there is room
+        redact_keys: JSON keys (lower case) whose values are replaced with REDACTED
+    """
+
+    max_payload_bytes: Optional[int] = DEFAULT_MAX_PAYLOAD_BYTES
+    payload_sample_rate: float = 1.0
+    background: bool = False
+    queue_size: int = 10_000
+    queue_policy: QueuePolicy = "drop"
+    redact_keys: frozenset[str] = DEFAULT_REDACT_KEYS
+
+    def create_worker(self) -> Optional[LogWorker]:
+        """Background worker for this configuration, or None when logging on the request path."""
+        return LogWorker(self.queue_size, self.queue_policy) if self.background else None
+
 
 def create_response_logging_hook(
     logger: Optional[logging.Logger] = None,
+    config: Optional[LogConfig] = None,
+    worker: Optional[LogWorker] = None,
+    codec: Optional[JsonCodec] = None,
 ) -> Callable[[httpx.Response], None]:
     """
     Create response logging hook for this object that captures HTTP transactions.
 
+    Bodies are only read and parsed when a handler will receive the record, and
+    the parsed response body is reused by response.json().
+
     Args:
         logger: Logger instance to use (defaults to module logger)
+        config: Payload size, sampling and background settings (defaults to LogConfig())
+        worker: Background worker to use when config.background is set
+            (defaults to a new worker)
+        codec: JSON codec used to parse the bodies (defaults to get_codec())
 
     Returns:
         Response hook function
     """
     if logger is None:
         logger = logging.getLogger(__name__)
+    if config is None:
+        config = LogConfig()
+    if worker is None:
+        worker = config.create_worker()
+    if codec is None:
+        codec = get_codec()
 
     def log_response(response: httpx.Response) -> None:
         """Log complete HTTP transaction from response."""
-        request = response.request
-        method = request.method
-        url = str(request.url)
-        status = response.status_code
-
-        # Extract request JSON if available
-        request_json = None
-        try:
-            if hasattr(request, "content") and request.content:
-                request_json = _parse_json_content(request.content)
-        except Exception:
-            # Request content not available or not readable
-            request_json = None
-
-        # Always extract response JSON (for debugging API responses)
-        response_json = None
-        try:
-            # Force read the response if it hasn't been read yet
-            if not hasattr(response, '_content'):
+        level = _log_level(logger, response)
+        if level is None:
+            return
+
+        payload_omitted = _payload_omitted(logger, level, config)
+        if payload_omitted is None:
+            try:
+                # Force read the response if it hasn't been read yet
                 response.read()
-            response_json = _parse_json_content(response.text)
-        except Exception:
-            # Response content not available or not readable
-            response_json = None
-
-        # Build complete log entry
-        extra = {
-            "event_type": "http_transaction",
-            "http_method": method,
-            "http_url": url,
-            "http_status": status,
-            "request_json": request_json,
-            "response_json": response_json,
-            "is_error": response.is_error,
-        }
-
-        # Log with appropriate level
-        if response.is_error:
-            logger.error(f"HTTP {status}: {method} {url}", extra=extra)
+            except Exception:
+                # Response content not available or not readable
+                payload_omitted = "unreadable"
+
+        transaction = _capture(level, response, config, payload_omitted)
+        if worker is not None:
+            worker.submit(functools.partial(_emit, logger, transaction, config, codec))
         else:
-            logger.info(f"HTTP {status}: {method} {url}", extra=extra)
+            _emit(logger, transaction, config, codec, response)
 
     return log_response
 
 
-def _parse_json_content(content: Any) -> Optional[Any]:
+def create_async_response_logging_hook(
+    logger: Optional[logging.Logger] = None,
+    config: Optional[LogConfig] = None,
+    worker: Optional[LogWorker] = None,
+    codec: Optional[JsonCodec] = None,
+) -> Callable[[httpx.Response], Awaitable[None]]:
+    """
+    Create response logging hook for use with an httpx.AsyncClient.
+
+    The response body is read asynchronously, when it is needed, before the
+    transaction is logged by the same logic as the synchronous hook.
+
+    Args:
+        logger: Logger instance to use (defaults to module logger)
+        config: Payload size, sampling and background settings (defaults to LogConfig())
+        worker: Background worker to use when config.background is set
+            (defaults to a new worker)
+        codec: JSON codec used to parse the bodies (defaults to get_codec())
+
+    Returns:
+        Async response hook function
+    """
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    if config is None:
+        config = LogConfig()
+    if worker is None:
+        worker = config.create_worker()
+    if codec is None:
+        codec = get_codec()
+
+    async def log_response_async(response: httpx.Response) -> None:
+        """Read the response body and log the complete HTTP transaction."""
+        level = _log_level(logger, response)
+        if level is None:
+            return
+
+        payload_omitted = _payload_omitted(logger, level, config)
+        if payload_omitted is None:
+            try:
+                await response.aread()
+            except Exception:
+                # Response content not available or not readable
+                payload_omitted = "unreadable"
+
+        transaction = _capture(level, response, config, payload_omitted)
+        if worker is not None:
+            await worker.asubmit(functools.partial(_emit, logger, transaction, config, codec))
+        else:
+            _emit(logger, transaction, config, codec, response)
+
+    return log_response_async
+
+
+def decode_json(response: httpx.Response, codec: Optional[JsonCodec] = None) -> Optional[Any]:
+    """
+    Parse the JSON body of a read response once.
+
+    The parsed body is cached on the response, and response.json() returns it
+    instead of parsing the body again. Returns None if the body is not JSON.
+    """
+    if not response.content:
+        return None
+    codec = codec or get_codec()
+    try:
+        decoded = decode_response(response, codec)
+    except ValueError:
+        # Includes UnicodeDecodeError
+        return None
+    use_codec(response, codec)
+    return decoded
+
+
+def _log_level(logger: logging.Logger, response: httpx.Response) -> Optional[int]:
+    """Level the transaction is logged at, or None if it is not logged at all."""
+    if response.request.extensions.get(SKIP_LOGGING):
+        return None
+    level = logging.ERROR if response.is_error else logging.INFO
+    return level if logger.isEnabledFor(level) else None
+
+
+def _has_handler_for(logger: logging.Logger, level: int) -> bool:
+    """Whether any handler on the logger or its ancestors accepts records at `level`."""
+    current: Optional[logging.Logger] = logger
+    while current is not None:
+        if any(level >= handler.level for handler in current.handlers):
+            return True
+        if not current.propagate:
+            break
+        current = current.parent
+    return False
+
+
+def _payload_omitted(logger: logging.Logger, level: int, config: LogConfig) -> Optional[str]:
+    """Why request and response bodies should not be parsed and logged, or None if they should."""
+    if not _has_handler_for(logger, level):
+        # Only logging.lastResort would see the record, and it discards the payload
+        return "no_receiver"
+    if level < logging.ERROR and config.payload_sample_rate < 1.0 and random.random() >= config.payload_sample_rate:
+        return "sampled"
+    return None
+
+
+def _within_limit(size: int, config: LogConfig) -> bool:
+    return config.max_payload_bytes is None or size <= config.max_payload_bytes
+
+
+@dataclass
+class _Transaction:
+    """What is needed to log a transaction - only references, so it is cheap to capture."""
+
+    level: int
+    method: str
+    url: str
+    status: int
+    is_error: bool
+    request_body: Optional[bytes] = None
+    response_body: Optional[bytes] = None
+    payload_omitted: Optional[str] = None
+
+
+def _capture(level: int, response: httpx.Response, config: LogConfig, payload_omitted: Optional[str]) -> _Transaction:
+    request = response.request
+    transaction = _Transaction(
+        level=level,
+        method=request.method,
+        url=str(request.url),
+        status=response.status_code,
+        is_error=response.is_error,
+    )
+    if payload_omitted is not None:
+        transaction.payload_omitted = payload_omitted
+        return transaction
+
+    # Extract request body if available
+    try:
+        if request.content and _within_limit(len(request.content), config):
+            transaction.request_body = request.content
+    except Exception:
+        # Request content not available or not readable
+        pass
+
+    if _within_limit(len(response.content), config):
+        transaction.response_body = response.content
+    else:
+        transaction.payload_omitted = "size"
+    return transaction
+
+
+def _emit(
+    logger: logging.Logger,
+    transaction: _Transaction,
+    config: LogConfig,
+    codec: JsonCodec,
+    response: Optional[httpx.Response] = None,
+) -> None:
+    """
+    Parse, redact and log a captured transaction.
+
+    When `response` is given (logging on the request path) the response body is
+    parsed once and shared with response.json(). The background worker parses
+    its own copy instead, so it never races with the caller.
+    """
+    request_json = _parse_json_content(transaction.request_body, codec)
+    if transaction.response_body is None:
+        response_json = None
+    elif response is not None:
+        response_json = decode_json(response, codec)
+    else:
+        response_json = _parse_json_content(transaction.response_body, codec)
+
+    # Build complete log entry
+    extra = {
+        "event_type": "http_transaction",
+        "http_method": transaction.method,
+        "http_url": transaction.url,
+        "http_status": transaction.status,
+        "request_json": _redact(request_json, config.redact_keys),
+        "response_json": _redact(response_json, config.redact_keys),
+        "payload_omitted": transaction.payload_omitted,
+        "is_error": transaction.is_error,
+    }
+
+    logger.log(
+        transaction.level,
+        f"HTTP {transaction.status}: {transaction.method} {transaction.url}",
+        extra=extra,
+    )
+
+
+def _redact(value: Any, keys: frozenset[str]) -> Any:
+    """
+    Replace the values of sensitive keys with REDACTED.
+
+    Containers are only copied when something in them is redacted, so the
+    parsed body shared with response.json() is never modified.
+    """
+    if isinstance(value, dict):
+        redacted = None
+        for key, item in value.items():
+            new = REDACTED if isinstance(key, str) and key.lower() in keys else _redact(item, keys)
+            if new is not item:
+                if redacted is None:
+                    redacted = dict(value)
+                redacted[key] = new
+        return value if redacted is None else redacted
+    if isinstance(value, list):
+        redacted = None
+        for index, item in enumerate(value):
+            new = _redact(item, keys)
+            if new is not item:
+                if redacted is None:
+                    redacted = list(value)
+                redacted[index] = new
+        return value if redacted is None else redacted
+    return value
+
+
+def _parse_json_content(content: Any, codec: JsonCodec) -> Optional[Any]:
     """
     Parse JSON content from request/response body.
 
@@ -83,15 +340,9 @@ def _parse_json_content(content: Any) -> Optional[Any]:
     if not content:
         return None
 
-    # Convert bytes to string if needed
-    if isinstance(content, bytes):
-        try:
-            content = content.decode("utf-8")
-        except UnicodeDecodeError:
-            return None
-
-    # Parse JSON
+    # The codecs detect the encoding of bytes themselves, so the body is not copied into a str first
     try:
-        return json.loads(content)
-    except (json.JSONDecodeError, ValueError):
+        return codec.loads(content)
+    except ValueError:
+        # Includes UnicodeDecodeError
         return None
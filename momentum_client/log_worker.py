@@ -0,0 +1,134 @@
+"""
+Background worker for the HTTP transaction log.
+
+With LogConfig(background=True) the response hook only puts a lightweight
+record on a bounded queue, and this worker parses, redacts and emits it on its
+own thread, so slow log handlers (files, SIEM forwarders) never delay a request.
+When the queue is full the record is either dropped ("drop") or the caller
+waits for room ("block").
+"""
+
+import asyncio
+import atexit
+import logging
+import queue
+import threading
+import weakref
+
+from typing import Callable, Literal
+
+logger = logging.getLogger(__name__)
+
+QueuePolicy = Literal["drop", "block"]
+
+_STOP = object()
+
+
+class LogWorker:
+    """
+    Thread that runs queued log emissions in order.
+
+    Args:
+        max_queue: Maximum number of records waiting to be emitted
+        policy: What to do when the queue is full - "drop" the record or "block" until there is room
+    """
+
+    def __init__(self, max_queue: int = 10_000, policy: QueuePolicy = "drop") -> None:
+        if policy not in ("drop", "block"):
+            raise ValueError(f"Ugyldig kø-politik: {policy}. Gyldige værdier er 'drop' og 'block'")
+        self.policy = policy
+        self.dropped = 0
+        self._unreported_drops = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+        # Emit what is queued when the interpreter exits, without keeping the worker alive
+        atexit.register(_close_at_exit, weakref.ref(self))
+
+    def submit(self, emit: Callable[[], None]) -> bool:
+        """Queue `emit` to run on the worker thread. Returns False if it was dropped."""
+        self._ensure_started()
+        if self.policy == "block":
+            self._queue.put(emit)
+            return True
+        try:
+            self._queue.put_nowait(emit)
+            return True
+        except queue.Full:
+            self._count_drop()
+            return False
+
+    async def asubmit(self, emit: Callable[[], None]) -> bool:
+        """Like submit, but waits for room in a thread so the event loop is never blocked."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(emit)
+            return True
+        except queue.Full:
+            if self.policy == "block":
+                await asyncio.to_thread(self._queue.put, emit)
+                return True
+            self._count_drop()
+            return False
+
+    def flush(self) -> None:
+        """Wait until everything queued so far has been emitted."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Emit what is queued and stop the worker thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("Logkøen kunne ikke tømmes inden for %s sekunder", timeout)
+            return
+        thread.join(timeout)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("LogWorker er lukket")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="momentum-client-log", daemon=True)
+                self._thread.start()
+
+    def _count_drop(self) -> None:
+        with self._lock:
+            self.dropped += 1
+            self._unreported_drops += 1
+
+    def _run(self) -> None:
+        while True:
+            emit = self._queue.get()
+            try:
+                if emit is _STOP:
+                    return
+                self._report_drops()
+                emit()
+            except Exception:
+                logger.exception("Fejl under logning af HTTP transaktion")
+            finally:
+                self._queue.task_done()
+
+    def _report_drops(self) -> None:
+        with self._lock:
+            drops, self._unreported_drops = self._unreported_drops, 0
+        if drops:
+            logger.warning("%d HTTP transaktioner blev ikke logget, fordi logkøen var fuld", drops)
+
+
+def _close_at_exit(ref: "weakref.ref[LogWorker]") -> None:
+    worker = ref()
+    if worker is not None:
+        worker.close()
@@ -5,15 +5,22 @@ This manager simplifies the instantiation of multiple clients by providing
 a single entry point with lazy-loaded properties for each functionality.
 """
 
-from typing import Optional
-from .client import MomentumClient
-from .functionality.borgere import BorgereClient
-from .functionality.virksomheder import VirksomhederClient
-from .functionality.markeringer import MarkeringerClient
-from .functionality.opgaver import OpgaverClient
-from .functionality.taksonomier import TaksonomierClient
-from .functionality.journalnotater import JournalnotaterClient
-from .functionality.vitas import VitasClient
+from typing import Any, ContextManager, Iterable, Optional
+from .client import MomentumClient, AsyncMomentumClient
+from .token_cache import FileTokenCache
+from .codec import JsonCodec
+from .cache import CacheConfig
+from .cpr_cache import CprCache
+from .session import Session, session_scope
+from .hooks import LogConfig
+from .transport import TransportConfig
+from .functionality.borgere import BorgereClient, AsyncBorgereClient
+from .functionality.virksomheder import VirksomhederClient, AsyncVirksomhederClient
+from .functionality.markeringer import MarkeringerClient, AsyncMarkeringerClient
+from .functionality.opgaver import OpgaverClient, AsyncOpgaverClient
+from .functionality.taksonomier import TaksonomierClient, AsyncTaksonomierClient
+from .functionality.journalnotater import JournalnotaterClient, AsyncJournalnotaterClient
+from .functionality.vitas import VitasClient, AsyncVitasClient
 
 
 class MomentumClientManager:
@@ -23,6 +30,9 @@ class MomentumClientManager:
     VIGTIGT: Brug altid denne manager i stedet for at oprette individuelle klienter.
     Dette sikrer korrekt konfiguration og lazy loading.
 
+    Oprettelse laver ingen netværkskald - tokenet hentes ved første forespørgsel,
+    eller på forhånd med warmup().
+
     Eksempel:
         momentum = MomentumClientManager(base_url="...", client_id="...", client_secret="...", api_key="...", resource="...")
         borger = momentum.borgere.hent_borger("1234567890")
@@ -37,7 +47,14 @@ class MomentumClientManager:
         client_secret: str,
         api_key: str,
         resource: str,
-        timeout: float = 60.0
+        timeout: float = 60.0,
+        token_cache: Optional[FileTokenCache] = None,
+        transport_config: Optional[TransportConfig] = None,
+        log_config: Optional[LogConfig] = None,
+        codec: str | JsonCodec = "auto",
+        cache_config: Optional[CacheConfig] = None,
+        coalesce: bool = False,
+        cpr_cache: Optional[CprCache] = None
     ):
         """
         Initialize the MomentumClientManager.
@@ -48,16 +65,31 @@ class MomentumClientManager:
             client_secret: The OAuth2 client secret
             api_key: The API key for authentication
             resource: The resource identifier
-            timeout: Request timeout in seconds (default: 60.0)
+            timeout: Read and write timeout in seconds (default: 60.0), ignored if transport_config is given
+            token_cache: Optional on-disk token cache shared by processes on this host
+            transport_config: Timeouts, connection pool, keep-alive and HTTP/2 settings
+            log_config: Payload size and sampling settings for the HTTP transaction log
+            codec: JSON codec - "auto" (orjson, then msgspec, then stdlib), "orjson", "msgspec", "stdlib" or a codec instance
+            cache_config: Cache reference data such as /tags and /taxonomies (None: no cache)
+            coalesce: Share one request and response between identical GETs in flight at the same time
+            cpr_cache: Remember the citizenId of CPR numbers, so hent_borger needs one request for known ones
         """
         self._base_url = base_url
         self._client_id = client_id
         self._client_secret = client_secret
         self._api_key = api_key
         self._resource = resource
+        self._token_cache = token_cache
 
         # Store configuration for lazy loading
-        self._config = {"timeout": timeout}
+        self._config = {
+            "transport_config": transport_config or TransportConfig.from_timeout(timeout),
+            "log_config": log_config,
+            "codec": codec,
+            "cache_config": cache_config,
+            "coalesce": coalesce,
+            "cpr_cache": cpr_cache,
+        }
 
         # Lazy-loaded clients
         self._momentum_client: Optional[MomentumClient] = None
@@ -69,6 +101,17 @@ class MomentumClientManager:
         self._journalnotater_client: Optional[JournalnotaterClient] = None
         self._vitas_client: Optional[VitasClient] = None
 
+    def __enter__(self) -> "MomentumClientManager":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Luk den underliggende MomentumClient, hvis den er oprettet."""
+        if self._momentum_client is not None:
+            self._momentum_client.close()
+
     @property
     def momentum_client(self) -> MomentumClient:
         """Get the base MomentumClient (lazy-loaded with configuration)."""
@@ -79,9 +122,36 @@ class MomentumClientManager:
                 client_secret=self._client_secret,
                 api_key=self._api_key,
                 resource=self._resource,
+                token_cache=self._token_cache,
+                **self._config,
             )
         return self._momentum_client
 
+    def session(self) -> ContextManager[Session]:
+        """
+        Husk GET-svar pr. URL i en with-blok, f.eks. for én borger ad gangen.
+
+        Gentagne opslag i blokken besvares fra hukommelsen. Blokkens egne skrivninger
+        glemmer de svar de kan have ændret, og alt glemmes når blokken forlades.
+
+        Returns:
+            A context manager yielding the Session, whose stats() counts hits and misses
+        """
+        return session_scope()
+
+    def warmup(self, connections: int = 1, preload: Iterable[str] = ()) -> dict[str, Any]:
+        """
+        Hent token, åbn forbindelser og forudindlæs referencedata parallelt.
+
+        Args:
+            connections: Number of pooled connections to open
+            preload: GET endpoints to fetch up front, e.g. ("/tags", "/taxonomies")
+
+        Returns:
+            The JSON response for each preloaded endpoint
+        """
+        return self.momentum_client.warmup(connections=connections, preload=preload)
+
     @property
     def borgere(self) -> BorgereClient:
         """Get the BorgereClient (lazy-loaded)."""
@@ -129,4 +199,175 @@ class MomentumClientManager:
         """Get the VitasClient (lazy-loaded)."""
         if self._vitas_client is None:
             self._vitas_client = VitasClient(self.momentum_client)
-        return self._vitas_client
\ No newline at end of file
+        return self._vitas_client
+
+
+class AsyncMomentumClientManager:
+    """
+    Asynkron udgave af MomentumClientManager med adgang til de asynkrone funktionalitets-klienter.
+
+    Eksempel:
+        async with AsyncMomentumClientManager(base_url="...", client_id="...", client_secret="...", api_key="...", resource="...") as momentum:
+            borgere = await asyncio.gather(*(momentum.borgere.hent_borger(cpr) for cpr in cpr_numre))
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        client_id: str,
+        client_secret: str,
+        api_key: str,
+        resource: str,
+        timeout: float = 60.0,
+        token_cache: Optional[FileTokenCache] = None,
+        transport_config: Optional[TransportConfig] = None,
+        log_config: Optional[LogConfig] = None,
+        codec: str | JsonCodec = "auto",
+        cache_config: Optional[CacheConfig] = None,
+        coalesce: bool = False,
+        cpr_cache: Optional[CprCache] = None
+    ):
+        """
+        Initialize the AsyncMomentumClientManager.
+
+        Args:
+            base_url: The base URL for the Momentum API
+            client_id: The OAuth2 client ID
+            client_secret: The OAuth2 client secret
+            api_key: The API key for authentication
+            resource: The resource identifier
+            timeout: Read and write timeout in seconds (default: 60.0), ignored if transport_config is given
+            token_cache: Optional on-disk token cache shared by processes on this host
+            transport_config: Timeouts, connection pool, keep-alive and HTTP/2 settings
+            log_config: Payload size and sampling settings for the HTTP transaction log
+            codec: JSON codec - "auto" (orjson, then msgspec, then stdlib), "orjson", "msgspec", "stdlib" or a codec instance
+            cache_config: Cache reference data such as /tags and /taxonomies (None: no cache)
+            coalesce: Share one request and response between identical GETs in flight at the same time
+            cpr_cache: Remember the citizenId of CPR numbers, so hent_borger needs one request for known ones
+        """
+        self._base_url = base_url
+        self._client_id = client_id
+        self._client_secret = client_secret
+        self._api_key = api_key
+        self._resource = resource
+        self._token_cache = token_cache
+
+        # Store configuration for lazy loading
+        self._config = {
+            "transport_config": transport_config or TransportConfig.from_timeout(timeout),
+            "log_config": log_config,
+            "codec": codec,
+            "cache_config": cache_config,
+            "coalesce": coalesce,
+            "cpr_cache": cpr_cache,
+        }
+
+        # Lazy-loaded clients
+        self._momentum_client: Optional[AsyncMomentumClient] = None
+        self._borgere_client: Optional[AsyncBorgereClient] = None
+        self._virksomheder_client: Optional[AsyncVirksomhederClient] = None
+        self._markeringer_client: Optional[AsyncMarkeringerClient] = None
+        self._opgaver_client: Optional[AsyncOpgaverClient] = None
+        self._taksonomier_client: Optional[AsyncTaksonomierClient] = None
+        self._journalnotater_client: Optional[AsyncJournalnotaterClient] = None
+        self._vitas_client: Optional[AsyncVitasClient] = None
+
+    async def __aenter__(self) -> "AsyncMomentumClientManager":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Luk den underliggende AsyncMomentumClient, hvis den er oprettet."""
+        if self._momentum_client is not None:
+            await self._momentum_client.aclose()
+
+    @property
+    def momentum_client(self) -> AsyncMomentumClient:
+        """Get the base AsyncMomentumClient (lazy-loaded with configuration)."""
+        if self._momentum_client is None:
+            self._momentum_client = AsyncMomentumClient(
+                base_url=self._base_url,
+                client_id=self._client_id,
+                client_secret=self._client_secret,
+                api_key=self._api_key,
+                resource=self._resource,
+                token_cache=self._token_cache,
+                **self._config,
+            )
+        return self._momentum_client
+
+    def session(self) -> ContextManager[Session]:
+        """
+        Husk GET-svar pr. URL i en with-blok, f.eks. for én borger ad gangen.
+
+        Gentagne opslag i blokken besvares fra hukommelsen. Blokkens egne skrivninger
+        glemmer de svar de kan have ændret, og alt glemmes når blokken forlades.
+
+        Returns:
+            A context manager yielding the Session, whose stats() counts hits and misses
+        """
+        return session_scope()
+
+    async def warmup(self, connections: int = 1, preload: Iterable[str] = ()) -> dict[str, Any]:
+        """
+        Hent token, åbn forbindelser og forudindlæs referencedata parallelt.
+
+        Args:
+            connections: Number of pooled connections to open
+            preload: GET endpoints to fetch up front, e.g. ("/tags", "/taxonomies")
+
+        Returns:
+            The JSON response for each preloaded endpoint
+        """
+        return await self.momentum_client.warmup(connections=connections, preload=preload)
+
+    @property
+    def borgere(self) -> AsyncBorgereClient:
+        """Get the AsyncBorgereClient (lazy-loaded)."""
+        if self._borgere_client is None:
+            self._borgere_client = AsyncBorgereClient(self.momentum_client)
+        return self._borgere_client
+
+    @property
+    def virksomheder(self) -> AsyncVirksomhederClient:
+        """Get the AsyncVirksomhederClient (lazy-loaded)."""
+        if self._virksomheder_client is None:
+            self._virksomheder_client = AsyncVirksomhederClient(self.momentum_client)
+        return self._virksomheder_client
+
+    @property
+    def markeringer(self) -> AsyncMarkeringerClient:
+        """Get the AsyncMarkeringerClient (lazy-loaded)."""
+        if self._markeringer_client is None:
+            self._markeringer_client = AsyncMarkeringerClient(self.momentum_client)
+        return self._markeringer_client
+
+    @property
+    def opgaver(self) -> AsyncOpgaverClient:
+        """Get the AsyncOpgaverClient (lazy-loaded)."""
+        if self._opgaver_client is None:
+            self._opgaver_client = AsyncOpgaverClient(self.momentum_client)
+        return self._opgaver_client
+
+    @property
+    def taksonomier(self) -> AsyncTaksonomierClient:
+        """Get the AsyncTaksonomierClient (lazy-loaded)."""
+        if self._taksonomier_client is None:
+            self._taksonomier_client = AsyncTaksonomierClient(self.momentum_client)
+        return self._taksonomier_client
+
+    @property
+    def journalnotater(self) -> AsyncJournalnotaterClient:
+        """Get the AsyncJournalnotaterClient (lazy-loaded)."""
+        if self._journalnotater_client is None:
+            self._journalnotater_client = AsyncJournalnotaterClient(self.momentum_client)
+        return self._journalnotater_client
+
+    @property
+    def vitas(self) -> AsyncVitasClient:
+        """Get the AsyncVitasClient (lazy-loaded)."""
+        if self._vitas_client is None:
+            self._vitas_client = AsyncVitasClient(self.momentum_client)
+        return self._vitas_client
@@ -0,0 +1,119 @@
+"""
+Register of markeringer (tags), shared by BorgereClient and MarkeringerClient.
+
+hent_markering and opret_markering have to find one tag among all of /tags.
+The register fetches /tags once and indexes the tags by title and id, so a
+lookup does not cost a request. /tags is fetched again when
+
+- the register is older than `ttl` seconds, or
+- a tag is not found - at most every `min_genindlæsning` seconds, so lookups
+  of unknown names do not fetch /tags every time.
+
+The register belongs to the client and is shared by all functionality clients
+of the same manager. Concurrent lookups that need /tags fetch it once. The
+returned tags are shared by all callers and must not be modified.
+"""
+
+import asyncio
+import threading
+import time
+
+from typing import Any, Optional
+
+TAGS_ENDPOINT = "/tags"
+
+
+class MarkeringsRegister:
+    """
+    Tags from /tags indexed by title, id and other fields. Thread-safe.
+
+    Args:
+        ttl: Seconds before /tags is fetched again
+        min_genindlæsning: Minimum seconds between two fetches caused by an unknown tag
+        nøgler: Fields the tags can be looked up by
+    """
+
+    def __init__(self, ttl: float = 300.0, min_genindlæsning: float = 30.0, nøgler: tuple[str, ...] = ("title", "id")) -> None:
+        self.ttl = ttl
+        self.min_genindlæsning = min_genindlæsning
+        self.nøgler = nøgler
+        self._indeks: dict[str, dict[Any, dict]] = {nøgle: {} for nøgle in nøgler}
+        self._hentet: Optional[float] = None
+        self._lock = threading.Lock()
+        self._indlæsning = threading.Lock()
+        self._aindlæsning: Optional[asyncio.Lock] = None
+
+    def indlæs(self, tags: Optional[list[dict]]) -> None:
+        """Build the index from a /tags response (None: no tags)."""
+        indeks: dict[str, dict[Any, dict]] = {nøgle: {} for nøgle in self.nøgler}
+        for tag in tags or []:
+            for nøgle in self.nøgler:
+                værdi = tag.get(nøgle)
+                if værdi is not None:
+                    # The first tag with a given value wins, as in the linear search it replaces
+                    indeks[nøgle].setdefault(værdi, tag)
+        with self._lock:
+            self._indeks = indeks
+            self._hentet = time.monotonic()
+
+    def invalider(self) -> None:
+        """Fetch /tags again on the next lookup."""
+        with self._lock:
+            self._hentet = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._indeks[self.nøgler[0]])
+
+    def _opslag(self, værdi: Any, nøgle: str) -> tuple[Optional[dict], bool]:
+        """The tag from the index, and whether /tags must be fetched first."""
+        if nøgle not in self._indeks:
+            raise ValueError(f"Ukendt nøgle: {nøgle}. Registret er indekseret efter {', '.join(self.nøgler)}")
+        with self._lock:
+            nu = time.monotonic()
+            if self._hentet is None or nu - self._hentet >= self.ttl:
+                return None, True
+            tag = self._indeks[nøgle].get(værdi)
+            return tag, tag is None and nu - self._hentet >= self.min_genindlæsning
+
+    def _find(self, værdi: Any, nøgle: str) -> Optional[dict]:
+        with self._lock:
+            return self._indeks[nøgle].get(værdi)
+
+    def slå_op(self, client, værdi: Any, nøgle: str = "title") -> Optional[dict]:
+        """
+        Find the tag whose `nøgle` equals `værdi`, fetching /tags with `client` if needed.
+
+        :param client: MomentumClient
+        :param værdi: Title, id or other value to look for
+        :param nøgle: Field to look in
+        :return: The tag or None if it does not exist
+        """
+        tag, hent = self._opslag(værdi, nøgle)
+        if not hent:
+            return tag
+        with self._indlæsning:
+            # Another thread may have fetched /tags meanwhile
+            tag, hent = self._opslag(værdi, nøgle)
+            if hent:
+                self.indlæs(_tags(client.get(TAGS_ENDPOINT)))
+        return self._find(værdi, nøgle)
+
+    async def aslå_op(self, client, værdi: Any, nøgle: str = "title") -> Optional[dict]:
+        """Async version of slå_op with an AsyncMomentumClient."""
+        tag, hent = self._opslag(værdi, nøgle)
+        if not hent:
+            return tag
+        if self._aindlæsning is None:
+            # Created on first use, inside the event loop the client runs in
+            self._aindlæsning = asyncio.Lock()
+        async with self._aindlæsning:
+            # Another task may have fetched /tags meanwhile
+            tag, hent = self._opslag(værdi, nøgle)
+            if hent:
+                self.indlæs(_tags(await client.get(TAGS_ENDPOINT)))
+        return self._find(værdi, nøgle)
+
+
+def _tags(response) -> Optional[list[dict]]:
+    return None if response.status_code == 404 else response.json()
@@ -0,0 +1,338 @@
+"""
+Pagination engine shared by all paginated Momentum endpoints.
+
+The endpoints page in one of two ways, described by a paging strategy:
+
+- PageNumberPaging: ``{"paging": {"pageNumber": n, "pageSize": size}}``
+- SkipSizePaging: ``{"skip": n * size, "size": size}``
+
+and report how much is left in one of three ways, detected from the first page:
+
+- ``totalSearchCount`` / ``totalCount``: the total is known, so all remaining
+  pages are fetched concurrently.
+- ``hasMore``: the total is unknown, so the following pages are fetched
+  concurrently in waves until a page says there is no more.
+- none of them: the first page is all there is.
+
+Fan-out is bounded by ``concurrency`` and pages are returned in page order.
+
+iter_items/aiter_items stream the items instead, fetching one page ahead while
+the caller processes the current one, so at most about two pages are held in
+memory and no further pages are requested once the caller stops iterating.
+
+Page requests are sent with BULK priority unless the client sets another one,
+so single lookups are admitted ahead of them by the rate limiter. They run in a
+copy of the caller's context, so worker threads see the caller's deadline.
+"""
+
+import asyncio
+import contextvars
+import copy
+import math
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Optional, Protocol
+
+from .priority import BULK, awith_default_priority, with_default_priority
+
+DEFAULT_CONCURRENCY = 8
+
+_TOTAL_KEYS = ("totalSearchCount", "totalCount")
+
+FetchPage = Callable[[dict], Optional[dict]]
+AsyncFetchPage = Callable[[dict], Awaitable[Optional[dict]]]
+
+
+def _in_caller_context(fetch_page: FetchPage) -> FetchPage:
+    """Run each call of `fetch_page` in a copy of the current context, whatever thread it runs in."""
+    context = contextvars.copy_context()
+    return lambda body: context.copy().run(fetch_page, body)
+
+
+class Paging(Protocol):
+    page_size: int
+
+    def request_body(self, body: dict, index: int) -> dict:
+        """Return a copy of `body` asking for page number `index` (0-based)."""
+        ...
+
+
+@dataclass(frozen=True)
+class PageNumberPaging:
+    """Paging with ``paging.pageNumber`` and ``paging.pageSize`` in the request body."""
+
+    page_size: int
+    first_page: int = 0
+
+    def request_body(self, body: dict, index: int) -> dict:
+        body = copy.deepcopy(body)
+        body["paging"] = {
+            **body.get("paging", {}),
+            "pageNumber": self.first_page + index,
+            "pageSize": self.page_size,
+        }
+        return body
+
+
+@dataclass(frozen=True)
+class SkipSizePaging:
+    """Paging with ``skip`` and ``size`` in the request body."""
+
+    page_size: int
+
+    def request_body(self, body: dict, index: int) -> dict:
+        return {**body, "skip": index * self.page_size, "size": self.page_size}
+
+
+@dataclass
+class _Plan:
+    """What to fetch after the first page."""
+
+    paging: Paging
+    items: str
+    max_pages: Optional[int]
+    max_items: Optional[int]
+    total: Optional[int] = None
+    has_more: bool = False
+
+    @classmethod
+    def from_first_page(
+        cls,
+        page: dict,
+        paging: Paging,
+        items: str,
+        max_pages: Optional[int],
+        max_items: Optional[int],
+    ) -> "_Plan":
+        plan = cls(paging, items, max_pages, max_items)
+        for key in _TOTAL_KEYS:
+            if page.get(key) is not None:
+                plan.total = int(page[key])
+                break
+        else:
+            plan.has_more = bool(page.get("hasMore", False))
+        return plan
+
+    def page_count(self) -> Optional[int]:
+        """Total number of pages, or None when the endpoint only reports hasMore."""
+        if self.total is None:
+            return None if self.has_more else 1
+        wanted = self.total if not self.max_items else min(self.total, self.max_items)
+        return self._cap(max(1, math.ceil(wanted / self.paging.page_size)))
+
+    def _cap(self, pages: int) -> int:
+        return pages if self.max_pages is None else min(pages, self.max_pages)
+
+    def next_wave(self, start: int, concurrency: int) -> range:
+        """Page indices of the next speculative wave when only hasMore is known."""
+        return range(start, self._cap(start + concurrency))
+
+    def has_next(self, index: int, page: dict, fetched: int) -> bool:
+        """Whether page `index` should be fetched, given the previous page and the items fetched so far."""
+        if self.max_items and fetched >= self.max_items:
+            return False
+        page_count = self.page_count()
+        if page_count is not None:
+            return index < page_count
+        has_more = bool(page.get("hasMore", False)) and bool(self.page_items(page))
+        return has_more and (self.max_pages is None or index < self.max_pages)
+
+    def done(self, result: list) -> bool:
+        return bool(self.max_items) and len(result) >= self.max_items
+
+    def page_items(self, page: dict) -> list:
+        return page.get(self.items) or []
+
+
+def fetch_all(
+    fetch_page: FetchPage,
+    body: dict,
+    paging: Paging,
+    items: str = "data",
+    max_pages: Optional[int] = None,
+    max_items: Optional[int] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    priority: Optional[str] = BULK,
+) -> Optional[list]:
+    """
+    Fetch all pages of a paginated endpoint and return the items in page order.
+
+    Args:
+        fetch_page: Sends one request body and returns the decoded page, or None if not found
+        body: Request body without paging
+        paging: How pages are requested
+        items: Key holding the items of a page
+        max_pages: Safety cap on the number of pages fetched
+        max_items: Stop once at least this many items are fetched (0 or None: all)
+        concurrency: Maximum number of pages fetched at the same time
+        priority: Default priority of the page requests (None: the caller's)
+
+    Returns:
+        All items, or None if a page was not found
+    """
+    fetch_page = _in_caller_context(with_default_priority(fetch_page, priority))
+    first = fetch_page(paging.request_body(body, 0))
+    if first is None:
+        return None
+
+    plan = _Plan.from_first_page(first, paging, items, max_pages, max_items)
+    result = list(plan.page_items(first))
+    fetch_index = lambda index: fetch_page(paging.request_body(body, index))
+
+    page_count = plan.page_count()
+    if page_count is not None:
+        if page_count <= 1:
+            return result
+        with ThreadPoolExecutor(max_workers=min(concurrency, page_count - 1)) as pool:
+            for page in pool.map(fetch_index, range(1, page_count)):
+                if page is None:
+                    return None
+                result.extend(plan.page_items(page))
+        return result
+
+    # Only hasMore is known - fetch the following pages in waves
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = 1
+        has_more = True
+        while has_more and not plan.done(result):
+            wave = plan.next_wave(start, concurrency)
+            if not wave:
+                break
+            for page in pool.map(fetch_index, wave):
+                if page is None:
+                    return None
+                page_items = plan.page_items(page)
+                result.extend(page_items)
+                has_more = bool(page.get("hasMore", False)) and bool(page_items)
+                if not has_more or plan.done(result):
+                    break
+            start = wave.stop
+    return result
+
+
+async def afetch_all(
+    fetch_page: AsyncFetchPage,
+    body: dict,
+    paging: Paging,
+    items: str = "data",
+    max_pages: Optional[int] = None,
+    max_items: Optional[int] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    priority: Optional[str] = BULK,
+) -> Optional[list]:
+    """Async version of fetch_all."""
+    fetch_page = awith_default_priority(fetch_page, priority)
+    first = await fetch_page(paging.request_body(body, 0))
+    if first is None:
+        return None
+
+    plan = _Plan.from_first_page(first, paging, items, max_pages, max_items)
+    result = list(plan.page_items(first))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_index(index: int) -> Optional[dict]:
+        async with semaphore:
+            return await fetch_page(paging.request_body(body, index))
+
+    page_count = plan.page_count()
+    if page_count is not None:
+        pages = await asyncio.gather(*(fetch_index(index) for index in range(1, page_count)))
+        for page in pages:
+            if page is None:
+                return None
+            result.extend(plan.page_items(page))
+        return result
+
+    # Only hasMore is known - fetch the following pages in waves
+    start = 1
+    has_more = True
+    while has_more and not plan.done(result):
+        wave = plan.next_wave(start, concurrency)
+        if not wave:
+            break
+        for page in await asyncio.gather(*(fetch_index(index) for index in wave)):
+            if page is None:
+                return None
+            page_items = plan.page_items(page)
+            result.extend(page_items)
+            has_more = bool(page.get("hasMore", False)) and bool(page_items)
+            if not has_more or plan.done(result):
+                break
+        start = wave.stop
+    return result
+
+
+def iter_items(
+    fetch_page: FetchPage,
+    body: dict,
+    paging: Paging,
+    items: str = "data",
+    max_pages: Optional[int] = None,
+    max_items: Optional[int] = None,
+    priority: Optional[str] = BULK,
+) -> Iterator:
+    """
+    Yield the items of a paginated endpoint, fetching the next page in the background.
+
+    Takes the same arguments as fetch_all except concurrency. Iteration ends
+    early if a page is not found. Closing the generator (or breaking out of the
+    loop) stops further requests.
+    """
+    fetch_page = _in_caller_context(with_default_priority(fetch_page, priority))
+    fetch_index = lambda index: fetch_page(paging.request_body(body, index))
+    pool = ThreadPoolExecutor(max_workers=1)
+    try:
+        pending = pool.submit(fetch_index, 0)
+        plan = None
+        index = 0
+        fetched = 0
+        while pending is not None:
+            page = pending.result()
+            if page is None:
+                return
+            if plan is None:
+                plan = _Plan.from_first_page(page, paging, items, max_pages, max_items)
+
+            page_items = plan.page_items(page)
+            fetched += len(page_items)
+            index += 1
+            pending = pool.submit(fetch_index, index) if plan.has_next(index, page, fetched) else None
+            yield from page_items
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def aiter_items(
+    fetch_page: AsyncFetchPage,
+    body: dict,
+    paging: Paging,
+    items: str = "data",
+    max_pages: Optional[int] = None,
+    max_items: Optional[int] = None,
+    priority: Optional[str] = BULK,
+) -> AsyncIterator:
+    """Async version of iter_items. Closing the generator cancels the prefetched page."""
+    fetch_page = awith_default_priority(fetch_page, priority)
+    fetch_index = lambda index: fetch_page(paging.request_body(body, index))
+    pending = asyncio.ensure_future(fetch_index(0))
+    try:
+        plan = None
+        index = 0
+        fetched = 0
+        while pending is not None:
+            page = await pending
+            if page is None:
+                return
+            if plan is None:
+                plan = _Plan.from_first_page(page, paging, items, max_pages, max_items)
+
+            page_items = plan.page_items(page)
+            fetched += len(page_items)
+            index += 1
+            pending = asyncio.ensure_future(fetch_index(index)) if plan.has_next(index, page, fetched) else None
+            for item in page_items:
+                yield item
+    finally:
+        if pending is not None:
+            pending.cancel()
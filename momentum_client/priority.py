@@ -0,0 +1,86 @@
+"""
+Request priorities.
+
+Each request is sent in one of three lanes, which the rate limiter admits in
+order when the concurrency window is full:
+
+- INTERACTIVE: single lookups someone is waiting for
+- NORMAL: everything else (the default)
+- BULK: page requests of large extracts
+
+The priority is chosen per call (priority=...), per client or functionality
+client (with_priority(...)), and otherwise defaults to BULK inside the
+pagination engine and NORMAL elsewhere. Without a RateLimit in the
+TransportConfig requests are never queued, so the priority has no effect.
+"""
+
+import contextvars
+import functools
+
+from typing import Awaitable, Callable, Optional, TypeVar
+
+INTERACTIVE = "interactive"
+NORMAL = "normal"
+BULK = "bulk"
+
+PRIORITIES = (INTERACTIVE, NORMAL, BULK)
+
+# Request extension carrying the priority to the rate limiter
+PRIORITY = "momentum_client.priority"
+
+T = TypeVar("T")
+
+_default_priority: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("momentum_priority", default=None)
+
+
+def validate_priority(priority: str) -> str:
+    if priority not in PRIORITIES:
+        raise ValueError(f"Ugyldig prioritet: {priority}. Gyldige værdier er {', '.join(map(repr, PRIORITIES))}")
+    return priority
+
+
+def rank(priority: Optional[str]) -> int:
+    """Position of `priority` in PRIORITIES - lower is served first. Unknown or no priority counts as NORMAL."""
+    try:
+        return PRIORITIES.index(priority)
+    except ValueError:
+        return PRIORITIES.index(NORMAL)
+
+
+def default_priority() -> Optional[str]:
+    """The priority of requests in the current context that do not set one themselves."""
+    return _default_priority.get()
+
+
+def with_default_priority(fn: Callable[..., T], priority: Optional[str]) -> Callable[..., T]:
+    """Wrap `fn` so requests sent while it runs default to `priority` (None: leave the default unchanged)."""
+    if priority is None:
+        return fn
+    validate_priority(priority)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _default_priority.set(priority)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _default_priority.reset(token)
+
+    return wrapper
+
+
+def awith_default_priority(fn: Callable[..., Awaitable[T]], priority: Optional[str]) -> Callable[..., Awaitable[T]]:
+    """Async version of with_default_priority."""
+    if priority is None:
+        return fn
+    validate_priority(priority)
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        token = _default_priority.set(priority)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            _default_priority.reset(token)
+
+    return wrapper
@@ -0,0 +1,411 @@
+"""
+Client-side rate and concurrency governor.
+
+RateLimitTransport sits between the client and the network and lets a request
+through when
+
+- a token bucket allows another request this second (requests_per_second), and
+- fewer requests are in flight than the adaptive concurrency window allows.
+
+The window is controlled by AIMD (additive increase, multiplicative decrease):
+it grows by about one request per window's worth of successful responses while
+latency stays near its running average, and is cut in half on 429, 502, 503
+and 504 responses, timeouts or latency spikes. A 500 (and the other 5xx) is
+an error in handling that one request, e.g. a body the API cannot process, and
+is retried or raised without shrinking the window - otherwise a batch with a
+few bad rows would throttle the healthy ones. Requests that are cancelled or
+fail for other reasons leave the window unchanged too - a hedge that lost or a
+page that was no longer needed says nothing about the load on the API. Concurrent
+workers thereby settle on the highest rate the tenant sustains without manual
+tuning.
+
+Every attempt goes through the governor, including retries, since the
+transport is wrapped by RetryTransport. When the window is full, waiting
+requests are admitted by priority (see momentum_client.priority), and bulk
+requests always leave part of the window free for the other lanes. A request
+with a deadline waits no longer than the time it has left, and fails with
+DeadlineExceeded when it cannot be sent in time.
+
+Robots running side by side on one host with the same API key can share the
+request rate through FileTokenBucket (RateLimit(shared=True)), which splits it
+evenly between the processes that are currently sending requests.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from ._filelock import ensure_private_dir, file_lock, write_private_file
+from .deadline import DEADLINE, DeadlineExceeded
+from .priority import BULK, PRIORITIES, PRIORITY, rank
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE_LIMIT_PATH = Path.home() / ".momentum_client" / "ratelimit.json"
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    Settings for the rate and concurrency governor.
+
+    Args:
+        requests_per_second: Sustained request rate (None: no rate limit)
+        burst: Requests allowed at once before the rate applies (default: one second's worth)
+        adaptive: Adapt the concurrency window with AIMD (False: fixed at max_concurrency)
+        initial_concurrency: Starting size of the concurrency window
+        min_concurrency: The window never shrinks below this
+        max_concurrency: The window never grows above this
+        latency_tolerance: Latency above this multiple of the running average counts as a spike
+        shared: Share requests_per_second with other processes on this host using the same
+            API key, instead of each process having its own
+        shared_path: Location of the shared state file (default: ~/.momentum_client/ratelimit.json)
+        reserved_concurrency: Slots of the window that bulk requests leave free for
+            interactive and normal requests
+    """
+
+    requests_per_second: Optional[float] = None
+    burst: Optional[float] = None
+    adaptive: bool = True
+    initial_concurrency: int = 4
+    min_concurrency: int = 1
+    max_concurrency: int = 32
+    latency_tolerance: float = 2.0
+    shared: bool = False
+    shared_path: Optional[str | Path] = None
+    reserved_concurrency: int = 1
+
+    def create_bucket(self, key: Optional[str] = None) -> Optional["TokenBucket"]:
+        """The token bucket, shared under `key` (the API key) if `shared` is set."""
+        if self.requests_per_second is None:
+            return None
+        if self.shared:
+            if key is None:
+                raise ValueError("En delt rate limit kræver en nøgle, f.eks. API-nøglen")
+            return FileTokenBucket(self.requests_per_second, self.burst, key=key, path=self.shared_path)
+        return TokenBucket(self.requests_per_second, self.burst)
+
+    def create_window(self) -> "AimdWindow":
+        if not self.adaptive:
+            return AimdWindow(self.max_concurrency, self.max_concurrency, self.max_concurrency)
+        return AimdWindow(self.initial_concurrency, self.min_concurrency, self.max_concurrency, self.latency_tolerance)
+
+
+class TokenBucket:
+    """
+    Token bucket allowing `rate` requests per second with bursts of up to `burst`.
+
+    reserve() takes a token and returns how long the caller must wait for it,
+    so waiting happens outside the lock and callers are served in order.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        if rate <= 0:
+            raise ValueError("rate skal være større end 0")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token and return the seconds to wait before it may be used."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def release(self) -> None:
+        """Give back a token taken by reserve() that will not be used."""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+    def acquire(self, deadline: Optional[float] = None) -> None:
+        """Wait for a token, or raise DeadlineExceeded if it would come after `deadline` (time.monotonic())."""
+        delay = self._reserve_before(deadline)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def aacquire(self, deadline: Optional[float] = None) -> None:
+        delay = self._reserve_before(deadline)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _reserve_before(self, deadline: Optional[float]) -> float:
+        delay = self.reserve()
+        if deadline is not None and time.monotonic() + delay > deadline:
+            self.release()
+            raise DeadlineExceeded("Deadline overskredet mens forespørgslen ventede på rate limit")
+        return delay
+
+
+class FileTokenBucket(TokenBucket):
+    """
+    Token bucket whose rate is split evenly between the processes on this host using the same key.
+
+    Each process registers in a file-locked JSON file and gets a bucket of
+    rate / n requests per second, where n is the number of processes that
+    sent a request within the last `member_ttl` seconds. Idle or stopped robots
+    therefore drop out after a few seconds and their share goes to the rest.
+
+    Args:
+        rate: Requests per second for all processes together
+        burst: Burst for all processes together (default: one second's worth)
+        key: Key the rate is shared under, e.g. the API key. Only a hash is stored.
+        path: Location of the state file (default: ~/.momentum_client/ratelimit.json)
+        member_ttl: Seconds without requests after which a process no longer gets a share
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        key: str = "",
+        path: Optional[str | Path] = None,
+        member_ttl: float = 5.0,
+    ) -> None:
+        super().__init__(rate, burst)
+        self.path = Path(path) if path is not None else DEFAULT_RATE_LIMIT_PATH
+        self.member_ttl = member_ttl
+        self._key = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        self._member = f"{os.getpid()}-{secrets.token_hex(4)}"
+        self._lock_path = self.path.with_name(self.path.name + ".lock")
+
+    def reserve(self) -> float:
+        ensure_private_dir(self.path.parent)
+        with self._lock, file_lock(self._lock_path):
+            entries = self._read()
+            now = time.time()
+            members = {
+                member: state for member, state in entries.get(self._key, {}).items()
+                if state["seen"] > now - self.member_ttl
+            }
+            share = 1 / (len(members) + (self._member not in members))
+            rate, burst = self.rate * share, max(1.0, self.burst * share)
+
+            state = members.get(self._member, {"tokens": burst, "updated": now})
+            tokens = min(burst, state["tokens"] + max(0.0, now - state["updated"]) * rate) - 1
+            delay = 0.0 if tokens >= 0 else -tokens / rate
+            # seen covers the wait, so the process keeps its share while it waits
+            members[self._member] = {"tokens": tokens, "updated": now, "seen": now + delay}
+
+            entries[self._key] = members
+            write_private_file(self.path, json.dumps(entries).encode("utf-8"))
+            return delay
+
+    def release(self) -> None:
+        with self._lock, file_lock(self._lock_path):
+            entries = self._read()
+            state = entries.get(self._key, {}).get(self._member)
+            if state is not None:
+                state["tokens"] += 1
+                write_private_file(self.path, json.dumps(entries).encode("utf-8"))
+
+    def _read(self) -> dict:
+        try:
+            return json.loads(self.path.read_bytes())
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            logger.warning("Rate limit-filen %s kunne ikke læses og bliver genskabt", self.path)
+            return {}
+
+
+class AimdWindow:
+    """
+    Concurrency window adjusted by AIMD from the outcome of each request.
+
+    Thread-safe. The window only shrinks once per round trip, so a burst of
+    failures from requests sent before the first one was seen halves it once.
+    """
+
+    _DECREASE = 0.5
+    _SMOOTHING = 0.1
+
+    def __init__(self, initial: int, minimum: int, maximum: int, latency_tolerance: float = 2.0) -> None:
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_tolerance = latency_tolerance
+        self.average_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return int(self.limit)
+
+    def record(self, latency: float, overloaded: bool) -> None:
+        """Update the window with the latency and outcome of a finished request."""
+        with self._lock:
+            spike = self.average_latency is not None and latency > self.average_latency * self.latency_tolerance
+            if overloaded or spike:
+                now = time.monotonic()
+                if now - self._last_decrease >= (self.average_latency or 0.0):
+                    self.limit = max(float(self.minimum), self.limit * self._DECREASE)
+                    self._last_decrease = now
+            else:
+                self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+
+            if not overloaded:
+                # Spikes are included, so a lasting change in latency becomes the new normal
+                if self.average_latency is None:
+                    self.average_latency = latency
+                else:
+                    self.average_latency += self._SMOOTHING * (latency - self.average_latency)
+
+
+# Responses of an overloaded API or gateway - 500 and other errors are about the request, not the load
+_OVERLOAD_STATUSES = frozenset({429, 502, 503, 504})
+
+
+class _Admission:
+    """Requests in flight and waiting per priority. Not thread-safe - guarded by the transport's condition."""
+
+    _BULK = rank(BULK)
+
+    def __init__(self, window: AimdWindow, reserved: int) -> None:
+        self.window = window
+        self.reserved = reserved
+        self.in_flight = 0
+        self.waiting = [0] * len(PRIORITIES)
+
+    def admissible(self, request_rank: int) -> bool:
+        """Whether a request of `request_rank` may start now."""
+        limit = self.window.size
+        if request_rank == self._BULK:
+            limit = max(1, limit - self.reserved)
+        return self.in_flight < limit and not any(self.waiting[:request_rank])
+
+
+def _time_left(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def _admission_timeout(request: httpx.Request) -> DeadlineExceeded:
+    return DeadlineExceeded(f"Deadline overskredet mens {request.method} {request.url} ventede på en plads i vinduet")
+
+
+class RateLimitTransport(httpx.BaseTransport):
+    """Transport that lets requests through the wrapped transport according to a RateLimit."""
+
+    def __init__(self, transport: httpx.BaseTransport, rate_limit: RateLimit, key: Optional[str] = None) -> None:
+        self._transport = transport
+        self.bucket = rate_limit.create_bucket(key)
+        self.window = rate_limit.create_window()
+        self._admission = _Admission(self.window, rate_limit.reserved_concurrency)
+        self._condition = threading.Condition()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request_rank = rank(request.extensions.get(PRIORITY))
+        deadline = request.extensions.get(DEADLINE)
+        admission = self._admission
+        with self._condition:
+            admission.waiting[request_rank] += 1
+            try:
+                admitted = self._condition.wait_for(lambda: admission.admissible(request_rank), _time_left(deadline))
+            finally:
+                admission.waiting[request_rank] -= 1
+            if not admitted:
+                # Lower priorities that waited behind this request may fit now
+                self._condition.notify_all()
+                raise _admission_timeout(request)
+            admission.in_flight += 1
+            if any(admission.waiting):
+                # Lower priorities waiting behind this request may fit in the window as well
+                self._condition.notify_all()
+        overloaded: Optional[bool] = None
+        start = time.monotonic()
+        try:
+            if self.bucket is not None:
+                self.bucket.acquire(deadline)
+                start = time.monotonic()
+            response = self._transport.handle_request(request)
+            overloaded = response.status_code in _OVERLOAD_STATUSES
+            return response
+        except DeadlineExceeded:
+            # The caller's budget ran out, e.g. waiting for a token - not a sign of overload
+            raise
+        except httpx.TimeoutException:
+            overloaded = True
+            raise
+        finally:
+            # None: cancelled or failed without a response - nothing to learn from
+            if overloaded is not None:
+                self.window.record(time.monotonic() - start, overloaded)
+            with self._condition:
+                admission.in_flight -= 1
+                self._condition.notify_all()
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncRateLimitTransport(httpx.AsyncBaseTransport):
+    """Async version of RateLimitTransport."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, rate_limit: RateLimit, key: Optional[str] = None) -> None:
+        self._transport = transport
+        self.bucket = rate_limit.create_bucket(key)
+        self.window = rate_limit.create_window()
+        self._admission = _Admission(self.window, rate_limit.reserved_concurrency)
+        self._condition: Optional[asyncio.Condition] = None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self._condition is None:
+            # Created on first use, inside the event loop the client runs in
+            self._condition = asyncio.Condition()
+        request_rank = rank(request.extensions.get(PRIORITY))
+        deadline = request.extensions.get(DEADLINE)
+        admission = self._admission
+        async with self._condition:
+            admission.waiting[request_rank] += 1
+            try:
+                async with asyncio.timeout(_time_left(deadline)):
+                    await self._condition.wait_for(lambda: admission.admissible(request_rank))
+            except TimeoutError:
+                self._condition.notify_all()
+                raise _admission_timeout(request) from None
+            finally:
+                admission.waiting[request_rank] -= 1
+            admission.in_flight += 1
+            if any(admission.waiting):
+                self._condition.notify_all()
+        overloaded: Optional[bool] = None
+        start = time.monotonic()
+        try:
+            if self.bucket is not None:
+                await self.bucket.aacquire(deadline)
+                start = time.monotonic()
+            response = await self._transport.handle_async_request(request)
+            overloaded = response.status_code in _OVERLOAD_STATUSES
+            return response
+        except DeadlineExceeded:
+            # The caller's budget ran out, e.g. waiting for a token - not a sign of overload
+            raise
+        except httpx.TimeoutException:
+            overloaded = True
+            raise
+        finally:
+            # None: cancelled or failed without a response - nothing to learn from
+            if overloaded is not None:
+                self.window.record(time.monotonic() - start, overloaded)
+            async with self._condition:
+                admission.in_flight -= 1
+                self._condition.notify_all()
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -0,0 +1,243 @@
+"""
+Retries of transient Momentum failures.
+
+RetryTransport wraps the httpx transport and retries 429, 502, 503 and 504
+responses and network errors with exponential backoff and full jitter, or after
+the delay the server asks for in Retry-After. Only idempotent methods are
+retried, unless the request is marked idempotent by the caller (e.g. searches
+sent as POST). Requests that never reached the server (connect errors) are
+always safe to retry. A request is not retried if the backoff would pass its
+deadline, and retries only get the time left until it.
+
+A RetryBudget shared by all requests of a client caps retries to a fraction of
+the traffic, so retries cannot multiply the load on an API that is already down.
+"""
+
+import asyncio
+import email.utils
+import logging
+import random
+import threading
+import time
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+
+import httpx
+
+from .deadline import DEADLINE, cap_request_timeout
+
+logger = logging.getLogger(__name__)
+
+# Request extension marking a non-idempotent request (e.g. a search POST) as safe to retry
+IDEMPOTENT = "momentum_client.idempotent"
+
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# Errors raised before the request was sent - safe to retry for any method
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+_TRANSIENT_ERRORS = (httpx.NetworkError, httpx.TimeoutException, httpx.RemoteProtocolError)
+
+
+class RetryBudget:
+    """
+    Limits retries to a fraction of requests.
+
+    Every request deposits `ratio` retries into the budget, and a small number
+    of retries per second is always allowed so that low traffic can still
+    retry. Each retry withdraws one. Thread-safe.
+
+    Args:
+        ratio: Retries allowed per request (0.2: at most one retry per five requests)
+        min_per_second: Retries per second allowed regardless of traffic
+        capacity: Maximum number of retries saved up
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, capacity: float = 10.0) -> None:
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.capacity = capacity
+        self._balance = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._refill()
+            self._balance = min(self.capacity, self._balance + self.ratio)
+
+    def available(self) -> bool:
+        """Whether a retry could be withdrawn now, without withdrawing it."""
+        with self._lock:
+            self._refill()
+            return self._balance >= 1
+
+    def try_spend(self) -> bool:
+        """Withdraw one retry. Returns False when the budget is used up."""
+        with self._lock:
+            self._refill()
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._balance = min(self.capacity, self._balance + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    When and how long to wait before retrying a request.
+
+    Args:
+        max_attempts: Attempts in total, including the first
+        backoff_base: Upper bound of the first random backoff in seconds, doubled per attempt
+        backoff_max: Upper bound of any backoff in seconds
+        max_retry_after: Responses asking for a longer Retry-After than this are not retried
+        retry_statuses: Status codes that are retried
+        idempotent_methods: Methods that are retried without being marked idempotent
+        budget: Budget shared by all requests using this policy
+    """
+
+    max_attempts: int = 4
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    max_retry_after: float = 60.0
+    retry_statuses: frozenset[int] = RETRY_STATUSES
+    idempotent_methods: frozenset[str] = IDEMPOTENT_METHODS
+    budget: RetryBudget = field(default_factory=RetryBudget, compare=False)
+
+    def is_idempotent(self, request: httpx.Request) -> bool:
+        return request.method in self.idempotent_methods or bool(request.extensions.get(IDEMPOTENT))
+
+    def retry_delay(
+        self,
+        request: httpx.Request,
+        attempt: int,
+        response: Optional[httpx.Response] = None,
+        error: Optional[Exception] = None,
+    ) -> Optional[float]:
+        """Seconds to wait before retrying after `attempt` (0-based), or None to give up."""
+        if attempt + 1 >= self.max_attempts:
+            return None
+
+        if error is not None:
+            if not isinstance(error, _NOT_SENT_ERRORS) and not (
+                isinstance(error, _TRANSIENT_ERRORS) and self.is_idempotent(request)
+            ):
+                return None
+            delay = self._backoff(attempt)
+        else:
+            if response.status_code not in self.retry_statuses or not self.is_idempotent(request):
+                return None
+            retry_after = _retry_after(response)
+            if retry_after is not None and retry_after > self.max_retry_after:
+                return None
+            delay = retry_after if retry_after is not None else self._backoff(attempt)
+
+        deadline = request.extensions.get(DEADLINE)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return None
+
+        if not self.budget.try_spend():
+            logger.warning("Retry-budgettet er opbrugt - %s %s forsøges ikke igen", request.method, request.url)
+            return None
+        return delay
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter spreads out retries from concurrent workers
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """The Retry-After header in seconds - given either as seconds or as an HTTP date."""
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def _log_retry(request: httpx.Request, attempt: int, delay: float, reason: str) -> None:
+    logger.info(
+        "Forsøger %s %s igen om %.1f sekunder (forsøg %d): %s",
+        request.method, request.url, delay, attempt + 2, reason,
+    )
+
+
+class RetryTransport(httpx.BaseTransport):
+    """Transport that retries transient failures of the wrapped transport according to a RetryPolicy."""
+
+    def __init__(self, transport: httpx.BaseTransport, policy: RetryPolicy) -> None:
+        self._transport = transport
+        self._policy = policy
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self._policy.budget.record_request()
+        attempt = 0
+        while True:
+            try:
+                response = self._transport.handle_request(request)
+            except httpx.TransportError as error:
+                delay = self._policy.retry_delay(request, attempt, error=error)
+                if delay is None:
+                    raise
+                _log_retry(request, attempt, delay, repr(error))
+            else:
+                delay = self._policy.retry_delay(request, attempt, response=response)
+                if delay is None:
+                    return response
+                _log_retry(request, attempt, delay, f"HTTP {response.status_code}")
+                response.close()
+            time.sleep(delay)
+            cap_request_timeout(request)
+            attempt += 1
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+    """Async version of RetryTransport."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, policy: RetryPolicy) -> None:
+        self._transport = transport
+        self._policy = policy
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._policy.budget.record_request()
+        attempt = 0
+        while True:
+            try:
+                response = await self._transport.handle_async_request(request)
+            except httpx.TransportError as error:
+                delay = self._policy.retry_delay(request, attempt, error=error)
+                if delay is None:
+                    raise
+                _log_retry(request, attempt, delay, repr(error))
+            else:
+                delay = self._policy.retry_delay(request, attempt, response=response)
+                if delay is None:
+                    return response
+                _log_retry(request, attempt, delay, f"HTTP {response.status_code}")
+                await response.aclose()
+            await asyncio.sleep(delay)
+            cap_request_timeout(request)
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
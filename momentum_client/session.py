@@ -0,0 +1,118 @@
+"""
+Session-scoped identity map.
+
+Within one job the same citizen is read again and again - hent_borger, then
+hent_borger_med_id, then its responsible caseworkers before every update.
+Inside ``with manager.session():`` the clients remember each GET response by
+URL and serve repeated reads from memory:
+
+- a write in the session (PUT, PATCH, DELETE or a POST that is not marked
+  idempotent) forgets the responses it may have changed: those sharing an id
+  with the written URL, or its first path segment (e.g. /tagassignments),
+- everything is forgotten when the block exits, so nothing is carried over to
+  the next job.
+
+The session lives in a contextvar, so it follows the job into asyncio tasks and
+the page requests of the pagination engine. Changes made by others during the
+session are not seen - keep sessions to one unit of work.
+
+Like cached responses, remembered responses must not be modified.
+"""
+
+import contextvars
+import threading
+
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import Hashable, Iterator, Optional
+
+import httpx
+
+from .cache import WRITE_METHODS
+from .circuit import endpoint_template
+from .singleflight import coalesce_key
+
+_session: contextvars.ContextVar[Optional["Session"]] = contextvars.ContextVar("momentum_session", default=None)
+
+
+@dataclass
+class SessionStats:
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    size: int = 0
+
+
+def _identity(url: str, base_url: str) -> tuple[str, set[str]]:
+    """The first path segment relative to `base_url` and the ids in the path and query of `url`."""
+    parsed = httpx.URL(url)
+    path = parsed.path
+    base_path = httpx.URL(base_url).path.rstrip("/")
+    if path.startswith(base_path):
+        path = path[len(base_path):]
+    segments = path.strip("/").split("/")
+    template = endpoint_template(path).strip("/").split("/")
+    ids = {segment for segment, part in zip(segments, template) if part == "{id}"}
+    ids.update(value for _, value in parsed.params.multi_items() if endpoint_template(value) == "{id}")
+    return segments[0], ids
+
+
+class Session:
+    """GET responses remembered by URL for one unit of work. Thread-safe."""
+
+    def __init__(self) -> None:
+        self._responses: dict[Hashable, tuple[httpx.Response, str, set[str]]] = {}
+        self._stats = SessionStats()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(method: str, url: str, kwargs: dict) -> Optional[Hashable]:
+        """The key a request is remembered under, or None if it is not - the same identity as request coalescing."""
+        return coalesce_key(method, url, kwargs)
+
+    def get(self, key: Hashable) -> Optional[httpx.Response]:
+        with self._lock:
+            remembered = self._responses.get(key)
+            if remembered is None:
+                self._stats.misses += 1
+                return None
+            self._stats.hits += 1
+            return remembered[0]
+
+    def put(self, key: Hashable, url: str, base_url: str, response: httpx.Response) -> None:
+        segment, ids = _identity(url, base_url)
+        with self._lock:
+            self._responses[key] = (response, segment, ids)
+
+    def invalidate_for(self, method: str, url: str, base_url: str) -> None:
+        """Forget the responses a write request to `url` may have changed."""
+        if method not in WRITE_METHODS:
+            return
+        segment, ids = _identity(url, base_url)
+        with self._lock:
+            stale = [
+                key for key, (_, other_segment, other_ids) in self._responses.items()
+                if other_segment == segment or ids & other_ids
+            ]
+            for key in stale:
+                del self._responses[key]
+            self._stats.invalidations += len(stale)
+
+    def stats(self) -> SessionStats:
+        with self._lock:
+            return replace(self._stats, size=len(self._responses))
+
+
+def current_session() -> Optional[Session]:
+    """The session of the current context, or None outside ``with session_scope():``."""
+    return _session.get()
+
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """Remember GET responses by URL for the duration of the block. A nested block starts a new session."""
+    token = _session.set(Session())
+    try:
+        yield _session.get()
+    finally:
+        _session.reset(token)
@@ -0,0 +1,147 @@
+"""
+Coalescing of identical in-flight GET requests.
+
+When a cohort job runs in parallel, many workers ask for the same resource at
+the same moment - the tag list, the same caseworker, the same taxonomy group.
+With ``coalesce=True`` the client sends an identical GET only once while it is
+in flight: the first caller makes the request and the others wait for it and
+get the same response, including its decoded JSON. Requests started after the
+response arrived are sent again (or served by the response cache).
+
+A waiting caller keeps its own deadline: it fails with DeadlineExceeded when
+its deadline passes, even if the shared request is still running. If the shared
+request times out because the first caller's deadline was shorter, the waiting
+callers with more time left send it again - coalesced among themselves - instead
+of failing with it.
+
+Requests in different priority lanes are not shared, so an interactive caller
+never waits for a request queued in the bulk lane.
+
+Like cached responses, shared responses must not be modified.
+"""
+
+import asyncio
+import threading
+
+from typing import Any, Awaitable, Callable, Hashable, Optional, TypeVar
+
+import httpx
+
+from .deadline import DeadlineExceeded, current_deadline, remaining
+
+T = TypeVar("T")
+
+
+def coalesce_key(method: str, url: str, kwargs: dict) -> Optional[Hashable]:
+    """
+    The key identical requests share, or None if the request is not coalesced.
+
+    Only GETs whose arguments are limited to params, headers and priority are
+    coalesced - other options (timeout, extensions, ...) may change the response.
+    """
+    if method != "GET" or not set(kwargs) <= {"params", "headers", "priority"}:
+        return None
+    headers = tuple(sorted((name.lower(), value) for name, value in (kwargs.get("headers") or {}).items()))
+    return str(httpx.URL(url, params=kwargs.get("params"))), headers
+
+
+def _deadline_exceeded() -> DeadlineExceeded:
+    return DeadlineExceeded("Deadline overskredet mens et identisk kald var i gang")
+
+
+def _outlived(error: BaseException, deadline: Optional[float]) -> bool:
+    """Whether `error` is a timeout caused by a deadline (`deadline`) shorter than the current one."""
+    if not isinstance(error, httpx.TimeoutException) or deadline is None:
+        return False
+    own = current_deadline()
+    return own is None or own > deadline
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.deadline = current_deadline()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Runs one call per key at a time and shares its result with concurrent callers. Thread-safe."""
+
+    def __init__(self) -> None:
+        self.shared = 0
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Call `fn`, or wait for the call already in flight for `key` and return its result."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            left = remaining()
+            if not call.done.wait(None if left is None else max(0.0, left)):
+                raise _deadline_exceeded()
+            if call.error is not None:
+                if _outlived(call.error, call.deadline):
+                    return self.do(key, fn)
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class AsyncSingleFlight:
+    """
+    Async version of SingleFlight.
+
+    The call runs in a task of its own, so cancelling one caller - the first
+    included - does not cancel it for the others.
+    """
+
+    def __init__(self) -> None:
+        self.shared = 0
+        self._calls: dict[Hashable, tuple[asyncio.Task, Optional[float]]] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await `fn()`, or the call already in flight for `key`, and return its result."""
+        call = self._calls.get(key)
+        leader = call is None
+        if leader:
+            task = asyncio.ensure_future(fn())
+            call = self._calls[key] = (task, current_deadline())
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.shared += 1
+        task, deadline = call
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), remaining())
+        except asyncio.TimeoutError:
+            if task.done():
+                raise
+            raise _deadline_exceeded() from None
+        except httpx.TimeoutException as exc:
+            if not leader and _outlived(exc, deadline):
+                return await self.do(key, fn)
+            raise
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key, (None,))[0] is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the error as retrieved - the callers that were still waiting have seen it
+            task.exception()
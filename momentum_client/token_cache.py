@@ -0,0 +1,135 @@
+"""
+Cross-process on-disk cache of OAuth2 tokens.
+
+Short-lived robot processes on the same host can share one token per
+(client_id, resource) instead of each making a client credentials call to the
+token endpoint at startup. The cache file is only readable by the current user
+and all reads and writes happen under an exclusive file lock, so at most one
+process fetches a new token when the cached one is close to expiry.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from ._filelock import async_file_lock, ensure_private_dir, file_lock, write_private_file
+from .auth import DEFAULT_REFRESH_MARGIN, _expires_at
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_CACHE_PATH = Path.home() / ".momentum_client" / "tokens.json"
+
+
+class FileTokenCache:
+    """
+    Token cache stored in a file-locked JSON file with permissions 0600.
+
+    Args:
+        path: Location of the cache file (default: ~/.momentum_client/tokens.json)
+        min_remaining: Cached tokens with fewer seconds than this left are not reused
+    """
+
+    def __init__(
+        self,
+        path: Optional[str | Path] = None,
+        min_remaining: float = DEFAULT_REFRESH_MARGIN,
+    ) -> None:
+        self.path = Path(path) if path is not None else DEFAULT_TOKEN_CACHE_PATH
+        self.min_remaining = min_remaining
+        self._lock_path = self.path.with_name(self.path.name + ".lock")
+
+    @staticmethod
+    def key(client_id: str, resource: str) -> str:
+        """Cache key for a (client_id, resource) pair."""
+        return hashlib.sha256(f"{client_id}\0{resource}".encode("utf-8")).hexdigest()
+
+    def get_or_fetch(
+        self,
+        key: str,
+        fetch_token: Callable[[], dict],
+        min_remaining: Optional[float] = None,
+    ) -> dict:
+        """
+        Return the cached token for `key`, or fetch and store a new one.
+
+        The file lock is held while fetching, so concurrent processes wait for
+        the token fetched by the first one instead of fetching their own.
+        """
+        ensure_private_dir(self.path.parent)
+        with file_lock(self._lock_path):
+            entries = self._read()
+            token = entries.get(key)
+            if token is not None and self._is_usable(token, min_remaining):
+                return token
+
+            token = dict(fetch_token())
+            token["expires_at"] = _expires_at(token)
+            entries[key] = token
+            self._write(entries)
+            return token
+
+    async def aget_or_fetch(
+        self,
+        key: str,
+        fetch_token: Callable[[], Awaitable[dict]],
+        min_remaining: Optional[float] = None,
+    ) -> dict:
+        """Async version of get_or_fetch - the file lock is held while `fetch_token` is awaited."""
+        await asyncio.to_thread(ensure_private_dir, self.path.parent)
+        async with async_file_lock(self._lock_path):
+            entries = await asyncio.to_thread(self._read)
+            token = entries.get(key)
+            if token is not None and self._is_usable(token, min_remaining):
+                return token
+
+            token = dict(await fetch_token())
+            token["expires_at"] = _expires_at(token)
+            entries[key] = token
+            await asyncio.to_thread(self._write, entries)
+            return token
+
+    def load(self, key: str, min_remaining: Optional[float] = None) -> Optional[dict]:
+        """Return the cached token for `key` if it has enough lifetime left."""
+        if not self.path.exists():
+            return None
+        with file_lock(self._lock_path):
+            token = self._read().get(key)
+        return token if token is not None and self._is_usable(token, min_remaining) else None
+
+    def store(self, key: str, token: dict) -> None:
+        """Store a token for `key`."""
+        ensure_private_dir(self.path.parent)
+        token = dict(token)
+        token["expires_at"] = _expires_at(token)
+        with file_lock(self._lock_path):
+            entries = self._read()
+            entries[key] = token
+            self._write(entries)
+
+    def _is_usable(self, token: dict, min_remaining: Optional[float]) -> bool:
+        if min_remaining is None:
+            min_remaining = self.min_remaining
+        return float(token.get("expires_at", 0)) - time.time() > min_remaining
+
+    def _read(self) -> dict:
+        try:
+            entries = json.loads(self.path.read_bytes())
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            logger.warning("Token-cachen %s kunne ikke læses og bliver genskabt", self.path)
+            return {}
+        # Drop tokens that have expired, so the file does not grow over time
+        now = time.time()
+        return {
+            key: token for key, token in entries.items()
+            if isinstance(token, dict) and float(token.get("expires_at", 0)) > now
+        }
+
+    def _write(self, entries: dict) -> None:
+        write_private_file(self.path, json.dumps(entries).encode("utf-8"))
@@ -0,0 +1,142 @@
+"""
+HTTP transport configuration for the Momentum clients.
+
+Timeouts, connection pool size, keep-alive and HTTP/2 are collected in one
+TransportConfig, so the pool can be sized for concurrent workloads. All clients
+share one SSL context built from the bundled CA chain, so the certificates are
+only loaded once per process.
+"""
+
+import ssl
+
+from dataclasses import dataclass, field
+from functools import cache
+from pathlib import Path
+from typing import Any, Mapping, Optional
+
+import httpx
+
+from .circuit import AsyncCircuitBreakerTransport, CircuitBreakerPolicy, CircuitBreakerTransport, matches_endpoint
+from .hedging import AsyncHedgingTransport, HedgePolicy, HedgingTransport
+from .ratelimit import AsyncRateLimitTransport, RateLimit, RateLimitTransport
+from .retry import AsyncRetryTransport, RetryPolicy, RetryTransport
+
+CA_BUNDLE = Path(__file__).parent / "certs" / "digicert_chain.pem"
+COMBINED_CA = Path(__file__).parent / "certs" / "combined_ca.pem"
+
+
+@cache
+def ssl_context() -> ssl.SSLContext:
+    """SSL context trusting combined_ca.pem, shared by all clients in the process."""
+    return ssl.create_default_context(cafile=str(COMBINED_CA))
+
+
+@dataclass(frozen=True)
+class TransportConfig:
+    """
+    Transport settings for MomentumClient and AsyncMomentumClient.
+
+    Args:
+        connect_timeout: Seconds to wait for a connection to be established
+        read_timeout: Seconds to wait for a chunk of the response
+        write_timeout: Seconds to wait for a chunk of the request to be sent
+        pool_timeout: Seconds to wait for a free connection in the pool
+        max_connections: Maximum number of concurrent connections
+        max_keepalive_connections: Maximum number of idle connections kept open
+        keepalive_expiry: Seconds an idle connection is kept open for reuse
+        http2: Multiplex requests over HTTP/2 (requires `pip install httpx[http2]`)
+        transport: Custom httpx transport, e.g. httpx.MockTransport in tests.
+            Must match the client: httpx.BaseTransport for MomentumClient,
+            httpx.AsyncBaseTransport for AsyncMomentumClient.
+        retry: Retry policy for transient failures (None: no retries)
+        rate_limit: Request rate and adaptive concurrency limit shared by all
+            requests of the client, including retries (None: unlimited)
+        circuit_breaker: Fail fast on endpoints that keep failing or timing out (None: off)
+        hedging: Send a second GET when the first is slower than usual for its endpoint (None: off)
+        endpoint_timeouts: Timeout profiles per endpoint, relative to the base URL with ids
+            as {id}, e.g. {"tags": 5, "punits/searchproductionunits": 120}. A number
+            replaces the read and write timeout, an httpx.Timeout replaces all of them.
+    """
+
+    connect_timeout: float = 10.0
+    read_timeout: float = 30.0
+    write_timeout: float = 30.0
+    pool_timeout: float = 10.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    transport: Optional[httpx.BaseTransport | httpx.AsyncBaseTransport] = None
+    retry: Optional[RetryPolicy] = field(default_factory=RetryPolicy)
+    rate_limit: Optional[RateLimit] = None
+    circuit_breaker: Optional[CircuitBreakerPolicy] = None
+    hedging: Optional[HedgePolicy] = None
+    endpoint_timeouts: Mapping[str, float | httpx.Timeout] = field(default_factory=dict, hash=False)
+
+    @classmethod
+    def from_timeout(cls, timeout: float) -> "TransportConfig":
+        """Default settings with the given read and write timeout."""
+        return cls(read_timeout=timeout, write_timeout=timeout)
+
+    @property
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.write_timeout,
+            pool=self.pool_timeout,
+        )
+
+    @property
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def timeout_for(self, path: str) -> Optional[httpx.Timeout]:
+        """The timeout profile matching a URL path, or None to use the client's timeout."""
+        if not self.endpoint_timeouts:
+            return None
+        for endpoint, timeout in self.endpoint_timeouts.items():
+            if matches_endpoint(path, endpoint):
+                if isinstance(timeout, httpx.Timeout):
+                    return timeout
+                return httpx.Timeout(connect=self.connect_timeout, read=timeout, write=timeout, pool=self.pool_timeout)
+        return None
+
+    def client_kwargs(self, asynchronous: bool = False, rate_limit_key: Optional[str] = None) -> dict[str, Any]:
+        """
+        Keyword arguments for httpx.Client, or httpx.AsyncClient if `asynchronous`.
+
+        `rate_limit_key` identifies the rate shared with other processes when rate_limit.shared is set.
+        """
+        return {
+            "timeout": self.timeout,
+            "limits": self.limits,
+            "http2": self.http2,
+            "verify": ssl_context(),
+            "transport": self._transport(asynchronous, rate_limit_key),
+        }
+
+    def _transport(self, asynchronous: bool, rate_limit_key: Optional[str]) -> httpx.BaseTransport | httpx.AsyncBaseTransport:
+        transport = self.transport
+        if transport is None:
+            transport_class = httpx.AsyncHTTPTransport if asynchronous else httpx.HTTPTransport
+            transport = transport_class(verify=ssl_context(), http2=self.http2, limits=self.limits)
+        if self.rate_limit is not None:
+            rate_limit_class = AsyncRateLimitTransport if asynchronous else RateLimitTransport
+            transport = rate_limit_class(transport, self.rate_limit, rate_limit_key)
+        if self.hedging is not None:
+            if asynchronous:
+                transport = AsyncHedgingTransport(transport, self.hedging)
+            else:
+                transport = HedgingTransport(transport, self.hedging, max_workers=self.max_connections)
+        if self.retry is not None:
+            retry_class = AsyncRetryTransport if asynchronous else RetryTransport
+            transport = retry_class(transport, self.retry)
+        if self.circuit_breaker is not None:
+            breaker_class = AsyncCircuitBreakerTransport if asynchronous else CircuitBreakerTransport
+            transport = breaker_class(transport, self.circuit_breaker)
+        return transport
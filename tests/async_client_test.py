@@ -0,0 +1,36 @@
+# Fixtures are automatically loaded from conftest.py
+# De asynkrone tests kører hver i deres egen event loop via asyncio.run
+
+import asyncio
+from momentum_client.manager import AsyncMomentumClientManager
+
+
+def test_async_hent_borger(momentum_credentials, test_cpr):
+    async def main():
+        async with AsyncMomentumClientManager(**momentum_credentials) as momentum:
+            return await momentum.borgere.hent_borger(test_cpr)
+
+    response = asyncio.run(main())
+    assert response is not None
+
+def test_async_hent_borger_ikke_fundet(momentum_credentials):
+    async def main():
+        async with AsyncMomentumClientManager(**momentum_credentials) as momentum:
+            return await momentum.borgere.hent_borger("0000000000")
+
+    response = asyncio.run(main())
+    assert response is None
+
+def test_async_samtidige_forespørgsler(momentum_credentials):
+    async def main():
+        async with AsyncMomentumClientManager(**momentum_credentials) as momentum:
+            return await asyncio.gather(
+                momentum.markeringer.hent_markering(),
+                momentum.taksonomier.find_taksonomi_gruppe("CAUSE_TYPE"),
+                momentum.momentum_client.søg(søgeterm="Odense", kategori="Company", ønsket_antal=500),
+            )
+
+    markering, taksonomi_gruppe, søgeresultat = asyncio.run(main())
+    assert markering.get("title") == "ØF-JC-AC-IT-emnebank"
+    assert taksonomi_gruppe["code"] == "CAUSE_TYPE"
+    assert søgeresultat is not None
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+
+import httpx
+
+from momentum_client.auth import AsyncTokenManager, BearerTokenAuth, TokenManager
+
+
+def _token(navn: str, levetid: float) -> dict:
+    return {"access_token": navn, "expires_at": time.time() + levetid}
+
+
+def test_token_hentes_kun_én_gang_ved_samtidigt_udløb():
+    kald = []
+
+    def hent_token():
+        kald.append(1)
+        time.sleep(0.05)
+        return _token(f"token-{len(kald)}", 3600)
+
+    tokens = TokenManager(hent_token)
+    resultater = []
+    tråde = [threading.Thread(target=lambda: resultater.append(tokens.access_token())) for _ in range(20)]
+    for tråd in tråde:
+        tråd.start()
+    for tråd in tråde:
+        tråd.join()
+
+    assert len(kald) == 1
+    assert set(resultater) == {"token-1"}
+
+
+def test_token_fornyes_før_udløb_uden_at_blokere_andre():
+    kald = []
+    fornyelse_startet = threading.Event()
+    fortsæt = threading.Event()
+
+    def hent_token():
+        kald.append(1)
+        if len(kald) == 1:
+            # Første token er inden for fornyelsesmarginen men stadig gyldigt
+            return _token("gammelt", 60)
+        fornyelse_startet.set()
+        fortsæt.wait(timeout=5)
+        return _token("nyt", 3600)
+
+    tokens = TokenManager(hent_token, refresh_margin=300)
+    assert tokens.access_token() == "gammelt"
+
+    fornyer = threading.Thread(target=tokens.access_token)
+    fornyer.start()
+    assert fornyelse_startet.wait(timeout=5)
+
+    # Mens fornyelsen kører, får andre tråde straks det nuværende token
+    assert tokens.access_token() == "gammelt"
+
+    fortsæt.set()
+    fornyer.join()
+    assert tokens.access_token() == "nyt"
+    assert len(kald) == 2
+
+
+def test_fejlet_fornyelse_bruger_gyldigt_token():
+    svar = [_token("gammelt", 60)]
+
+    def hent_token():
+        if svar:
+            return svar.pop()
+        raise RuntimeError("token endpoint nede")
+
+    tokens = TokenManager(hent_token, refresh_margin=300)
+    assert tokens.access_token() == "gammelt"
+    assert tokens.access_token() == "gammelt"
+
+
+def test_async_token_hentes_kun_én_gang():
+    kald = []
+
+    async def hent_token():
+        kald.append(1)
+        await asyncio.sleep(0.05)
+        return _token(f"token-{len(kald)}", 3600)
+
+    async def main():
+        tokens = AsyncTokenManager(hent_token)
+        return await asyncio.gather(*(tokens.access_token() for _ in range(20)))
+
+    assert set(asyncio.run(main())) == {"token-1"}
+    assert len(kald) == 1
+
+
+def test_401_fornyer_token_og_sender_igen():
+    udstedte = iter(["første", "andet"])
+    tokens = TokenManager(lambda: _token(next(udstedte), 3600))
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.headers["Authorization"] == "Bearer første":
+            return httpx.Response(401)
+        return httpx.Response(200, json={"ok": True})
+
+    with httpx.Client(transport=httpx.MockTransport(handler), auth=BearerTokenAuth(tokens)) as client:
+        response = client.get("https://momentum.test/api/tags")
+
+    assert response.status_code == 200
+    assert tokens.access_token() == "andet"
@@ -0,0 +1,125 @@
+import os
+import stat
+import time
+
+import httpx
+
+from momentum_client.cache import CacheConfig, CachePolicy, ResponseCache
+from momentum_client.cache_store import SqliteCacheStore
+from momentum_client.client import MomentumClient
+from momentum_client.codec import StdlibCodec
+from momentum_client.transport import TransportConfig
+
+TAGS = [{"id": "t1", "title": "ØF-JC-AC-IT-emnebank"}]
+URL = httpx.URL("https://momentum.test/api/tags")
+
+
+def _klient(forespørgsler: list, store: SqliteCacheStore) -> MomentumClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/token"):
+            return httpx.Response(200, json={"access_token": "abc", "token_type": "Bearer", "expires_in": 3600})
+        forespørgsler.append(request.url.path)
+        return httpx.Response(200, json=TAGS, headers={"ETag": '"v1"'})
+
+    return MomentumClient(
+        base_url="https://momentum.test/api",
+        client_id="klient",
+        client_secret="hemmelighed",
+        api_key="apikey",
+        resource="ressource",
+        transport_config=TransportConfig(transport=httpx.MockTransport(handler)),
+        cache_config=CacheConfig(store=store),
+    )
+
+
+def test_svar_overlever_til_næste_kørsel(tmp_path):
+    forespørgsler = []
+    store = SqliteCacheStore(tmp_path / "cache.sqlite")
+    with _klient(forespørgsler, store) as client:
+        client.get("/tags")
+
+    with _klient(forespørgsler, SqliteCacheStore(tmp_path / "cache.sqlite")) as client:
+        svar = client.get("/tags")
+
+    assert forespørgsler == ["/api/tags"]
+    assert svar.json() == TAGS
+    assert svar.headers["ETag"] == '"v1"'
+
+
+def test_skrivning_sletter_gemte_svar(tmp_path):
+    forespørgsler = []
+    with _klient(forespørgsler, SqliteCacheStore(tmp_path / "cache.sqlite")) as client:
+        client.get("/tags")
+        client.put("/tags/t1", json={})
+
+    with _klient(forespørgsler, SqliteCacheStore(tmp_path / "cache.sqlite")) as client:
+        client.get("/tags")
+
+    assert forespørgsler.count("/api/tags") == 2
+
+
+def test_udløbne_svar_indlæses_som_forældede(tmp_path):
+    sti = tmp_path / "cache.sqlite"
+    SqliteCacheStore(sti).save("tags", str(URL), httpx.Response(200, json=TAGS), expires_at=0, max_entries=1)
+
+    response_cache = ResponseCache({"tags": CachePolicy(ttl=60)}, "https://momentum.test/api", SqliteCacheStore(sti), StdlibCodec())
+
+    assert response_cache.get(URL) is None
+    response_cache = ResponseCache({"tags": CachePolicy(ttl=60, stale_while_revalidate=1e12)}, "https://momentum.test/api", SqliteCacheStore(sti), StdlibCodec())
+    assert response_cache.get(URL).json() == TAGS
+    assert response_cache.claim_refresh(URL)
+
+
+def test_antal_gemte_svar_er_begrænset(tmp_path):
+    store = SqliteCacheStore(tmp_path / "cache.sqlite")
+    for aktør in range(6):
+        store.save("actors/{id}/details", f"https://momentum.test/api/actors/{aktør}/details", httpx.Response(200, json={}), 1e12, max_entries=3)
+
+    # Der ryddes op for hver max_entries gemte svar
+    assert store._execute("SELECT COUNT(*) FROM responses")[0][0] == 3
+    assert store.load("https://momentum.test/api/actors/2/details") is None
+    assert store.load("https://momentum.test/api/actors/5/details") is not None
+
+
+def test_filen_kan_kun_læses_af_brugeren(tmp_path):
+    sti = tmp_path / "cache.sqlite"
+    SqliteCacheStore(sti).clear()
+
+    assert stat.S_IMODE(os.stat(sti).st_mode) == 0o600
+
+
+def test_ulæselig_fil_giver_cache_miss(tmp_path):
+    sti = tmp_path / "cache.sqlite"
+    sti.write_bytes(b"ikke en database" * 100)
+
+    assert SqliteCacheStore(sti).load(str(URL)) is None
+
+
+def test_læsning_fra_disk_holder_ikke_andre_opslag_tilbage(tmp_path):
+    import threading
+
+    class LangsomStore(SqliteCacheStore):
+        def __init__(self, *args):
+            super().__init__(*args)
+            self.startet = threading.Event()
+            self.fortsæt = threading.Event()
+
+        def load(self, url):
+            self.startet.set()
+            self.fortsæt.wait(timeout=5)
+            return super().load(url)
+
+    store = LangsomStore(tmp_path / "cache.sqlite")
+    response_cache = ResponseCache({"tags": CachePolicy(ttl=60), "taxonomies": CachePolicy(ttl=60)}, "https://momentum.test/api", store, StdlibCodec())
+    response_cache.put(URL, httpx.Response(200, json=TAGS))
+
+    ukendt = threading.Thread(target=response_cache.get, args=(httpx.URL("https://momentum.test/api/taxonomies"),))
+    ukendt.start()
+    store.startet.wait()
+    try:
+        start = time.monotonic()
+        assert response_cache.get(URL).json() == TAGS
+        assert time.monotonic() - start < 1
+    finally:
+        store.fortsæt.set()
+        ukendt.join()
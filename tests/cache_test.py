@@ -0,0 +1,263 @@
+import asyncio
+
+import httpx
+
+from momentum_client import cache
+from momentum_client.cache import CacheConfig, CachePolicy, ResponseCache
+from momentum_client.client import AsyncMomentumClient, MomentumClient
+from momentum_client.transport import TransportConfig
+
+TAGS = [{"id": "t1", "title": "ØF-JC-AC-IT-emnebank"}, {"id": "t2", "title": "Anden"}]
+
+
+def _handler(forespørgsler: list):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/token"):
+            return httpx.Response(200, json={"access_token": "abc", "token_type": "Bearer", "expires_in": 3600})
+        forespørgsler.append((request.method, request.url.path))
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json=TAGS)
+        return httpx.Response(200, json={"sti": request.url.path})
+    return handler
+
+
+def _klient(handler, klasse=MomentumClient, cache_config=CacheConfig()):
+    return klasse(
+        base_url="https://momentum.test/api",
+        client_id="klient",
+        client_secret="hemmelighed",
+        api_key="apikey",
+        resource="ressource",
+        transport_config=TransportConfig(transport=httpx.MockTransport(handler)),
+        cache_config=cache_config,
+    )
+
+
+def test_tags_hentes_én_gang_ved_mange_opslag():
+    forespørgsler = []
+    client = _klient(_handler(forespørgsler))
+
+    for _ in range(100):
+        assert client.get("/tags").json() == TAGS
+
+    assert forespørgsler == [("GET", "/api/tags")]
+    stats = client.cache.stats()
+    assert (stats.hits, stats.misses, stats.size) == (99, 1, 1)
+
+
+def test_kun_konfigurerede_endpoints_caches():
+    forespørgsler = []
+    client = _klient(_handler(forespørgsler))
+
+    client.get("/citizens/0101901234/tags")
+    client.get("/citizens/0101901234/tags")
+    client.get("/actors/42/details")
+    client.get("/actors/42/details")
+
+    assert forespørgsler.count(("GET", "/api/citizens/0101901234/tags")) == 2
+    assert forespørgsler.count(("GET", "/api/actors/42/details")) == 1
+
+
+def test_ttl_udløber(monkeypatch):
+    nu = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: nu[0])
+    forespørgsler = []
+    client = _klient(_handler(forespørgsler), cache_config=CacheConfig({"tags": CachePolicy(ttl=60)}))
+
+    client.get("/tags")
+    nu[0] += 61
+    client.get("/tags")
+
+    assert len(forespørgsler) == 2
+
+
+def test_lru_fjerner_ældste():
+    forespørgsler = []
+    client = _klient(_handler(forespørgsler), cache_config=CacheConfig({"actors/{id}/details": CachePolicy(ttl=60, max_entries=2)}))
+
+    for aktør in ("1", "2", "1", "3", "1", "2"):
+        client.get(f"/actors/{aktør}/details")
+
+    # 2 blev fjernet da 3 kom til, fordi 1 var brugt senere
+    assert [sti for _, sti in forespørgsler] == ["/api/actors/1/details", "/api/actors/2/details", "/api/actors/3/details", "/api/actors/2/details"]
+    assert client.cache.stats().evictions == 2
+
+
+def test_skrivning_til_samme_ressource_invaliderer():
+    forespørgsler = []
+    client = _klient(_handler(forespørgsler))
+
+    client.get("/tags")
+    client.post("/tagassignments?referenceId=1", json={})
+    client.get("/tags")
+    client.put("/tags/t1", json={})
+    client.get("/tags")
+
+    assert forespørgsler.count(("GET", "/api/tags")) == 2
+    assert client.cache.stats().invalidations == 1
+
+
+def test_idempotent_post_invaliderer_ikke():
+    cache_ = ResponseCache({"tags": CachePolicy(ttl=60)}, "https://momentum.test/api")
+    url = httpx.URL("https://momentum.test/api/tags")
+    cache_.put(url, httpx.Response(200, json=[]))
+
+    cache_.invalidate_for("GET", url)
+    assert cache_.get(url) is not None
+    cache_.invalidate_for("DELETE", httpx.URL("https://momentum.test/api/tags/1"))
+    assert cache_.get(url) is None
+
+
+def test_warmup_fylder_cachen():
+    forespørgsler = []
+    client = _klient(_handler(forespørgsler))
+
+    client.warmup(connections=0, preload=["/tags"])
+    client.get("/tags")
+
+    assert forespørgsler.count(("GET", "/api/tags")) == 1
+
+
+def test_async_klient_bruger_cachen():
+    forespørgsler = []
+
+    async def main():
+        client = _klient(_handler(forespørgsler), AsyncMomentumClient)
+        for _ in range(3):
+            assert (await client.get("/tags")).json() == TAGS
+
+    asyncio.run(main())
+    assert forespørgsler == [("GET", "/api/tags")]
+
+
+def _etag_handler(forespørgsler: list, ændret: list):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/token"):
+            return httpx.Response(200, json={"access_token": "abc", "token_type": "Bearer", "expires_in": 3600})
+        forespørgsler.append(request.headers.get("If-None-Match"))
+        etag = f'"v{len(ændret)}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, json=TAGS, headers={"ETag": etag})
+    return handler
+
+
+def test_udløbet_svar_genvalideres_med_etag(monkeypatch):
+    forespørgsler = []
+    client = _klient(_etag_handler(forespørgsler, []))
+    nu = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: nu[0])
+
+    første = client.get("/tags")
+    nu[0] += 301
+    andet = client.get("/tags")
+    client.get("/tags")
+
+    assert forespørgsler == [None, '"v0"']
+    assert andet is første
+    assert andet.json() == TAGS
+    stats = client.cache.stats()
+    assert stats.revalidations == 1
+    assert stats.bytes_saved == len(første.content)
+
+
+def test_ændret_svar_hentes_igen(monkeypatch):
+    forespørgsler = []
+    ændret = []
+    client = _klient(_etag_handler(forespørgsler, ændret))
+    nu = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: nu[0])
+
+    client.get("/tags")
+    ændret.append(True)
+    nu[0] += 301
+    svar = client.get("/tags")
+
+    assert svar.status_code == 200
+    assert svar.headers["ETag"] == '"v1"'
+    assert client.cache.stats().revalidations == 0
+
+
+def test_last_modified_sendes_som_if_modified_since():
+    svar = httpx.Response(200, json=TAGS, headers={"Last-Modified": "Wed, 01 Oct 2025 10:00:00 GMT"})
+    response_cache = ResponseCache({"tags": CachePolicy(ttl=0)}, "https://momentum.test/api")
+    url = httpx.URL("https://momentum.test/api/tags")
+    response_cache.put(url, svar)
+
+    assert response_cache.get(url) is None
+    assert response_cache.conditional_headers(url) == {"If-Modified-Since": "Wed, 01 Oct 2025 10:00:00 GMT"}
+
+
+def test_async_klient_genvaliderer(monkeypatch):
+    forespørgsler = []
+    nu = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: nu[0])
+
+    async def main():
+        async with _klient(_etag_handler(forespørgsler, []), AsyncMomentumClient) as client:
+            første = await client.get("/tags")
+            nu[0] += 301
+            return første, await client.get("/tags")
+
+    første, andet = asyncio.run(main())
+    assert andet is første
+    assert forespørgsler == [None, '"v0"']
+
+
+def test_forældet_svar_bruges_mens_det_fornyes_i_baggrunden(monkeypatch):
+    forespørgsler = []
+    nu = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: nu[0])
+    client = _klient(_handler(forespørgsler), cache_config=CacheConfig({"tags": CachePolicy(ttl=60, stale_while_revalidate=600)}))
+
+    første = client.get("/tags")
+    nu[0] += 61
+    andet = client.get("/tags")
+    client._refresh_pool.shutdown(wait=True)
+
+    assert andet is første
+    assert forespørgsler == [("GET", "/api/tags"), ("GET", "/api/tags")]
+    stats = client.cache.stats()
+    assert (stats.hits, stats.stale_hits, stats.misses) == (0, 1, 1)
+
+
+def test_for_gammelt_svar_hentes_på_ny(monkeypatch):
+    forespørgsler = []
+    nu = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: nu[0])
+    client = _klient(_handler(forespørgsler), cache_config=CacheConfig({"tags": CachePolicy(ttl=60, stale_while_revalidate=600)}))
+
+    client.get("/tags")
+    nu[0] += 661
+    client.get("/tags")
+
+    assert client.cache.stats().misses == 2
+
+
+def test_kun_én_fornyelse_ad_gangen():
+    response_cache = ResponseCache({"tags": CachePolicy(ttl=0, stale_while_revalidate=60)}, "https://momentum.test/api")
+    url = httpx.URL("https://momentum.test/api/tags")
+    response_cache.put(url, httpx.Response(200, json=TAGS))
+
+    assert response_cache.get(url) is not None
+    assert response_cache.claim_refresh(url)
+    assert not response_cache.claim_refresh(url)
+    response_cache.release_refresh(url)
+    assert response_cache.claim_refresh(url)
+
+
+def test_async_klient_fornyer_i_baggrunden(monkeypatch):
+    forespørgsler = []
+    nu = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: nu[0])
+
+    async def main():
+        async with _klient(_handler(forespørgsler), AsyncMomentumClient, CacheConfig({"tags": CachePolicy(ttl=60, stale_while_revalidate=600)})) as client:
+            første = await client.get("/tags")
+            nu[0] += 61
+            assert await client.get("/tags") is første
+            await asyncio.gather(*client._refresh_tasks)
+            assert (await client.get("/tags")) is not første
+
+    asyncio.run(main())
+    assert len(forespørgsler) == 2
@@ -0,0 +1,152 @@
+import httpx
+import pytest
+
+from momentum_client import circuit
+from momentum_client.circuit import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreakerPolicy,
+    CircuitBreakerTransport,
+    CircuitOpenError,
+    endpoint_template,
+)
+from momentum_client.deadline import DeadlineExceeded
+from momentum_client.transport import TransportConfig
+
+
+class _Ur:
+    def __init__(self) -> None:
+        self.nu = 1000.0
+
+    def monotonic(self) -> float:
+        return self.nu
+
+
+@pytest.fixture
+def ur(monkeypatch):
+    ur = _Ur()
+    monkeypatch.setattr(circuit.time, "monotonic", ur.monotonic)
+    return ur
+
+
+def _klient(handler, policy: CircuitBreakerPolicy = None):
+    transport = CircuitBreakerTransport(
+        httpx.MockTransport(handler),
+        policy or CircuitBreakerPolicy(window_size=4, min_calls=4, open_duration=30),
+    )
+    return httpx.Client(transport=transport), transport.breaker
+
+
+def test_endpoint_skabelon_erstatter_id_er():
+    assert endpoint_template("/api/citizens/0101901234/tags") == "/api/citizens/{id}/tags"
+    assert endpoint_template("/api/actors/3f2b8c1e-0000-4a4a-9a9a-0123456789ab/details") == "/api/actors/{id}/details"
+    assert endpoint_template("/api/citizensearch") == "/api/citizensearch"
+
+
+def test_kredsløbet_åbner_og_afviser_uden_at_sende(ur):
+    forespørgsler = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        forespørgsler.append(request)
+        return httpx.Response(503 if "citizensearch" in request.url.path else 200)
+
+    client, breaker = _klient(handler)
+    for _ in range(4):
+        client.post("https://momentum.test/api/citizensearch", json={})
+
+    assert breaker.state("/api/citizensearch") == OPEN
+    with pytest.raises(CircuitOpenError) as fejl:
+        client.post("https://momentum.test/api/citizensearch", json={})
+    assert fejl.value.template == "/api/citizensearch"
+    assert len(forespørgsler) == 4
+
+    # Andre endpoints påvirkes ikke
+    assert client.get("https://momentum.test/api/citizens/0101901234").status_code == 200
+
+
+def test_halvåben_prøve_lukker_kredsløbet(ur):
+    svar = iter([500] * 4 + [200])
+    client, breaker = _klient(lambda request: httpx.Response(next(svar)))
+    for _ in range(4):
+        client.get("https://momentum.test/api/tags")
+    assert breaker.state("/api/tags") == OPEN
+
+    ur.nu += 31
+    assert client.get("https://momentum.test/api/tags").status_code == 200
+    assert breaker.state("/api/tags") == CLOSED
+
+
+def test_fejlet_prøve_åbner_igen(ur):
+    client, breaker = _klient(lambda request: httpx.Response(500))
+    for _ in range(4):
+        client.get("https://momentum.test/api/tags")
+
+    ur.nu += 31
+    client.get("https://momentum.test/api/tags")
+    assert breaker.state("/api/tags") == OPEN
+    with pytest.raises(CircuitOpenError):
+        client.get("https://momentum.test/api/tags")
+
+
+def test_kun_én_prøve_ad_gangen(ur):
+    client, breaker = _klient(lambda request: httpx.Response(500))
+    for _ in range(4):
+        client.get("https://momentum.test/api/tags")
+
+    ur.nu += 31
+    assert breaker.before_call("/api/tags") is None
+    assert breaker.state("/api/tags") == HALF_OPEN
+    assert breaker.before_call("/api/tags") is not None
+
+
+def test_langsomme_kald_åbner_kredsløbet(ur):
+    def handler(request: httpx.Request) -> httpx.Response:
+        ur.nu += 20
+        return httpx.Response(200)
+
+    client, breaker = _klient(handler, CircuitBreakerPolicy(window_size=4, min_calls=4, slow_call_duration=10))
+    for _ in range(4):
+        client.get("https://momentum.test/api/search")
+
+    assert breaker.state("/api/search") == OPEN
+
+
+def test_timeouts_tæller_som_fejl(ur):
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ReadTimeout("timeout", request=request)
+
+    client, breaker = _klient(handler)
+    for _ in range(4):
+        with pytest.raises(httpx.ReadTimeout):
+            client.get("https://momentum.test/api/search")
+
+    assert breaker.state("/api/search") == OPEN
+
+
+
+def test_overskredet_deadline_og_andre_fejl_tæller_ikke(ur):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("deadline"):
+            raise DeadlineExceeded("deadline", request=request)
+        raise ValueError("fejl i klienten")
+
+    client, breaker = _klient(handler)
+    for _ in range(4):
+        with pytest.raises(DeadlineExceeded):
+            client.get("https://momentum.test/api/deadline")
+        with pytest.raises(ValueError):
+            client.get("https://momentum.test/api/andet")
+
+    assert breaker.state("/api/deadline") == CLOSED
+    assert breaker.state("/api/andet") == CLOSED
+    assert not breaker._circuits["/api/deadline"].calls
+
+def test_transportconfig_lægger_circuit_breaker_yderst():
+    config = TransportConfig(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200)),
+        circuit_breaker=CircuitBreakerPolicy(),
+    )
+
+    assert isinstance(config.client_kwargs()["transport"], CircuitBreakerTransport)
+    assert TransportConfig().circuit_breaker is None
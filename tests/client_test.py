@@ -0,0 +1,104 @@
+import httpx
+
+from momentum_client.client import MomentumClient
+from momentum_client.manager import MomentumClientManager
+from momentum_client.transport import TransportConfig, ssl_context
+
+
+def _klient(handler) -> MomentumClient:
+    return MomentumClient(
+        base_url="https://momentum.test/api",
+        client_id="klient",
+        client_secret="hemmelighed",
+        api_key="apikey",
+        resource="ressource",
+        transport_config=TransportConfig(transport=httpx.MockTransport(handler)),
+    )
+
+
+def _handler(forespørgsler: list):
+    def handler(request: httpx.Request) -> httpx.Response:
+        forespørgsler.append(request)
+        if request.url.path.endswith("/token"):
+            return httpx.Response(200, json={"access_token": "abc", "token_type": "Bearer", "expires_in": 3600})
+        if request.method == "HEAD":
+            return httpx.Response(404)
+        return httpx.Response(200, json={"sti": request.url.path})
+    return handler
+
+
+def test_oprettelse_laver_ingen_netværkskald(monkeypatch):
+    def ingen_netværk(*args, **kwargs):
+        raise AssertionError("netværkskald under oprettelse")
+
+    monkeypatch.setattr(httpx.HTTPTransport, "handle_request", ingen_netværk)
+    _klient(ingen_netværk)
+
+
+def test_warmup_henter_token_og_referencedata():
+    forespørgsler = []
+    client = _klient(_handler(forespørgsler))
+
+    data = client.warmup(connections=2, preload=["/tags", "/taxonomies"])
+
+    assert data == {"/tags": {"sti": "/api/tags"}, "/taxonomies": {"sti": "/api/taxonomies"}}
+    metoder = sorted(r.method for r in forespørgsler if not r.url.path.endswith("/token"))
+    assert metoder == ["GET", "GET", "HEAD", "HEAD"]
+    assert sum(r.url.path.endswith("/token") for r in forespørgsler) == 1
+    assert all("Authorization" not in r.headers for r in forespørgsler if r.method == "HEAD")
+
+
+def test_manager_sender_timeout_videre():
+    manager = MomentumClientManager(
+        base_url="https://momentum.test/api",
+        client_id="klient",
+        client_secret="hemmelighed",
+        api_key="apikey",
+        resource="ressource",
+        timeout=12.5,
+    )
+
+    timeout = manager.momentum_client._client.timeout
+    assert timeout.read == timeout.write == 12.5
+    assert timeout.connect == TransportConfig().connect_timeout
+
+
+def test_klienter_deler_ssl_kontekst(monkeypatch):
+    verify = []
+    transport_class = httpx.HTTPTransport
+
+    def spion(*args, **kwargs):
+        verify.append(kwargs.get("verify"))
+        return transport_class(*args, **kwargs)
+
+    monkeypatch.setattr(httpx, "HTTPTransport", spion)
+    for _ in range(2):
+        MomentumClient("https://momentum.test/api", "klient", "hemmelighed", "apikey", "ressource")
+
+    assert len(verify) == 2
+    assert all(v is ssl_context() for v in verify)
+
+
+def test_prioritet_pr_kald_pr_klient_og_for_paginering():
+    from momentum_client.functionality.vitas import VitasClient
+    from momentum_client.pagination import PageNumberPaging, fetch_all
+    from momentum_client.priority import PRIORITY
+
+    forespørgsler = []
+    client = _klient(_handler(forespørgsler))
+    prioritet = lambda: forespørgsler[-1].extensions.get(PRIORITY)
+
+    client.get("/tags")
+    assert prioritet() is None
+    client.get("/tags", priority="interactive")
+    assert prioritet() == "interactive"
+
+    fetch_all(lambda body: client.post("/search", json=body).json(), {}, PageNumberPaging(10))
+    assert prioritet() == "bulk"
+
+    interaktiv = VitasClient(client).with_priority("interactive")
+    assert isinstance(interaktiv, VitasClient)
+    fetch_all(lambda body: interaktiv._client.post("/search", json=body).json(), {}, PageNumberPaging(10))
+    assert prioritet() == "interactive"
+    client.get("/tags")
+    assert prioritet() is None
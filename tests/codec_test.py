@@ -0,0 +1,72 @@
+import importlib.util
+
+import httpx
+import pytest
+
+from momentum_client.client import MomentumClient
+from momentum_client.codec import StdlibCodec, get_codec
+from momentum_client.transport import TransportConfig
+
+_CODECS = [
+    pytest.param(navn, marks=pytest.mark.skipif(importlib.util.find_spec(navn) is None, reason=f"{navn} ikke installeret"))
+    for navn in ("orjson", "msgspec")
+] + ["stdlib"]
+
+
+@pytest.mark.parametrize("navn", _CODECS)
+def test_codec_koder_som_httpx(navn):
+    codec = get_codec(navn)
+    body = {"term": "Ærø Å", "paging": {"pageNumber": 0, "pageSize": 1000}, "filters": [], "aktiv": True, "id": None}
+
+    assert codec.dumps(body) == StdlibCodec().dumps(body)
+    assert codec.loads(codec.dumps(body)) == body
+
+
+@pytest.mark.parametrize("navn", _CODECS)
+def test_ugyldig_json_giver_value_error(navn):
+    with pytest.raises(ValueError):
+        get_codec(navn).loads(b"{ikke json")
+
+
+def test_ukendt_codec():
+    with pytest.raises(ValueError):
+        get_codec("simdjson")
+
+
+class _TællendeCodec(StdlibCodec):
+    name = "tællende"
+
+    def __init__(self):
+        self.dumps_kald = 0
+        self.loads_kald = 0
+
+    def dumps(self, obj):
+        self.dumps_kald += 1
+        return super().dumps(obj)
+
+    def loads(self, data):
+        self.loads_kald += 1
+        return super().loads(data)
+
+
+def test_klienten_bruger_sin_codec_til_body_og_svar():
+    codec = _TællendeCodec()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/token"):
+            return httpx.Response(200, json={"access_token": "abc", "token_type": "Bearer", "expires_in": 3600})
+        assert request.headers["Content-Type"] == "application/json"
+        return httpx.Response(200, content=request.content)
+
+    client = MomentumClient(
+        "https://momentum.test/api", "klient", "hemmelighed", "apikey", "ressource",
+        transport_config=TransportConfig(transport=httpx.MockTransport(handler)),
+        codec=codec,
+    )
+    response = client.post("/citizensearch", json={"term": "x"})
+
+    assert response.json() == {"term": "x"}
+    assert response.json() is response.json()
+    assert codec.dumps_kald == 1
+    # Højst request-body til logningen og svaret - svaret parses kun én gang, selvom logningen også bruger det
+    assert codec.loads_kald <= 2
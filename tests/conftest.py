@@ -10,8 +10,8 @@ load_dotenv()
 
 
 @pytest.fixture(scope="session")
-def momentum_manager():
-    """Primary fixture - MomentumClientManager provides access to all functionality clients."""
+def momentum_credentials():
+    """Returns the connection settings for the Momentum API from environment variables."""
     base_url = os.getenv("BASE_URL")
     client_id = os.getenv("CLIENT_ID")
     client_secret = os.getenv("CLIENT_SECRET")
@@ -23,13 +23,19 @@ def momentum_manager():
             "BASE_URL, CLIENT_ID, CLIENT_SECRET, API_KEY, and RESOURCE must be set in .env file"
         )
 
-    return MomentumClientManager(
-        base_url=base_url,
-        client_id=client_id,
-        client_secret=client_secret,
-        api_key=api_key,
-        resource=resource,
-    )
+    return {
+        "base_url": base_url,
+        "client_id": client_id,
+        "client_secret": client_secret,
+        "api_key": api_key,
+        "resource": resource,
+    }
+
+
+@pytest.fixture(scope="session")
+def momentum_manager(momentum_credentials):
+    """Primary fixture - MomentumClientManager provides access to all functionality clients."""
+    return MomentumClientManager(**momentum_credentials)
 
 
 @pytest.fixture(scope="session")
@@ -0,0 +1,119 @@
+import asyncio
+
+import httpx
+import pytest
+
+from momentum_client.cpr_cache import CprCache
+from momentum_client.manager import AsyncMomentumClientManager, MomentumClientManager
+from momentum_client.transport import TransportConfig
+
+CPR = "0101901234"
+BORGER_ID = "3f2b8a1c-0000-4000-8000-000000000001"
+
+
+def _handler(forespørgsler: list, kendte_id: tuple = (BORGER_ID,)):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/token"):
+            return httpx.Response(200, json={"access_token": "abc", "token_type": "Bearer", "expires_in": 3600})
+        forespørgsler.append(request.url.path)
+        if request.url.path == "/api/citizens/find":
+            return httpx.Response(200, json={"citizenId": BORGER_ID, "name": "Test Testesen"})
+        if request.url.path.rsplit("/", 1)[-1] in kendte_id:
+            return httpx.Response(200, json={"id": BORGER_ID, "cpr": CPR})
+        return httpx.Response(404)
+    return handler
+
+
+def _manager(handler, cpr_cache, klasse=MomentumClientManager):
+    return klasse(
+        base_url="https://momentum.test/api",
+        client_id="klient",
+        client_secret="hemmelighed",
+        api_key="apikey",
+        resource="ressource",
+        transport_config=TransportConfig(transport=httpx.MockTransport(handler)),
+        cpr_cache=cpr_cache,
+    )
+
+
+def test_kendt_cpr_koster_én_forespørgsel():
+    forespørgsler = []
+    momentum = _manager(_handler(forespørgsler), CprCache())
+
+    momentum.borgere.hent_borger(CPR)
+    forespørgsler.clear()
+    borger = momentum.borgere.hent_borger(CPR)
+
+    assert borger["id"] == BORGER_ID
+    assert forespørgsler == [f"/api/citizens/{BORGER_ID}"]
+
+
+def test_minimal_henter_ikke_borgeren():
+    forespørgsler = []
+    momentum = _manager(_handler(forespørgsler), CprCache())
+
+    # Samme form uanset om CPR-nummeret er i cachen
+    assert momentum.borgere.hent_borger(CPR, minimal=True) == {"citizenId": BORGER_ID}
+    assert momentum.borgere.hent_borger(CPR, minimal=True) == {"citizenId": BORGER_ID}
+    assert forespørgsler == ["/api/citizens/find"]
+
+
+def test_forældet_citizen_id_slås_op_igen():
+    forespørgsler = []
+    cpr_cache = CprCache()
+    cpr_cache.put(CPR, "forsvundet")
+    momentum = _manager(_handler(forespørgsler), cpr_cache)
+
+    assert momentum.borgere.hent_borger(CPR)["id"] == BORGER_ID
+    assert forespørgsler == ["/api/citizens/forsvundet", "/api/citizens/find", f"/api/citizens/{BORGER_ID}"]
+    assert cpr_cache.get(CPR) == BORGER_ID
+
+
+def test_cachen_er_begrænset():
+    cpr_cache = CprCache(max_entries=2)
+    for cpr in ("0101901111", "0101902222", "0101903333"):
+        cpr_cache.put(cpr, cpr)
+
+    assert len(cpr_cache) == 2
+    assert cpr_cache.get("0101901111") is None
+
+
+def test_gemt_cache_indeholder_ikke_cpr(tmp_path):
+    sti = tmp_path / "cpr.sqlite"
+    CprCache(path=sti, secret="nøgle").put("010190-1234", BORGER_ID)
+
+    assert CprCache(path=sti, secret="nøgle").get(CPR) == BORGER_ID
+    assert CprCache(path=sti, secret="en anden nøgle").get(CPR) is None
+    assert CPR.encode() not in sti.read_bytes()
+
+
+def test_gemt_cache_ryddes_op_periodisk(tmp_path):
+    cpr_cache = CprCache(max_entries=3, path=tmp_path / "cpr.sqlite", secret="nøgle")
+    for nummer in range(6):
+        cpr_cache.put(f"010190{nummer:04}", str(nummer))
+
+    # Der ryddes op for hver max_entries gemte CPR-numre
+    assert cpr_cache._execute("SELECT COUNT(*) FROM citizens", ())[0][0] == 3
+    assert CprCache(path=tmp_path / "cpr.sqlite", secret="nøgle").get("0101900005") == "5"
+
+
+def test_ugyldigt_cpr_giver_cache_miss():
+    assert CprCache().get("0101901234\udcff") is None
+    assert CprCache().get("ø") is None
+
+
+def test_gemt_cache_kræver_nøgle(tmp_path):
+    with pytest.raises(ValueError):
+        CprCache(path=tmp_path / "cpr.sqlite")
+
+
+def test_async_hent_borger_bruger_cachen():
+    forespørgsler = []
+
+    async def main():
+        async with _manager(_handler(forespørgsler), CprCache(), AsyncMomentumClientManager) as momentum:
+            await momentum.borgere.hent_borger(CPR)
+            return await momentum.borgere.hent_borger(CPR)
+
+    assert asyncio.run(main())["id"] == BORGER_ID
+    assert forespørgsler == ["/api/citizens/find", f"/api/citizens/{BORGER_ID}", f"/api/citizens/{BORGER_ID}"]
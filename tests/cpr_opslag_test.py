@@ -0,0 +1,121 @@
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+
+from momentum_client.functionality.borgere import CprFremskridt, IkkeFundet, OpslagFejlede
+from momentum_client.manager import AsyncMomentumClientManager, MomentumClientManager
+from momentum_client.transport import TransportConfig
+
+UKENDT = "0000000000"
+FEJLER = "9999999999"
+
+
+def _handler(forespørgsler: list, samtidige: list):
+    lock = threading.Lock()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/token"):
+            return httpx.Response(200, json={"access_token": "abc", "token_type": "Bearer", "expires_in": 3600})
+        with lock:
+            forespørgsler.append(request.url.path)
+            samtidige[0] += 1
+            samtidige[1] = max(samtidige[1], samtidige[0])
+        time.sleep(0.01)
+        with lock:
+            samtidige[0] -= 1
+        if request.url.path == "/api/citizens/find":
+            cpr = request.url.params["cpr"]
+            if cpr == UKENDT:
+                return httpx.Response(404)
+            if cpr == FEJLER:
+                return httpx.Response(400)
+            return httpx.Response(200, json={"citizenId": f"id-{cpr}"})
+        if request.url.path == "/api/citizensearch":
+            cprs = json.loads(request.content)["filters"][0]["values"]
+            fundne = [{"cpr": f"{cpr[:6]}-{cpr[6:]}", "id": f"id-{cpr}"} for cpr in cprs if cpr not in (UKENDT, FEJLER)]
+            return httpx.Response(200, json={"data": fundne, "totalCount": len(fundne)})
+        return httpx.Response(200, json={"id": request.url.path.rsplit("/", 1)[-1]})
+    return handler
+
+
+def _manager(handler, klasse=MomentumClientManager):
+    return klasse(
+        base_url="https://momentum.test/api",
+        client_id="klient",
+        client_secret="hemmelighed",
+        api_key="apikey",
+        resource="ressource",
+        transport_config=TransportConfig(transport=httpx.MockTransport(handler)),
+    )
+
+
+def test_mange_cpr_slås_op_samtidigt_med_typede_fejl():
+    forespørgsler, samtidige = [], [0, 0]
+    momentum = _manager(_handler(forespørgsler, samtidige))
+    # Det sidste CPR-nummer er en dublet af det første med bindestreg
+    cprs = [f"01019{i:05d}" for i in range(20)] + [UKENDT, FEJLER, "010190-0000"]
+    fremskridt: list[CprFremskridt] = []
+
+    resultater = momentum.borgere.hent_borgere_for_cpr(cprs, samtidige=4, fremskridt=fremskridt.append)
+
+    assert list(resultater)[:2] == ["0101900000", "0101900001"]
+    assert resultater["0101900003"] == {"id": "id-0101900003"}
+    assert resultater[UKENDT] == IkkeFundet(UKENDT)
+    assert isinstance(resultater[FEJLER], OpslagFejlede)
+    assert isinstance(resultater[FEJLER].fejl, httpx.HTTPStatusError)
+    assert len(resultater) == 22
+    assert 1 < samtidige[1] <= 4
+    assert fremskridt[-1].færdige == fremskridt[-1].i_alt == 22
+    assert (fremskridt[-1].ikke_fundet, fremskridt[-1].fejlede) == (1, 1)
+    assert fremskridt[-1].pr_sekund > 0
+
+
+def test_batch_søgning_sparer_enkeltvise_opslag():
+    forespørgsler, samtidige = [], [0, 0]
+    momentum = _manager(_handler(forespørgsler, samtidige))
+    cprs = [f"01019{i:05d}" for i in range(10)] + [UKENDT]
+
+    resultater = momentum.borgere.hent_borgere_for_cpr(cprs, batch_størrelse=5)
+
+    # Søgningen bruges kun til citizenId - alle får hele borgeren, som uden batches
+    assert resultater["0101900007"] == {"id": "id-0101900007"}
+    assert resultater[UKENDT] == IkkeFundet(UKENDT)
+    # 3 batches og et enkeltvis opslag af det CPR-nummer søgningen ikke fandt
+    assert forespørgsler.count("/api/citizensearch") == 3
+    assert forespørgsler.count("/api/citizens/find") == 1
+    assert sum(sti.startswith("/api/citizens/id-") for sti in forespørgsler) == 10
+
+
+def test_kun_få_opslag_er_undervejs_ad_gangen():
+    from concurrent.futures import ThreadPoolExecutor
+
+    from momentum_client.functionality.borgere import _begrænset
+
+    hentet = []
+
+    def elementer():
+        for i in range(1000):
+            hentet.append(i)
+            yield i
+
+    with ThreadPoolExecutor(2) as pool:
+        resultater = _begrænset(pool, lambda i: i * 2, elementer(), vindue=4)
+        første = next(resultater)
+        assert len(hentet) <= 5
+        assert sorted([første[1].result()] + [future.result() for _, future in resultater]) == list(range(0, 2000, 2))
+
+
+def test_async_hent_borgere_for_cpr():
+    forespørgsler, samtidige = [], [0, 0]
+
+    async def main():
+        async with _manager(_handler(forespørgsler, samtidige), AsyncMomentumClientManager) as momentum:
+            return await momentum.borgere.hent_borgere_for_cpr(["0101901111", UKENDT, FEJLER], samtidige=2)
+
+    resultater = asyncio.run(main())
+    assert resultater["0101901111"] == {"id": "id-0101901111"}
+    assert resultater[UKENDT] == IkkeFundet(UKENDT)
+    assert isinstance(resultater[FEJLER], OpslagFejlede)
@@ -0,0 +1,127 @@
+import asyncio
+
+import httpx
+import pytest
+
+from momentum_client import retry
+from momentum_client.client import AsyncMomentumClient, MomentumClient
+from momentum_client.deadline import DEADLINE, DeadlineExceeded, deadline_scope, remaining
+from momentum_client.functionality.taksonomier import AsyncTaksonomierClient, TaksonomierClient
+from momentum_client.pagination import PageNumberPaging, fetch_all
+from momentum_client.retry import RetryPolicy
+from momentum_client.transport import TransportConfig
+
+
+def _handler(forespørgsler: list, status: int = 200, headers: dict = None):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/token"):
+            return httpx.Response(200, json={"access_token": "abc", "token_type": "Bearer", "expires_in": 3600})
+        forespørgsler.append(request)
+        return httpx.Response(status, headers=headers, json={"data": [1], "totalCount": 3})
+    return handler
+
+
+def _config(handler, **kwargs) -> TransportConfig:
+    return TransportConfig(transport=httpx.MockTransport(handler), **kwargs)
+
+
+def _klient(handler, klasse=MomentumClient, **kwargs):
+    return klasse(
+        base_url="https://momentum.test/api",
+        client_id="klient",
+        client_secret="hemmelighed",
+        api_key="apikey",
+        resource="ressource",
+        transport_config=_config(handler, **kwargs),
+    )
+
+
+def test_timeoutprofil_pr_endpoint():
+    config = TransportConfig(read_timeout=30, endpoint_timeouts={"tags": 5, "/citizens/{id}": httpx.Timeout(2.0)})
+
+    assert config.timeout_for("/api/tags").read == 5
+    assert config.timeout_for("/api/tags").connect == config.connect_timeout
+    assert config.timeout_for("/api/citizens/3f2b8c1e-0000-4a4a-9a9a-0123456789ab").pool == 2.0
+    assert config.timeout_for("/api/taxonomies") is None
+
+
+def test_klienten_bruger_endpointets_timeout():
+    forespørgsler = []
+    client = _klient(_handler(forespørgsler), endpoint_timeouts={"tags": 5})
+
+    client.get("/tags")
+    client.get("/taxonomies")
+
+    assert forespørgsler[0].extensions["timeout"]["read"] == 5
+    assert forespørgsler[1].extensions["timeout"]["read"] == 30
+
+
+def test_deadline_begrænser_timeout_og_følger_med_forespørgslen():
+    forespørgsler = []
+    client = _klient(_handler(forespørgsler))
+
+    client.get("/tags", deadline=2)
+
+    assert forespørgsler[0].extensions["timeout"]["read"] <= 2
+    assert DEADLINE in forespørgsler[0].extensions
+    assert remaining() is None
+
+
+def test_overskredet_deadline_sender_ikke():
+    forespørgsler = []
+    client = TaksonomierClient(_klient(_handler(forespørgsler)))
+    client._client.get("/tags")
+
+    with pytest.raises(DeadlineExceeded):
+        client.hent_alle_taksonomier(deadline=0)
+    assert len(forespørgsler) == 1
+
+
+def test_deadline_følger_med_ind_i_pagineringens_tråde():
+    forespørgsler = []
+    client = _klient(_handler(forespørgsler))
+
+    with deadline_scope(10):
+        fetch_all(lambda body: client.post("/search", json=body).json(), {}, PageNumberPaging(1))
+
+    assert len(forespørgsler) == 3
+    assert all(DEADLINE in request.extensions for request in forespørgsler)
+
+
+def test_indre_deadline_forlænger_ikke_ydre():
+    with deadline_scope(1):
+        with deadline_scope(100):
+            assert remaining() <= 1
+
+
+def test_retry_venter_ikke_forbi_deadline(monkeypatch):
+    monkeypatch.setattr(retry.time, "sleep", lambda _: pytest.fail("ventede forbi deadline"))
+    forespørgsler = []
+    client = _klient(_handler(forespørgsler, status=503, headers={"Retry-After": "5"}), retry=RetryPolicy())
+
+    with pytest.raises(httpx.HTTPStatusError):
+        client.get("/tags", deadline=1)
+    assert len(forespørgsler) == 1
+
+
+def test_async_funktionalitetsklient_tager_deadline():
+    forespørgsler = []
+
+    async def main():
+        client = AsyncTaksonomierClient(_klient(_handler(forespørgsler), AsyncMomentumClient))
+        await client.hent_alle_taksonomier(deadline=3)
+
+    asyncio.run(main())
+    assert forespørgsler[0].extensions["timeout"]["read"] <= 3
+
+
+def test_deadline_gælder_mens_der_itereres():
+    forespørgsler = []
+    client = _klient(_handler(forespørgsler))
+
+    iterator = client.iter_søg("Jensen", "Citizen", deadline=10)
+    assert forespørgsler == []
+    list(iterator)
+
+    assert DEADLINE in forespørgsler[0].extensions
+    assert remaining() is None
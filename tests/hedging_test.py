@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+
+import httpx
+
+from momentum_client.hedging import AsyncHedgingTransport, HedgePolicy, HedgingTransport, LatencyTracker
+from momentum_client.retry import RetryBudget
+from momentum_client.transport import TransportConfig
+
+
+def _policy(**kwargs) -> HedgePolicy:
+    return HedgePolicy(min_samples=5, min_delay=0.01, budget=RetryBudget(ratio=1, min_per_second=0, capacity=10), **kwargs)
+
+
+def _opvarm(latencies: LatencyTracker, template: str = "/api/citizens/{id}") -> None:
+    for _ in range(10):
+        latencies.record(template, 0.01)
+
+
+def test_p95_af_seneste_svartider():
+    latencies = LatencyTracker(sample_size=100)
+    for ms in range(1, 101):
+        latencies.record("/tags", ms / 1000)
+
+    assert latencies.percentile("/tags", 0.95, min_samples=10) == 0.095
+    assert latencies.percentile("/andet", 0.95, min_samples=10) is None
+
+
+def test_langsomt_svar_overhales_af_ekstra_forespørgsel():
+    forsøg = []
+    lock = threading.Lock()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        with lock:
+            forsøg.append(request)
+            nummer = len(forsøg)
+        if nummer == 1:
+            time.sleep(0.5)
+        return httpx.Response(200, json={"forsøg": nummer})
+
+    transport = HedgingTransport(httpx.MockTransport(handler), _policy())
+    _opvarm(transport.latencies)
+    with httpx.Client(transport=transport) as client:
+        start = time.monotonic()
+        response = client.get("https://momentum.test/api/citizens/0101901234")
+
+    assert response.json() == {"forsøg": 2}
+    assert time.monotonic() - start < 0.4
+
+
+def test_ingen_ekstra_forespørgsel_for_post_eller_uden_målinger():
+    forsøg = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        forsøg.append(request)
+        time.sleep(0.05)
+        return httpx.Response(200)
+
+    transport = HedgingTransport(httpx.MockTransport(handler), _policy())
+    with httpx.Client(transport=transport) as client:
+        client.get("https://momentum.test/api/citizens/0101901234")
+        _opvarm(transport.latencies, "/api/citizensearch")
+        client.post("https://momentum.test/api/citizensearch", json={})
+
+    assert len(forsøg) == 2
+
+
+def test_budgettet_begrænser_antallet_af_ekstra_forespørgsler():
+    forsøg = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        forsøg.append(request)
+        time.sleep(0.03)
+        return httpx.Response(200)
+
+    policy = HedgePolicy(min_samples=5, min_delay=0.01, budget=RetryBudget(ratio=0.1, min_per_second=0, capacity=1))
+    transport = HedgingTransport(httpx.MockTransport(handler), policy)
+    _opvarm(transport.latencies)
+    with httpx.Client(transport=transport) as client:
+        for _ in range(10):
+            client.get("https://momentum.test/api/citizens/0101901234")
+
+    # 10 forespørgsler og højst 1 + 10 * 0.1 ekstra
+    assert len(forsøg) <= 12
+
+
+def test_sendes_i_kalderens_tråd_når_der_ikke_kan_hedges():
+    tråde = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        tråde.append(threading.current_thread())
+        return httpx.Response(200)
+
+    tomt_budget = HedgePolicy(min_samples=5, min_delay=0.01, budget=RetryBudget(ratio=0, min_per_second=0, capacity=0))
+    transport = HedgingTransport(httpx.MockTransport(handler), tomt_budget)
+    _opvarm(transport.latencies)
+    med_budget = HedgingTransport(httpx.MockTransport(handler), _policy())
+    _opvarm(med_budget.latencies)
+    with httpx.Client(transport=transport) as client, httpx.Client(transport=med_budget, timeout=0.005) as kort_timeout:
+        client.get("https://momentum.test/api/citizens/0101901234")
+        client.get("https://momentum.test/api/citizens/0101901234", params={"x": 1})
+        # Timeouten udløber før ekstra-forespørgslen ville blive sendt
+        kort_timeout.get("https://momentum.test/api/citizens/0101901234")
+
+    assert tråde == [threading.current_thread()] * 3
+    assert transport._pool is None and med_budget._pool is None
+
+
+def test_async_annullerer_den_langsomme():
+    annulleret = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if not annulleret:
+            annulleret.append(False)
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                annulleret[0] = True
+                raise
+        return httpx.Response(200)
+
+    async def main():
+        transport = AsyncHedgingTransport(httpx.MockTransport(handler), _policy())
+        _opvarm(transport.latencies)
+        async with httpx.AsyncClient(transport=transport) as client:
+            response = await client.get("https://momentum.test/api/citizens/0101901234")
+            await asyncio.sleep(0)
+            return response
+
+    assert asyncio.run(main()).status_code == 200
+    assert annulleret == [True]
+
+
+def test_transportconfig_lægger_hedging_under_retry():
+    config = TransportConfig(transport=httpx.MockTransport(lambda request: httpx.Response(200)), hedging=HedgePolicy())
+
+    assert isinstance(config.client_kwargs()["transport"]._transport, HedgingTransport)
@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import threading
+
+import httpx
+
+from momentum_client.hooks import REDACTED, LogConfig, create_async_response_logging_hook, create_response_logging_hook
+from momentum_client.log_worker import LogWorker
+
+
+class _Opsamler(logging.Handler):
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self.records = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+def _logger(navn: str, *handlers: logging.Handler, level=logging.INFO) -> logging.Logger:
+    logger = logging.getLogger(f"momentum_client.test.{navn}")
+    logger.handlers = list(handlers)
+    logger.propagate = False
+    logger.setLevel(level)
+    return logger
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/token":
+        return httpx.Response(200, json={"access_token": "hemmeligt", "expires_in": 3600})
+    if request.url.path == "/fejl":
+        return httpx.Response(500, json={"fejl": True})
+    return httpx.Response(200, json={"data": list(range(100))})
+
+
+def _klient(logger: logging.Logger, config: LogConfig = None, worker: LogWorker = None) -> httpx.Client:
+    hook = create_response_logging_hook(logger=logger, config=config, worker=worker)
+    return httpx.Client(transport=httpx.MockTransport(_handler), event_hooks={"response": [hook]})
+
+
+def test_svar_parses_kun_én_gang():
+    opsamler = _Opsamler()
+    with _klient(_logger("én_gang", opsamler)) as client:
+        response = client.post("https://momentum.test/søg", json={"term": "x"})
+
+    record = opsamler.records[0]
+    assert record.request_json == {"term": "x"}
+    assert response.json() is record.response_json
+    assert record.payload_omitted is None
+
+
+def test_ingen_parsing_uden_handler():
+    with _klient(_logger("uden_handler")) as client:
+        response = client.get("https://momentum.test/data")
+
+    assert not hasattr(response, "_momentum_json")
+    assert response.json() == {"data": list(range(100))}
+
+
+def test_handler_der_afviser_niveauet_springes_over():
+    opsamler = _Opsamler(level=logging.ERROR)
+    with _klient(_logger("kun_fejl", opsamler)) as client:
+        ok = client.get("https://momentum.test/data")
+        client.get("https://momentum.test/fejl")
+
+    assert not hasattr(ok, "_momentum_json")
+    assert [r.response_json for r in opsamler.records if r.levelno == logging.ERROR] == [{"fejl": True}]
+
+
+def test_store_svar_logges_uden_payload():
+    opsamler = _Opsamler()
+    with _klient(_logger("stor", opsamler), LogConfig(max_payload_bytes=50)) as client:
+        client.get("https://momentum.test/data")
+
+    assert opsamler.records[0].response_json is None
+    assert opsamler.records[0].payload_omitted == "size"
+
+
+def test_stikprøve_gælder_ikke_fejl():
+    opsamler = _Opsamler()
+    with _klient(_logger("stikprøve", opsamler), LogConfig(payload_sample_rate=0.0)) as client:
+        client.get("https://momentum.test/data")
+        client.get("https://momentum.test/fejl")
+
+    ok, fejl = opsamler.records
+    assert ok.payload_omitted == "sampled" and ok.response_json is None
+    assert fejl.response_json == {"fejl": True}
+
+
+def test_udeladt_payload_uden_modtager_skelnes_fra_stikprøve():
+    from momentum_client.hooks import _payload_omitted
+
+    assert _payload_omitted(_logger("ingen_modtager"), logging.INFO, LogConfig()) == "no_receiver"
+    assert _payload_omitted(_logger("ingen_stikprøve", _Opsamler()), logging.INFO, LogConfig(payload_sample_rate=0.0)) == "sampled"
+    assert _payload_omitted(_logger("med_modtager", _Opsamler()), logging.INFO, LogConfig()) is None
+
+
+def test_async_hook_læser_og_logger_svar():
+    opsamler = _Opsamler()
+    hook = create_async_response_logging_hook(logger=_logger("async", opsamler))
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(_handler), event_hooks={"response": [hook]}) as client:
+            return await client.get("https://momentum.test/data")
+
+    response = asyncio.run(main())
+    assert response.json() is opsamler.records[0].response_json
+
+
+class _LangsomHandler(_Opsamler):
+    def __init__(self):
+        super().__init__()
+        self.fortsæt = threading.Event()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.fortsæt.wait(timeout=5)
+        super().emit(record)
+
+
+def test_token_i_svar_maskeres_uden_at_ændre_svaret():
+    opsamler = _Opsamler()
+    with _klient(_logger("maskering", opsamler)) as client:
+        response = client.post("https://momentum.test/token", json={"client_secret": "abc", "scope": "x"})
+
+    record = opsamler.records[0]
+    assert record.response_json["access_token"] == REDACTED
+    assert record.request_json == {"client_secret": REDACTED, "scope": "x"}
+    assert response.json()["access_token"] == "hemmeligt"
+
+
+def test_baggrundslogning_venter_ikke_på_handlere():
+    handler = _LangsomHandler()
+    worker = LogWorker()
+    with _klient(_logger("baggrund", handler), LogConfig(background=True), worker) as client:
+        client.get("https://momentum.test/data")
+        assert handler.records == []
+
+    handler.fortsæt.set()
+    worker.flush()
+    assert handler.records[0].response_json == {"data": list(range(100))}
+    worker.close()
+
+
+def test_fuld_kø_dropper_transaktioner():
+    handler = _LangsomHandler()
+    worker = LogWorker(max_queue=1, policy="drop")
+    with _klient(_logger("drop", handler), LogConfig(background=True), worker) as client:
+        for _ in range(5):
+            client.get("https://momentum.test/data")
+
+    handler.fortsæt.set()
+    worker.close()
+    # Én er i gang hos handleren, én venter i køen, resten droppes
+    assert worker.dropped >= 3
+    assert len(handler.records) == 5 - worker.dropped
+
+
+def test_async_baggrundslogning():
+    opsamler = _Opsamler()
+    worker = LogWorker(policy="block")
+    hook = create_async_response_logging_hook(logger=_logger("async_baggrund", opsamler), config=LogConfig(background=True), worker=worker)
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(_handler), event_hooks={"response": [hook]}) as client:
+            await asyncio.gather(*(client.get("https://momentum.test/data") for _ in range(10)))
+        await asyncio.to_thread(worker.close)
+
+    asyncio.run(main())
+    assert len(opsamler.records) == 10
@@ -0,0 +1,114 @@
+import asyncio
+import datetime
+
+import httpx
+import pytest
+
+from momentum_client import markeringsregister
+from momentum_client.markeringsregister import MarkeringsRegister
+from momentum_client.manager import AsyncMomentumClientManager, MomentumClientManager
+from momentum_client.transport import TransportConfig
+
+TAGS = [{"id": "t1", "title": "ØF-JC-AC-IT-emnebank"}, {"id": "t2", "title": "Anden"}]
+
+
+def _handler(forespørgsler: list, tags: list):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/token"):
+            return httpx.Response(200, json={"access_token": "abc", "token_type": "Bearer", "expires_in": 3600})
+        forespørgsler.append((request.method, request.url.path))
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json=tags)
+        return httpx.Response(201, json={"id": "ny"})
+    return handler
+
+
+def _manager(forespørgsler: list, tags: list = TAGS, klasse=MomentumClientManager):
+    return klasse(
+        base_url="https://momentum.test/api",
+        client_id="klient",
+        client_secret="hemmelighed",
+        api_key="apikey",
+        resource="ressource",
+        transport_config=TransportConfig(transport=httpx.MockTransport(_handler(forespørgsler, tags))),
+    )
+
+
+def test_borgere_og_markeringer_deler_registret():
+    forespørgsler = []
+    momentum = _manager(forespørgsler)
+
+    assert momentum.borgere.hent_markering()["id"] == "t1"
+    assert momentum.markeringer.hent_markering("Anden")["id"] == "t2"
+    momentum.markeringer.opret_markering("Anden", "borger-1", datetime.date(2025, 1, 1))
+
+    assert forespørgsler.count(("GET", "/api/tags")) == 1
+
+
+def test_ukendt_markering_henter_tags_igen_højst_hvert_interval(monkeypatch):
+    nu = [1000.0]
+    monkeypatch.setattr(markeringsregister.time, "monotonic", lambda: nu[0])
+    forespørgsler = []
+    tags = list(TAGS)
+    momentum = _manager(forespørgsler, tags)
+
+    momentum.markeringer.hent_markering()
+    tags.append({"id": "t3", "title": "Ny"})
+    assert momentum.markeringer.hent_markering("Ny") is None
+    nu[0] += 31
+    assert momentum.markeringer.hent_markering("Ny")["id"] == "t3"
+    assert momentum.markeringer.hent_markering("Findes ikke") is None
+
+    assert forespørgsler.count(("GET", "/api/tags")) == 2
+
+
+def test_registret_fornyes_efter_ttl(monkeypatch):
+    nu = [1000.0]
+    monkeypatch.setattr(markeringsregister.time, "monotonic", lambda: nu[0])
+    forespørgsler = []
+    momentum = _manager(forespørgsler)
+
+    momentum.markeringer.hent_markering()
+    nu[0] += 301
+    momentum.markeringer.hent_markering()
+
+    assert forespørgsler.count(("GET", "/api/tags")) == 2
+
+
+def test_opslag_på_id_og_ukendt_nøgle():
+    register = MarkeringsRegister()
+    register.indlæs(TAGS)
+
+    assert register.slå_op(None, "t2", nøgle="id")["title"] == "Anden"
+    assert len(register) == 2
+    with pytest.raises(ValueError):
+        register.slå_op(None, "x", nøgle="farve")
+
+
+def test_async_klienter_deler_registret():
+    forespørgsler = []
+
+    async def main():
+        async with _manager(forespørgsler, klasse=AsyncMomentumClientManager) as momentum:
+            assert (await momentum.borgere.hent_markering())["id"] == "t1"
+            assert (await momentum.markeringer.hent_markering("Anden"))["id"] == "t2"
+
+    asyncio.run(main())
+    assert forespørgsler == [("GET", "/api/tags")]
+
+
+def test_samtidige_async_opslag_henter_tags_én_gang():
+    class Klient:
+        kald = 0
+
+        async def get(self, endpoint):
+            Klient.kald += 1
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json=TAGS)
+
+    async def main():
+        register = MarkeringsRegister()
+        return await asyncio.gather(*(register.aslå_op(Klient(), "Anden") for _ in range(10)))
+
+    assert [tag["id"] for tag in asyncio.run(main())] == ["t2"] * 10
+    assert Klient.kald == 1
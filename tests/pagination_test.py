@@ -0,0 +1,154 @@
+import asyncio
+import threading
+import time
+
+from momentum_client.pagination import PageNumberPaging, SkipSizePaging, afetch_all, aiter_items, fetch_all, iter_items
+
+
+class _Server:
+    """Falsk endpoint med `antal` rækker, der tæller samtidige forespørgsler."""
+
+    def __init__(self, antal: int, rapport: str):
+        self.antal = antal
+        self.rapport = rapport
+        self.forespørgsler = []
+        self.samtidige = 0
+        self.max_samtidige = 0
+        self._lås = threading.Lock()
+
+    def side(self, body: dict) -> dict:
+        if "paging" in body:
+            størrelse = body["paging"]["pageSize"]
+            start = body["paging"]["pageNumber"] * størrelse
+        else:
+            størrelse = body["size"]
+            start = body["skip"]
+        self.forespørgsler.append(start)
+        data = list(range(start, min(start + størrelse, self.antal)))
+        if self.rapport == "hasMore":
+            return {"data": data, "hasMore": start + størrelse < self.antal}
+        return {"data": data, self.rapport: self.antal}
+
+    def __call__(self, body: dict) -> dict:
+        with self._lås:
+            self.samtidige += 1
+            self.max_samtidige = max(self.max_samtidige, self.samtidige)
+        time.sleep(0.01)
+        try:
+            return self.side(body)
+        finally:
+            with self._lås:
+                self.samtidige -= 1
+
+
+def test_kendt_total_henter_resten_samtidigt():
+    server = _Server(1050, "totalSearchCount")
+
+    data = fetch_all(server, {"filters": []}, PageNumberPaging(100), concurrency=4)
+
+    assert data == list(range(1050))
+    assert len(server.forespørgsler) == 11
+    assert 1 < server.max_samtidige <= 4
+
+
+def test_has_more_hentes_i_bølger_og_stopper():
+    server = _Server(950, "hasMore")
+
+    data = fetch_all(server, {}, PageNumberPaging(100), concurrency=4)
+
+    assert data == list(range(950))
+    # Side 0, bølgen 1-4, bølgen 5-8 og bølgen 9-12, hvor side 9 er den sidste
+    assert len(server.forespørgsler) == 13
+    assert server.max_samtidige <= 4
+
+
+def test_max_pages_begrænser_antal_sider():
+    server = _Server(10_000, "hasMore")
+
+    data = fetch_all(server, {}, PageNumberPaging(100), max_pages=3)
+
+    assert data == list(range(300))
+    assert len(server.forespørgsler) == 3
+
+
+def test_skip_size_og_max_items():
+    server = _Server(1000, "totalCount")
+
+    data = fetch_all(server, {"term": "x"}, SkipSizePaging(200), items="data", max_items=450)
+
+    assert data == list(range(600))
+    assert sorted(server.forespørgsler) == [0, 200, 400]
+
+
+def test_manglende_side_giver_none():
+    def hent(body: dict):
+        if body["paging"]["pageNumber"] == 2:
+            return None
+        return {"data": [1], "totalCount": 5}
+
+    assert fetch_all(hent, {}, PageNumberPaging(1)) is None
+
+
+def test_body_ændres_ikke():
+    body = {"paging": {"pageNumber": 0, "pageSize": 10}, "filters": []}
+    fetch_all(_Server(30, "totalSearchCount"), body, PageNumberPaging(10))
+
+    assert body == {"paging": {"pageNumber": 0, "pageSize": 10}, "filters": []}
+
+
+def test_async_henter_i_sideorden():
+    server = _Server(950, "hasMore")
+
+    async def hent(body: dict) -> dict:
+        await asyncio.sleep(0.01 if body["paging"]["pageNumber"] % 2 else 0)
+        return server.side(body)
+
+    data = asyncio.run(afetch_all(hent, {}, PageNumberPaging(100), concurrency=4))
+
+    assert data == list(range(950))
+
+
+def test_iter_giver_alle_rækker_i_orden():
+    for rapport in ("hasMore", "totalSearchCount"):
+        server = _Server(950, rapport)
+        assert list(iter_items(server, {}, PageNumberPaging(100))) == list(range(950))
+        assert len(server.forespørgsler) == 10
+
+
+def test_iter_stopper_netværkstrafik_når_forbrugeren_stopper():
+    server = _Server(10_000, "hasMore")
+
+    rækker = iter_items(server, {}, PageNumberPaging(100))
+    for række in rækker:
+        if række == 150:
+            break
+    rækker.close()
+    time.sleep(0.05)
+
+    # Side 0 og 1 er læst, side 2 er højst hentet på forhånd
+    assert len(server.forespørgsler) <= 3
+
+
+def test_async_iter_annullerer_forudhentet_side():
+    server = _Server(10_000, "totalCount")
+    annulleret = []
+
+    async def hent(body: dict) -> dict:
+        try:
+            if body["paging"]["pageNumber"] > 0:
+                await asyncio.sleep(10)
+            return server.side(body)
+        except asyncio.CancelledError:
+            annulleret.append(body["paging"]["pageNumber"])
+            raise
+
+    async def main():
+        rækker = aiter_items(hent, {}, PageNumberPaging(100))
+        første = await anext(rækker)
+        await asyncio.sleep(0.01)  # lad forhåndshentningen af side 1 starte
+        await rækker.aclose()
+        await asyncio.sleep(0)
+        return første
+
+    assert asyncio.run(main()) == 0
+    assert annulleret == [1]
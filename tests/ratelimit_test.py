@@ -0,0 +1,325 @@
+import asyncio
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from momentum_client.ratelimit import (
+    AimdWindow,
+    AsyncRateLimitTransport,
+    FileTokenBucket,
+    RateLimit,
+    RateLimitTransport,
+    TokenBucket,
+    _Admission,
+)
+from momentum_client.deadline import DEADLINE, DeadlineExceeded
+from momentum_client.priority import BULK, INTERACTIVE, PRIORITY, rank
+from momentum_client.transport import TransportConfig
+
+
+def test_token_bucket_tillader_burst_og_venter_derefter():
+    bucket = TokenBucket(rate=10, burst=3)
+
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert 0.09 <= bucket.reserve() <= 0.1
+    assert 0.19 <= bucket.reserve() <= 0.2
+
+
+def test_vinduet_vokser_ved_stabile_svartider():
+    window = AimdWindow(initial=4, minimum=1, maximum=32)
+
+    for _ in range(20):
+        window.record(0.1, overloaded=False)
+
+    assert window.size > 4
+
+
+def test_vinduet_halveres_ved_overbelastning_én_gang_pr_svartid():
+    window = AimdWindow(initial=16, minimum=1, maximum=32)
+    window.record(10.0, overloaded=False)
+    window.limit = 16.0
+
+    for _ in range(5):
+        window.record(10.0, overloaded=True)
+
+    assert window.size == 8
+
+
+def test_vinduet_krymper_ved_svartidsspring():
+    window = AimdWindow(initial=8, minimum=2, maximum=32)
+    for _ in range(10):
+        window.record(0.01, overloaded=False)
+    før = window.size
+
+    window.record(1.0, overloaded=False)
+
+    assert window.size == før // 2
+
+
+def test_vinduet_går_ikke_under_minimum():
+    window = AimdWindow(initial=4, minimum=2, maximum=32)
+
+    for _ in range(10):
+        window._last_decrease = 0.0
+        window.record(0.1, overloaded=True)
+
+    assert window.size == 2
+
+
+def test_transport_begrænser_samtidige_forespørgsler():
+    lock = threading.Lock()
+    samtidige = [0, 0]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        with lock:
+            samtidige[0] += 1
+            samtidige[1] = max(samtidige[1], samtidige[0])
+        time.sleep(0.01)
+        with lock:
+            samtidige[0] -= 1
+        return httpx.Response(200)
+
+    transport = RateLimitTransport(httpx.MockTransport(handler), RateLimit(adaptive=False, max_concurrency=3))
+    with httpx.Client(transport=transport) as client, ThreadPoolExecutor(10) as pool:
+        list(pool.map(lambda _: client.get("https://momentum.test/tags"), range(30)))
+
+    assert samtidige[1] <= 3
+
+
+def test_429_formindsker_vinduet():
+    transport = RateLimitTransport(
+        httpx.MockTransport(lambda request: httpx.Response(429)),
+        RateLimit(initial_concurrency=8),
+    )
+
+    with httpx.Client(transport=transport) as client:
+        client.get("https://momentum.test/tags")
+
+    assert transport.window.size == 4
+
+
+def test_gateway_fejl_formindsker_vinduet_men_500_gør_ikke():
+    for status, størrelse in [(502, 4), (503, 4), (504, 4), (500, 8)]:
+        transport = RateLimitTransport(httpx.MockTransport(lambda request: httpx.Response(status)), RateLimit(initial_concurrency=8))
+        with httpx.Client(transport=transport) as client:
+            client.get("https://momentum.test/tags")
+        assert transport.window.size == størrelse, status
+
+
+def test_annulleret_forespørgsel_ændrer_ikke_vinduet():
+    startet = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        startet.set()
+        await asyncio.sleep(10)
+        return httpx.Response(200)
+
+    async def main():
+        transport = AsyncRateLimitTransport(httpx.MockTransport(handler), RateLimit(initial_concurrency=16))
+        async with httpx.AsyncClient(transport=transport) as client:
+            opgave = asyncio.create_task(client.get("https://momentum.test/tags"))
+            await startet.wait()
+            opgave.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await opgave
+        return transport
+
+    transport = asyncio.run(main())
+    assert transport.window.limit == 16.0
+    assert transport._admission.in_flight == 0
+
+
+def test_timeout_formindsker_vinduet_men_andre_fejl_gør_ikke():
+    def fejl(undtagelse):
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise undtagelse
+        return handler
+
+    for undtagelse, størrelse in [(httpx.ReadTimeout("langsom"), 4), (httpx.ConnectError("nede"), 8)]:
+        transport = RateLimitTransport(httpx.MockTransport(fejl(undtagelse)), RateLimit(initial_concurrency=8))
+        with httpx.Client(transport=transport) as client, pytest.raises(type(undtagelse)):
+            client.get("https://momentum.test/tags")
+        assert transport.window.size == størrelse
+
+
+def test_ventende_forespørgsel_overholder_sin_deadline():
+    startet = threading.Event()
+    fortsæt = threading.Event()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/langsom":
+            startet.set()
+            fortsæt.wait(timeout=5)
+        return httpx.Response(200)
+
+    transport = RateLimitTransport(httpx.MockTransport(handler), RateLimit(adaptive=False, max_concurrency=1))
+    with httpx.Client(transport=transport) as client, ThreadPoolExecutor(1) as pool:
+        langsom = pool.submit(client.get, "https://momentum.test/langsom")
+        startet.wait()
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            client.get("https://momentum.test/hurtig", extensions={DEADLINE: time.monotonic() + 0.1})
+        assert time.monotonic() - start < 0.5
+        fortsæt.set()
+        assert langsom.result().status_code == 200
+
+    assert transport._admission.in_flight == 0
+    assert transport._admission.waiting == [0] * len(transport._admission.waiting)
+
+
+def test_async_ventende_forespørgsel_overholder_sin_deadline():
+    fortsæt = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/langsom":
+            await fortsæt.wait()
+        return httpx.Response(200)
+
+    async def main():
+        transport = AsyncRateLimitTransport(httpx.MockTransport(handler), RateLimit(adaptive=False, max_concurrency=1))
+        async with httpx.AsyncClient(transport=transport) as client:
+            langsom = asyncio.create_task(client.get("https://momentum.test/langsom"))
+            await asyncio.sleep(0.01)
+            with pytest.raises(DeadlineExceeded):
+                await client.get("https://momentum.test/hurtig", extensions={DEADLINE: time.monotonic() + 0.1})
+            fortsæt.set()
+            assert (await langsom).status_code == 200
+            # Pladsen i vinduet er ikke gået tabt
+            assert (await client.get("https://momentum.test/hurtig")).status_code == 200
+
+    asyncio.run(main())
+
+
+def test_token_bucket_venter_ikke_forbi_deadline():
+    bucket = TokenBucket(rate=1, burst=1)
+    bucket.acquire()
+
+    with pytest.raises(DeadlineExceeded):
+        bucket.acquire(deadline=time.monotonic() + 0.1)
+    # Tokenet gives tilbage, så næste kalder ikke venter på det
+    assert 0.9 <= bucket.reserve() <= 1.0
+
+
+
+def test_deadline_ved_ventetid_på_token_ændrer_ikke_vinduet():
+    transport = RateLimitTransport(
+        httpx.MockTransport(lambda request: httpx.Response(200)),
+        RateLimit(requests_per_second=1, burst=1, initial_concurrency=8),
+    )
+    with httpx.Client(transport=transport) as client:
+        client.get("https://momentum.test/tags")
+        limit = transport.window.limit
+        with pytest.raises(DeadlineExceeded):
+            client.get("https://momentum.test/tags", extensions={DEADLINE: time.monotonic() + 0.05})
+
+    assert transport.window.limit == limit
+    assert transport._admission.in_flight == 0
+
+def test_transportconfig_indsætter_ratelimit_under_retry():
+    config = TransportConfig(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200)),
+        rate_limit=RateLimit(requests_per_second=100),
+    )
+
+    transport = config.client_kwargs()["transport"]
+
+    assert isinstance(transport._transport, RateLimitTransport)
+    assert TransportConfig().rate_limit is None
+
+
+def test_async_transport_begrænser_samtidige_forespørgsler():
+    samtidige = [0, 0]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        samtidige[0] += 1
+        samtidige[1] = max(samtidige[1], samtidige[0])
+        await asyncio.sleep(0.01)
+        samtidige[0] -= 1
+        return httpx.Response(200)
+
+    async def main():
+        transport = AsyncRateLimitTransport(httpx.MockTransport(handler), RateLimit(initial_concurrency=2, max_concurrency=2))
+        async with httpx.AsyncClient(transport=transport) as client:
+            await asyncio.gather(*(client.get("https://momentum.test/tags") for _ in range(10)))
+
+    asyncio.run(main())
+    assert samtidige[1] <= 2
+
+
+def test_delt_bucket_fordeler_raten_mellem_processer(tmp_path):
+    sti = tmp_path / "ratelimit.json"
+    robot_a = FileTokenBucket(rate=10, burst=2, key="apikey", path=sti)
+    robot_b = FileTokenBucket(rate=10, burst=2, key="apikey", path=sti)
+
+    assert robot_a.reserve() == 0.0
+    assert robot_a.reserve() == 0.0
+    # Med to aktive processer har hver 5 forespørgsler pr. sekund og en burst på 1
+    assert robot_b.reserve() == 0.0
+    assert 0.15 <= robot_b.reserve() <= 0.2
+    assert "apikey" not in sti.read_text()
+
+
+def test_delt_bucket_adskiller_api_nøgler(tmp_path):
+    sti = tmp_path / "ratelimit.json"
+    FileTokenBucket(rate=1, key="robot-1", path=sti).reserve()
+
+    assert FileTokenBucket(rate=1, key="robot-2", path=sti).reserve() == 0.0
+
+
+def test_inaktive_processer_mister_deres_andel(tmp_path, monkeypatch):
+    sti = tmp_path / "ratelimit.json"
+    robot_a = FileTokenBucket(rate=10, burst=1, key="apikey", path=sti, member_ttl=5)
+    robot_b = FileTokenBucket(rate=10, burst=1, key="apikey", path=sti, member_ttl=5)
+    robot_a.reserve()
+    robot_b.reserve()
+
+    nu = time.time()
+    monkeypatch.setattr(time, "time", lambda: nu + 10)
+    robot_b.reserve()
+
+    assert 0.09 <= robot_b.reserve() <= 0.1
+
+
+def test_delt_rate_limit_kræver_nøgle(tmp_path):
+    with pytest.raises(ValueError):
+        RateLimit(requests_per_second=5, shared=True, shared_path=tmp_path / "r.json").create_bucket()
+
+    bucket = RateLimit(requests_per_second=5, shared=True, shared_path=tmp_path / "r.json").create_bucket("apikey")
+    assert isinstance(bucket, FileTokenBucket)
+
+
+def test_interaktive_forespørgsler_går_forrest_i_køen():
+    rækkefølge = []
+    frigiv = threading.Event()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/blokér":
+            frigiv.wait(5)
+        rækkefølge.append(request.url.path)
+        return httpx.Response(200)
+
+    transport = RateLimitTransport(httpx.MockTransport(handler), RateLimit(adaptive=False, max_concurrency=1))
+    with httpx.Client(transport=transport) as client, ThreadPoolExecutor(6) as pool:
+        blokerende = pool.submit(client.get, "https://momentum.test/blokér")
+        time.sleep(0.05)
+        bulk = [pool.submit(client.get, "https://momentum.test/bulk", extensions={PRIORITY: BULK}) for _ in range(4)]
+        time.sleep(0.05)
+        interaktiv = pool.submit(client.get, "https://momentum.test/interaktiv", extensions={PRIORITY: INTERACTIVE})
+        time.sleep(0.05)
+        frigiv.set()
+        for future in [blokerende, interaktiv, *bulk]:
+            future.result()
+
+    assert rækkefølge[:2] == ["/blokér", "/interaktiv"]
+
+
+def test_bulk_efterlader_pladser_til_andre_prioriteter():
+    admission = _Admission(AimdWindow(4, 4, 4), reserved=1)
+    admission.in_flight = 3
+
+    assert not admission.admissible(rank(BULK))
+    assert admission.admissible(rank(INTERACTIVE))
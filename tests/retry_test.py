@@ -0,0 +1,127 @@
+import asyncio
+
+import httpx
+import pytest
+
+from momentum_client import retry
+from momentum_client.retry import IDEMPOTENT, AsyncRetryTransport, RetryBudget, RetryPolicy, RetryTransport
+
+
+@pytest.fixture
+def pauser(monkeypatch):
+    pauser = []
+    monkeypatch.setattr(retry.time, "sleep", pauser.append)
+    return pauser
+
+
+def _svar(*statuskoder: int, headers: dict = None):
+    svar = iter(statuskoder)
+    forespørgsler = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        forespørgsler.append(request)
+        return httpx.Response(next(svar), headers=headers, json={})
+
+    return handler, forespørgsler
+
+
+def _klient(handler, policy: RetryPolicy = None) -> httpx.Client:
+    return httpx.Client(transport=RetryTransport(httpx.MockTransport(handler), policy or RetryPolicy()))
+
+
+def test_get_forsøges_igen_ved_503(pauser):
+    handler, forespørgsler = _svar(503, 502, 200)
+
+    with _klient(handler) as client:
+        assert client.get("https://momentum.test/tags").status_code == 200
+
+    assert len(forespørgsler) == 3
+    assert len(pauser) == 2
+    assert 0 <= pauser[0] <= 0.5 and 0 <= pauser[1] <= 1.0
+
+
+def test_post_forsøges_kun_igen_når_markeret_idempotent(pauser):
+    handler, forespørgsler = _svar(503, 503, 200)
+
+    with _klient(handler) as client:
+        assert client.post("https://momentum.test/alerts", json={}).status_code == 503
+        assert client.post("https://momentum.test/citizensearch", json={}, extensions={IDEMPOTENT: True}).status_code == 200
+
+    assert len(forespørgsler) == 3
+
+
+def test_retry_after_overholdes(pauser):
+    handler, _ = _svar(429, 200, headers={"Retry-After": "7"})
+
+    with _klient(handler) as client:
+        assert client.get("https://momentum.test/tags").status_code == 200
+
+    assert pauser == [7.0]
+
+
+def test_for_lang_retry_after_giver_op(pauser):
+    handler, forespørgsler = _svar(429, 200, headers={"Retry-After": "3600"})
+
+    with _klient(handler) as client:
+        assert client.get("https://momentum.test/tags").status_code == 429
+
+    assert len(forespørgsler) == 1
+
+
+def test_maks_antal_forsøg(pauser):
+    handler, forespørgsler = _svar(*[503] * 10)
+
+    with _klient(handler, RetryPolicy(max_attempts=3)) as client:
+        assert client.get("https://momentum.test/tags").status_code == 503
+
+    assert len(forespørgsler) == 3
+
+
+def test_budget_begrænser_retries_under_nedbrud(pauser):
+    handler, forespørgsler = _svar(*[503] * 100)
+    policy = RetryPolicy(budget=RetryBudget(ratio=0.1, min_per_second=0, capacity=2))
+
+    with _klient(handler, policy) as client:
+        for _ in range(10):
+            client.get("https://momentum.test/tags")
+
+    # 10 forespørgsler og højst 2 + 10 * 0.1 retries
+    assert len(forespørgsler) <= 13
+
+
+def test_forbindelsesfejl_forsøges_igen_også_for_post(pauser):
+    forsøg = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        forsøg.append(request)
+        if len(forsøg) == 1:
+            raise httpx.ConnectError("forbindelse nægtet", request=request)
+        return httpx.Response(201)
+
+    with _klient(handler) as client:
+        assert client.post("https://momentum.test/alerts", json={}).status_code == 201
+
+
+def test_læsefejl_på_post_forsøges_ikke_igen(pauser):
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ReadTimeout("timeout", request=request)
+
+    with _klient(handler) as client, pytest.raises(httpx.ReadTimeout):
+        client.post("https://momentum.test/alerts", json={})
+    assert pauser == []
+
+
+def test_async_forsøges_igen(monkeypatch):
+    async def ingen_pause(_):
+        pass
+
+    monkeypatch.setattr(retry.asyncio, "sleep", ingen_pause)
+    handler, forespørgsler = _svar(504, 200)
+
+    async def main():
+        transport = AsyncRetryTransport(httpx.MockTransport(handler), RetryPolicy())
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.get("https://momentum.test/tags")
+
+    assert asyncio.run(main()).status_code == 200
+    assert len(forespørgsler) == 2
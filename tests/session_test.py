@@ -0,0 +1,115 @@
+import asyncio
+
+import httpx
+
+from momentum_client.manager import AsyncMomentumClientManager, MomentumClientManager
+from momentum_client.session import current_session
+from momentum_client.transport import TransportConfig
+
+BORGER_ID = "3f2b8a1c-0000-4000-8000-000000000001"
+BORGER = {"id": BORGER_ID, "citizenId": BORGER_ID, "cpr": "0101901234"}
+
+
+def _handler(forespørgsler: list):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/token"):
+            return httpx.Response(200, json={"access_token": "abc", "token_type": "Bearer", "expires_in": 3600})
+        forespørgsler.append((request.method, request.url.path))
+        if request.url.path == "/api/citizens/find":
+            return httpx.Response(200, json={"citizenId": BORGER_ID})
+        if request.url.path.startswith("/api/responsibleCaseworkers"):
+            return httpx.Response(200, json=[])
+        return httpx.Response(200, json=BORGER)
+    return handler
+
+
+def _manager(forespørgsler: list, klasse=MomentumClientManager):
+    return klasse(
+        base_url="https://momentum.test/api",
+        client_id="klient",
+        client_secret="hemmelighed",
+        api_key="apikey",
+        resource="ressource",
+        transport_config=TransportConfig(transport=httpx.MockTransport(_handler(forespørgsler))),
+    )
+
+
+def test_gentagne_opslag_i_session_besvares_fra_hukommelsen():
+    forespørgsler = []
+    momentum = _manager(forespørgsler)
+
+    with momentum.session() as session:
+        borger = momentum.borgere.hent_borger("0101901234")
+        momentum.borgere.hent_borger("0101901234")
+        momentum.borgere.hent_borger_med_id(borger["id"])
+
+    assert forespørgsler == [("GET", "/api/citizens/find"), ("GET", f"/api/citizens/{BORGER_ID}")]
+    assert session.stats().hits == 3
+
+
+def test_sessionen_glemmes_når_blokken_forlades():
+    forespørgsler = []
+    momentum = _manager(forespørgsler)
+
+    with momentum.session():
+        momentum.borgere.hent_borger_med_id(BORGER_ID)
+    momentum.borgere.hent_borger_med_id(BORGER_ID)
+
+    assert current_session() is None
+    assert len(forespørgsler) == 2
+
+
+def test_skrivning_glemmer_svar_med_samme_id():
+    forespørgsler = []
+    momentum = _manager(forespørgsler)
+
+    with momentum.session() as session:
+        momentum.borgere.hent_borger_med_id(BORGER_ID)
+        momentum.borgere.hent_markeringer(BORGER)
+        momentum.borgere.opdater_borgers_ansvarlige_og_kontaktpersoner(BORGER, "medarbejder")
+        momentum.borgere.opdater_borgers_ansvarlige_og_kontaktpersoner(BORGER, "medarbejder")
+        momentum.borgere.hent_borger_med_id(BORGER_ID)
+
+    assert forespørgsler.count(("GET", f"/api/responsibleCaseworkers/all/byCitizen/{BORGER_ID}")) == 2
+    assert forespørgsler.count(("GET", f"/api/citizens/{BORGER_ID}")) == 2
+    # /tagassignments?referenceId=... har samme id som den skrevne borger
+    assert session.stats().size == 1
+
+
+def test_skrivning_til_andre_ressourcer_bevarer_svar():
+    forespørgsler = []
+    momentum = _manager(forespørgsler)
+
+    with momentum.session():
+        momentum.borgere.hent_borger_med_id(BORGER_ID)
+        momentum.momentum_client.put("/tasks/42", json={})
+        momentum.borgere.hent_borger_med_id(BORGER_ID)
+
+    assert forespørgsler.count(("GET", f"/api/citizens/{BORGER_ID}")) == 1
+
+
+
+def test_kontaktsøgning_bevarer_borgeren():
+    forespørgsler = []
+    momentum = _manager(forespørgsler)
+
+    with momentum.session():
+        momentum.borgere.hent_borger_med_id(BORGER_ID)
+        momentum.borgere.hent_aktive_sagsbehandlere(BORGER)
+        momentum.borgere.hent_alle_private_kontaktpersoner(BORGER)
+        momentum.borgere.hent_borger_med_id(BORGER_ID)
+
+    assert forespørgsler.count(("GET", f"/api/citizens/{BORGER_ID}")) == 1
+
+def test_async_session():
+    forespørgsler = []
+
+    async def main():
+        async with _manager(forespørgsler, AsyncMomentumClientManager) as momentum:
+            with momentum.session():
+                await momentum.borgere.hent_borger_med_id(BORGER_ID)
+                # Opgaver startet i sessionen ser den også
+                await asyncio.create_task(momentum.borgere.hent_borger_med_id(BORGER_ID))
+
+    asyncio.run(main())
+    assert forespørgsler == [("GET", f"/api/citizens/{BORGER_ID}")]
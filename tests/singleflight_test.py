@@ -0,0 +1,226 @@
+import asyncio
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from momentum_client.client import AsyncMomentumClient, MomentumClient
+from momentum_client.deadline import DeadlineExceeded, deadline_scope
+from momentum_client.singleflight import AsyncSingleFlight, SingleFlight, coalesce_key
+from momentum_client.transport import TransportConfig
+
+
+def _klient(handler, klasse=MomentumClient, coalesce=True):
+    return klasse(
+        base_url="https://momentum.test/api",
+        client_id="klient",
+        client_secret="hemmelighed",
+        api_key="apikey",
+        resource="ressource",
+        transport_config=TransportConfig(transport=httpx.MockTransport(handler)),
+        coalesce=coalesce,
+    )
+
+
+def _token(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"access_token": "abc", "token_type": "Bearer", "expires_in": 3600})
+
+
+def test_samtidige_identiske_get_deler_ét_kald():
+    forespørgsler = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/token"):
+            return _token(request)
+        forespørgsler.append(str(request.url))
+        time.sleep(0.1)
+        return httpx.Response(200, json={"id": "a1"})
+
+    client = _klient(handler)
+    client.get("/actors/a0/details")  # Hent tokenet først
+    with ThreadPoolExecutor(8) as pool:
+        svar = list(pool.map(lambda _: client.get("/actors/a1/details"), range(8)))
+
+    assert forespørgsler.count("https://momentum.test/api/actors/a1/details") == 1
+    assert all(s is svar[0] for s in svar)
+    assert client._in_flight.shared == 7
+
+
+def test_forskellige_parametre_deles_ikke():
+    assert coalesce_key("GET", "https://m.test/tags", {"params": {"a": 1}}) != coalesce_key("GET", "https://m.test/tags", {"params": {"a": 2}})
+    assert coalesce_key("GET", "https://m.test/tags", {"timeout": 5}) is None
+    assert coalesce_key("POST", "https://m.test/tags", {}) is None
+
+
+def test_uden_coalesce_sendes_alle_kald():
+    forespørgsler = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/token"):
+            return _token(request)
+        forespørgsler.append(request.url.path)
+        return httpx.Response(200, json={})
+
+    client = _klient(handler, coalesce=False)
+    client.get("/tags")
+    client.get("/tags")
+
+    assert client._in_flight is None
+    assert len(forespørgsler) == 2
+
+
+def test_fejl_deles_med_ventende_kaldere():
+    flight = SingleFlight()
+    startet = threading.Event()
+
+    def fejler():
+        startet.set()
+        time.sleep(0.05)
+        raise httpx.ConnectError("nede")
+
+    with ThreadPoolExecutor(2) as pool:
+        første = pool.submit(flight.do, "nøgle", fejler)
+        startet.wait()
+        anden = pool.submit(flight.do, "nøgle", lambda: "ikke kaldt")
+        with pytest.raises(httpx.ConnectError):
+            første.result()
+        with pytest.raises(httpx.ConnectError):
+            anden.result()
+
+    assert flight.do("nøgle", lambda: "ny") == "ny"
+
+
+def test_ventende_kalder_overholder_sin_egen_deadline():
+    flight = SingleFlight()
+    startet = threading.Event()
+
+    def langsom():
+        startet.set()
+        time.sleep(0.3)
+        return "svar"
+
+    def med_deadline():
+        with deadline_scope(0.05):
+            return flight.do("nøgle", lambda: "ikke kaldt")
+
+    with ThreadPoolExecutor(2) as pool:
+        første = pool.submit(flight.do, "nøgle", langsom)
+        startet.wait()
+        with pytest.raises(DeadlineExceeded):
+            pool.submit(med_deadline).result()
+        assert første.result() == "svar"
+
+
+def test_async_identiske_get_deler_ét_kald():
+    forespørgsler = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/token"):
+            return _token(request)
+        forespørgsler.append(request.url.path)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"id": "t1"})
+
+    async def main():
+        async with _klient(handler, AsyncMomentumClient) as client:
+            await client.get("/actors/a0/details")
+            return await asyncio.gather(*(client.get("/taxonomies/1") for _ in range(5)))
+
+    svar = asyncio.run(main())
+    assert forespørgsler.count("/api/taxonomies/1") == 1
+    assert all(s is svar[0] for s in svar)
+
+
+def test_annulleret_første_kalder_annullerer_ikke_de_andre():
+    async def main():
+        flight = AsyncSingleFlight()
+
+        async def kald():
+            await asyncio.sleep(0.05)
+            return "svar"
+
+        første = asyncio.create_task(flight.do("nøgle", kald))
+        await asyncio.sleep(0)
+        anden = asyncio.create_task(flight.do("nøgle", kald))
+        await asyncio.sleep(0)
+        første.cancel()
+        return await anden
+
+    assert asyncio.run(main()) == "svar"
+
+
+def test_ventende_kalder_med_mere_tid_sender_selv_når_den_første_løber_tør():
+    flight = SingleFlight()
+    startet = threading.Event()
+    kald = []
+
+    def hent():
+        kald.append(threading.current_thread())
+        startet.set()
+        time.sleep(0.1)
+        if len(kald) == 1:
+            raise DeadlineExceeded("første kalders deadline")
+        return "svar"
+
+    def med_kort_deadline():
+        with deadline_scope(0.05):
+            return flight.do("nøgle", hent)
+
+    with ThreadPoolExecutor(2) as pool:
+        første = pool.submit(med_kort_deadline)
+        startet.wait()
+        anden = pool.submit(flight.do, "nøgle", hent)
+        with pytest.raises(DeadlineExceeded):
+            første.result()
+        assert anden.result() == "svar"
+
+    assert len(kald) == 2
+
+
+def test_async_ventende_kalder_med_mere_tid_sender_selv():
+    async def main():
+        flight = AsyncSingleFlight()
+        kald = []
+
+        async def hent():
+            kald.append(None)
+            await asyncio.sleep(0.05)
+            if len(kald) == 1:
+                raise httpx.ReadTimeout("afkortet af første kalders deadline")
+            return "svar"
+
+        async def med_kort_deadline():
+            with deadline_scope(0.02):
+                return await flight.do("nøgle", hent)
+
+        første = asyncio.create_task(med_kort_deadline())
+        await asyncio.sleep(0)
+        anden = asyncio.create_task(flight.do("nøgle", hent))
+        with pytest.raises(httpx.TimeoutException):
+            await første
+        return await anden, len(kald)
+
+    assert asyncio.run(main()) == ("svar", 2)
+
+
+def test_prioriteter_deler_ikke_kald():
+    forespørgsler = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/token"):
+            return _token(request)
+        forespørgsler.append(request.url.path)
+        time.sleep(0.1)
+        return httpx.Response(200, json={})
+
+    client = _klient(handler)
+    client.get("/actors/a0/details")
+    with ThreadPoolExecutor(2) as pool:
+        bulk = pool.submit(client.get, "/tags", priority="bulk")
+        interaktiv = pool.submit(client.get, "/tags", priority="interactive")
+        assert bulk.result() is not interaktiv.result()
+
+    assert forespørgsler.count("/api/tags") == 2
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import stat
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from momentum_client.token_cache import FileTokenCache
+
+
+def _hent_fra_proces(sti: str, tæller: str) -> str:
+    def hent_token():
+        with open(tæller, "a") as f:
+            f.write("x")
+        time.sleep(0.1)
+        return {"access_token": f"token-{os.getpid()}", "expires_in": 3600}
+
+    cache = FileTokenCache(sti)
+    return cache.get_or_fetch(FileTokenCache.key("klient", "ressource"), hent_token)["access_token"]
+
+
+def _async_hent_fra_proces(sti: str, tæller: str) -> str:
+    async def hent_token():
+        with open(tæller, "a") as f:
+            f.write("x")
+        await asyncio.sleep(0.1)
+        return {"access_token": f"token-{os.getpid()}", "expires_in": 3600}
+
+    cache = FileTokenCache(sti)
+    return asyncio.run(cache.aget_or_fetch(FileTokenCache.key("klient", "ressource"), hent_token))["access_token"]
+
+
+def test_gyldigt_token_genbruges(tmp_path):
+    cache = FileTokenCache(tmp_path / "tokens.json")
+    nøgle = FileTokenCache.key("klient", "ressource")
+    kald = []
+
+    def hent_token():
+        kald.append(1)
+        return {"access_token": "abc", "expires_in": 3600}
+
+    assert cache.get_or_fetch(nøgle, hent_token)["access_token"] == "abc"
+    assert FileTokenCache(tmp_path / "tokens.json").get_or_fetch(nøgle, hent_token)["access_token"] == "abc"
+    assert len(kald) == 1
+
+
+def test_token_tæt_på_udløb_hentes_igen(tmp_path):
+    cache = FileTokenCache(tmp_path / "tokens.json", min_remaining=300)
+    nøgle = FileTokenCache.key("klient", "ressource")
+    cache.store(nøgle, {"access_token": "gammelt", "expires_in": 60})
+
+    assert cache.load(nøgle) is None
+    token = cache.get_or_fetch(nøgle, lambda: {"access_token": "nyt", "expires_in": 3600})
+    assert token["access_token"] == "nyt"
+
+
+def test_nøgle_adskiller_klient_og_ressource(tmp_path):
+    cache = FileTokenCache(tmp_path / "tokens.json")
+    cache.store(FileTokenCache.key("klient", "a"), {"access_token": "a", "expires_in": 3600})
+
+    assert cache.load(FileTokenCache.key("klient", "b")) is None
+    assert cache.load(FileTokenCache.key("klient", "a"))["access_token"] == "a"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX-rettigheder")
+def test_cachefil_kun_læsbar_for_ejer(tmp_path):
+    sti = tmp_path / "tokens.json"
+    FileTokenCache(sti).store(FileTokenCache.key("klient", "ressource"), {"access_token": "abc", "expires_in": 3600})
+
+    assert stat.S_IMODE(sti.stat().st_mode) == 0o600
+
+
+def test_processer_deler_ét_token(tmp_path):
+    sti = str(tmp_path / "tokens.json")
+    tæller = str(tmp_path / "tæller")
+
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        tokens = list(pool.map(_hent_fra_proces, [sti] * 4, [tæller] * 4))
+
+    assert len(set(tokens)) == 1
+    assert open(tæller).read() == "x"
+
+
+def test_async_processer_deler_ét_token(tmp_path):
+    sti = str(tmp_path / "tokens.json")
+    tæller = str(tmp_path / "tæller")
+
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        tokens = list(pool.map(_async_hent_fra_proces, [sti] * 4, [tæller] * 4))
+
+    assert len(set(tokens)) == 1
+    assert open(tæller).read() == "x"